@@ -13,11 +13,18 @@ from sklearn.metrics import mean_squared_error
 sys.path.insert(1, '../setup/')
 from gp.contexts.symbolic_regression.primitive_sets import \
     nicolau_a, nicolau_b, nicolau_c
+from gp.corpus.dataset import load_dataset
+from gp.corpus.index import CorpusReader
 
 # Useful directory path.
 # root_dir = f'{os.getcwd()}/experiment/results/programs'
 root_dir = f'{os.getcwd()}/../../results/programs'
 
+# Directory containing input/target data (e.g., that generated 
+# by the `generate_dataset.py` script, for larger numbers of 
+# fitness cases).
+data_dir = f'{root_dir}/..'
+
 ########################################################################
 
 def evaluate(primitive_set, trees, X, t, fitness):
@@ -73,19 +80,16 @@ fitnesses = {name : [[[] for _ in range(n_bins)]
     for _ in range(len(n_fitness_cases))] for name in primitive_sets}
 
 # Load input/target data.
-with open(f'{root_dir}/../inputs.pkl', 'rb') as f:
-    inputs = pickle.load(f)
-with open(f'{root_dir}/../target.pkl', 'rb') as f:
-    target = pickle.load(f)
+inputs, target = load_dataset(data_dir)
 
 for name, ps in primitive_sets.items():
     # Prepare for statistics relevant to the primitive set.
     runtimes.append([])
 
-    # Read in the programs relevant to the primitive set from file.
-    # This file contains `num_size_bins * n_programs` programs.
-    with open(f'{root_dir}/{name}/programs.txt', 'r') as f:
-        programs = f.readlines()
+    # Open the programs relevant to the primitive set. The file
+    # contains `num_size_bins * n_programs` programs, and each bin
+    # is read from file only when needed.
+    programs = CorpusReader(f'{root_dir}/{name}/programs.txt', n_programs)
 
     # Primitive set object for DEAP tool.
     primitive_set = deap.gp.PrimitiveSet("main", len(ps.variables), prefix="v")
@@ -113,7 +117,7 @@ for name, ps in primitive_sets.items():
 
             # `PrimitiveTree` objects for size bin `j + 1`.
             trees = [deap.gp.PrimitiveTree.from_string(p, primitive_set) for 
-                p in programs[n_programs * (j) : n_programs * (j + 1)]]
+                p in programs.read_bin(j)]
 
             # Raw runtimes after running the `evaluate`
             # function a total of `n_runs` times.
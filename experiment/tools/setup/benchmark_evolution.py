@@ -0,0 +1,90 @@
+"""Measure end-to-end cost of evolution, split into phases.
+
+For each primitive set and loop configuration, a population is evolved
+with the vectorized NumPy evaluator, and the wall time of all generations
+is split into selection, variation, evaluation, and I/O. The end-to-end
+speedup predicted for faster evaluators (e.g., an FPGA accelerator) is
+then reported by way of Amdahl's law.
+"""
+# Some relevant imports and initializations.
+import datetime as dt
+import os
+
+from gp.core.batch import ProgramBatch
+from gp.core.evolution import VectorizedEvaluator, evolve
+from gp.core.program import Program
+from gp.corpus.dataset import load_dataset
+from gp.contexts.symbolic_regression.primitive_sets import \
+    nicolau_a, nicolau_b, nicolau_c
+
+# Useful file paths.
+root_dir = f'{os.getcwd()}/../../results/programs'
+data_dir = f'{root_dir}/..'
+log_dir = f'{root_dir}/../evolution'
+
+########################################################################
+
+# Primitive sets.
+primitive_sets = {
+    'nicolau_a' : nicolau_a,
+    'nicolau_b' : nicolau_b,
+    'nicolau_c' : nicolau_c,
+}
+
+# Maximum program depth for each primitive set.
+d = (5, 5, 5)
+
+# Population size.
+n_individuals = 1000
+
+# Number of generations.
+n_generations = 20
+
+# Number of fitness cases.
+nfc = 1000
+
+# Random seed for reproducibility.
+seed = 42
+
+# Loop configurations, given as (mode, overlap) pairs.
+configs = (
+    ('generational', False),
+    ('generational', True),
+    ('steady-state', False),
+    ('steady-state', True),
+)
+
+# Evaluation speedups for which end-to-end speedups are predicted.
+speedups = (10, 100, 1000)
+
+# Load input/target data.
+inputs, target = load_dataset(data_dir)
+
+os.makedirs(log_dir, exist_ok=True)
+
+print(f'\n')
+
+for (name, ps), d_max in zip(primitive_sets.items(), d):
+    ps = ps.freeze()
+    X = inputs[:nfc, :len(ps.variables)]
+    evaluator = VectorizedEvaluator(X, target[:nfc], ps)
+    population = ProgramBatch.from_programs(Program.generate(ps, d_max,
+        Program.max_size(ps.m, d_max), n_programs=n_individuals,
+            seed=seed, key=(name,)))
+
+    for mode, overlap in configs:
+        print(f'({dt.datetime.now().ctime()}) Evolving programs for '
+              f'primitive set `{name}`, mode `{mode}`, overlap `{overlap}`...')
+
+        with open(f'{log_dir}/{name}_{mode}_{int(overlap)}.csv', 'w') as log:
+            _, fitnesses, timings = evolve(population, evaluator, ps,
+                n_generations, seed, mode=mode, d_max=d_max, overlap=overlap,
+                    log=log)
+
+        totals = timings.totals()
+        print(f'    Wall time: {totals.pop("wall"):.3f} s, best fitness: '
+              f'{fitnesses.min():.6g}')
+        for phase, fraction in timings.fractions().items():
+            print(f'    {phase}: {totals[phase]:.3f} s ({100 * fraction:.1f}%)')
+        print('    Predicted end-to-end speedups: ' + ', '.join(
+            f'{timings.amdahl(s):.2f}x ({s}x evaluation)' for s in speedups))
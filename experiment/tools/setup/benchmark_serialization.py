@@ -0,0 +1,54 @@
+"""Measure throughput of program serialization for each notation."""
+# Some relevant imports and initializations.
+import datetime as dt
+import io
+import os
+import pickle
+import timeit
+
+from gp.core.serialization import dump_corpus, notations
+from gp.contexts.symbolic_regression.primitive_sets import \
+    nicolau_a, nicolau_b, nicolau_c
+
+# Useful file path.
+root_dir = f'{os.getcwd()}/../../results/programs'
+
+########################################################################
+
+# Primitive sets.
+primitive_sets = {
+    'nicolau_a' : nicolau_a,
+    'nicolau_b' : nicolau_b,
+    'nicolau_c' : nicolau_c,
+}
+
+# Number of times in which each serialization is run.
+n_runs = 5
+
+# Load programs.
+with open(f'{root_dir}/../programs.pkl', 'rb') as f:
+    programs = pickle.load(f)
+
+print(f'\n')
+
+for name in primitive_sets:
+    # Number of programs and nodes within the corpus.
+    n_programs = sum(len(program_bin) for program_bin in programs[name])
+    n_nodes = sum(len(program) for program_bin in programs[name]
+        for program in program_bin)
+
+    for notation in notations:
+        print(f'({dt.datetime.now().ctime()}) Serializing programs for '
+              f'primitive set `{name}`, notation `{notation}`...')
+
+        # Serialize the whole corpus into an in-memory buffer.
+        f = io.StringIO()
+        runtime = min(timeit.Timer(
+            lambda: dump_corpus(programs[name], io.StringIO(), notation)
+            ).repeat(repeat=n_runs, number=1))
+        dump_corpus(programs[name], f, notation)
+        n_bytes = len(f.getvalue().encode())
+
+        print(f'    {n_programs / runtime:.0f} programs/s, '
+              f'{n_nodes / runtime:.0f} nodes/s, '
+              f'{n_bytes / runtime / 2**20:.1f} MiB/s')
@@ -0,0 +1,56 @@
+"""Compile program corpora into FPGA tree configuration tables.
+
+For each primitive set and each parallel tree depth, every program of
+the corpus is compiled by way of `Tree.machine_code` into dense padded
+arrays (see the module `gp.hw.compiler`), which are written to the file
+`compiled/d{d}_p{d_p}.npz` within the directory for the primitive set.
+"""
+# Some relevant imports and initializations.
+import datetime as dt
+import os
+
+from gp.corpus.index import CorpusReader
+from gp.hw.compiler import compile_corpus
+from gp.hw.program import Program
+from gp.hw.tree import Tree
+from gp.contexts.symbolic_regression.primitive_sets import \
+    nicolau_a, nicolau_b, nicolau_c
+
+# Useful file path.
+root_dir = f'{os.getcwd()}/../../results/programs'
+
+########################################################################
+
+# Primitive sets.
+primitive_sets = {
+    'nicolau_a' : nicolau_a,
+    'nicolau_b' : nicolau_b,
+    'nicolau_c' : nicolau_c,
+}
+
+# Program tree depth constraints for each primitive set.
+d = (9, 7, 7)
+
+# Parallel tree depths for each primitive set, where `None` denotes
+# every possible parallel depth (i.e., 0 through `d - 1`).
+d_p = (None, None, None)
+
+# Number of programs per bin.
+n_programs = 512
+
+# Number of worker processes, where -1 denotes all available threads.
+n_threads = -1
+
+for (name, ps), d_, d_p_ in zip(primitive_sets.items(), d, d_p):
+    os.makedirs(f'{root_dir}/{name}/compiled', exist_ok=True)
+    with CorpusReader(f'{root_dir}/{name}/programs.txt', n_programs) as f:
+        bins = [[Program.from_str(p, ps) for p in f.read_bin(j)]
+            for j in range(f.n_bins)]
+    for p in (range(d_) if d_p_ is None else d_p_):
+        print(f'({dt.datetime.now().ctime()}) Compiling programs for '
+              f'primitive set `{name}`, tree depth {d_}, parallel '
+              f'depth {p}...')
+        compiled = compile_corpus(bins, Tree(ps, d_, p), n_threads)
+        compiled.save(f'{root_dir}/{name}/compiled/d{d_}_p{p}.npz')
+        print(f'    {int(compiled.valid.sum())} of {len(compiled)} '
+              f'programs compiled.')
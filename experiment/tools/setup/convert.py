@@ -4,36 +4,17 @@ import datetime as dt
 import os
 import pickle
 
-from gp.hw.program import Program
+from gp.corpus.index import write_corpus
 from gp.contexts.symbolic_regression.primitive_sets import \
     nicolau_a, nicolau_b, nicolau_c
 
 # Useful file path.
 root_dir = f'{os.getcwd()}/../../results/programs'
 
-########################################################################
-
-def tensorgp_str(self):
-    """Return program string for TensorGP.
-    
-    Constant terminal values `t` must be rewritten as 
-    the string `scalar(t)`.
-    """
-    stack = []
-    for node in reversed(self):
-        if node.function:
-            operands = [stack.pop() for _ in range(node.arity)]
-            stack.append((')' + ' ,'.join(
-                [op[::-1] for op in operands[::-1]]) 
-                + '(' + node.name[::-1])[::-1])
-        elif node.variable:
-            stack.append(node.name)
-        else:
-            stack.append(f'scalar({str(node.name)})')
-    return stack.pop() if stack != [] else ''
-
-# Add method to `Program` class.
-setattr(Program, 'tensorgp_str', property(tensorgp_str))
+# Extension denoting the compression of TensorGP program files
+# (i.e., '', '.gz', '.bz2', or '.xz'). Note that Operon requires
+# uncompressed program files.
+compression = ''
 
 ########################################################################
 
@@ -56,21 +37,9 @@ for name, ps in primitive_sets.items():
         f'primitive set `{name}`...')
 
     # Convert programs to a representation relevant to TensorGP.
-    with open(f'{root_dir}/{name}/programs_tensorgp.txt', 'w+') as f:
-        for i, program_bin in enumerate(programs[name]):
-            for j, program in enumerate(program_bin):
-                f.write(f'{program.tensorgp_str}')
-                if j < len(program_bin) - 1:
-                    f.write(f'\n')
-            if i < len(programs[name]) - 1:
-                f.write(f'\n')
+    write_corpus(f'{root_dir}/{name}/programs_tensorgp.txt{compression}', 
+        programs[name], 'tensorgp')
 
     # Convert programs to a representation relevant to Operon.
-    with open(f'{root_dir}/{name}/programs_operon.txt', 'w+') as f:
-        for i, program_bin in enumerate(programs[name]):
-            for j, program in enumerate(program_bin):
-                f.write(f'{program.inorder_str}')
-                if j < len(program_bin) - 1:
-                    f.write(f'\n')
-            if i < len(programs[name]) - 1:
-                f.write(f'\n')
\ No newline at end of file
+    write_corpus(f'{root_dir}/{name}/programs_operon.txt', 
+        programs[name], 'infix')
@@ -0,0 +1,76 @@
+"""Explore compacted tree configurations for each program corpus.
+
+For each primitive set, a sample of programs from each bin of the corpus
+is compiled for every combination of tree depth and parallel tree depth,
+and the resulting metrics (see the module `gp.hw.dse`) are written to the
+file `dse/{name}.csv`, where Pareto-optimal configurations are marked.
+Compiled samples are cached within the directory `dse/cache/{name}`, so
+that repeated sweeps compile only new configurations.
+"""
+# Some relevant imports and initializations.
+import datetime as dt
+import os
+
+from gp.corpus.index import CorpusReader
+from gp.hw.dse import report, sample, sweep
+from gp.hw.performance import CycleModel
+from gp.hw.program import Program
+from gp.contexts.symbolic_regression.primitive_sets import \
+    nicolau_a, nicolau_b, nicolau_c
+
+# Useful file path.
+root_dir = f'{os.getcwd()}/../../results/programs'
+
+# Directory to contain sweep results.
+dse_dir = f'{root_dir}/../dse'
+
+########################################################################
+
+# Primitive sets.
+primitive_sets = {
+    'nicolau_a' : nicolau_a,
+    'nicolau_b' : nicolau_b,
+    'nicolau_c' : nicolau_c,
+}
+
+# Tree depths to explore for each primitive set.
+d = (range(5, 10), range(5, 8), range(5, 8))
+
+# Number of programs per bin.
+n_programs = 512
+
+# Number of programs sampled from each bin, and random seed.
+n_samples = 32
+seed = 0
+
+# Cycle model (e.g., as fitted by the `fit_performance.py` script) and
+# number of fitness cases with which to predict cycles.
+model = CycleModel(lanes=1, pipeline_depth=0.0, word_cycles=3.0,
+    transfer_overhead=20.0)
+nfc = 1000
+
+# Number of worker processes, where -1 denotes all available threads.
+n_threads = -1
+
+for (name, ps), d_ in zip(primitive_sets.items(), d):
+    print(f'({dt.datetime.now().ctime()}) Sampling programs for '
+          f'primitive set `{name}`...')
+    with CorpusReader(f'{root_dir}/{name}/programs.txt', n_programs) as f:
+        bins = [[Program.from_str(p, ps) for p in f.read_bin(j)]
+            for j in range(f.n_bins)]
+    programs, indices = sample(bins, n_samples, seed)
+
+    print(f'({dt.datetime.now().ctime()}) Exploring configurations for '
+          f'primitive set `{name}`...')
+    configs = [(d__, p) for d__ in d_ for p in range(d__)]
+    rows = sweep(ps, programs, configs, indices, model, nfc,
+        f'{dse_dir}/cache/{name}/n{n_samples}_s{seed}', n_threads)
+    with open(f'{dse_dir}/{name}.csv', 'w+') as f:
+        f.write(report(rows))
+
+    for row in rows:
+        if row['pareto']:
+            print(f'    d={row["d"]}, d_p={row["d_p"]}: area {row["area"]}, '
+                  f'coverage {row["coverage"]:.2%}, windows '
+                  f'{row["windows"]:.2f}, waste {row["waste"]:.2%}, '
+                  f'cycles {row["cycles"]:.1f}')
@@ -0,0 +1,66 @@
+"""Build bit-packed program memory images with constant pools.
+
+For each primitive set and each bin of the corpus, a bit-packed image
+with a constant pool of its own (see the module `gp.hw.encoding`) is
+written to the file `images/{j}.img` within the directory for the
+primitive set. The size of each image is compared with that of the
+64-bit program memory image (i.e., the `.bin` format of the module
+`gp.hw.memory`) and that of the bit-packed image without a pool.
+"""
+# Some relevant imports and initializations.
+import datetime as dt
+import os
+
+import numpy as np
+
+from gp.corpus.index import CorpusReader
+from gp.hw.encoding import encode_bins
+from gp.hw.program import Program
+from gp.contexts.symbolic_regression.primitive_sets import \
+    nicolau_a, nicolau_b, nicolau_c
+
+# Useful file path.
+root_dir = f'{os.getcwd()}/../../results/programs'
+
+########################################################################
+
+# Primitive sets.
+primitive_sets = {
+    'nicolau_a' : nicolau_a,
+    'nicolau_b' : nicolau_b,
+    'nicolau_c' : nicolau_c,
+}
+
+# Program tree depth constraints for each primitive set.
+d = (9, 7, 7)
+
+# Whether each image has a constant pool, where `None` denotes a pool
+# only when it makes the image smaller.
+pool = None
+
+# Number of programs per bin.
+n_programs = 512
+
+for (name, ps), d_ in zip(primitive_sets.items(), d):
+    print(f'({dt.datetime.now().ctime()}) Encoding programs for '
+          f'primitive set `{name}`...')
+    os.makedirs(f'{root_dir}/{name}/images', exist_ok=True)
+    with CorpusReader(f'{root_dir}/{name}/programs.txt', n_programs) as f:
+        images = encode_bins(([Program.from_str(p, ps) for p in f.read_bin(j)]
+            for j in range(f.n_bins)), ps, d_, pool)
+    totals = [0, 0, 0]
+    for j, image in enumerate(images):
+        with open(f'{root_dir}/{name}/images/{j}.img', 'wb') as f:
+            f.write(image.dumps())
+        # Sizes of the 64-bit image, and of the bit-packed images
+        # without (i.e., with 32-bit constants) and with a pool.
+        sizes = (8 * len(image), image.nbytes - 4 * len(image.pool)
+            - len(image.constants) + 4 * image.n_constants, image.nbytes)
+        totals = [t + n for t, n in zip(totals, sizes)]
+        print(f'    Bin {j + 1}: {sizes[0]} -> {sizes[1]} -> {sizes[2]} '
+              f'bytes, {len(np.unique(image.values()))} of '
+              f'{image.n_constants} constants distinct, compression '
+              f'ratio {sizes[0] / sizes[2]:.2f}')
+    print(f'    Total: {totals[0]} -> {totals[1]} -> {totals[2]} bytes, '
+          f'compression ratio {totals[0] / totals[2]:.2f} (constant pool '
+          f'{totals[1] / totals[2]:.2f})')
@@ -1,11 +1,10 @@
 # Some relevant imports and initializations.
 import datetime as dt
 import os
-import pickle
-
-import numpy as np
 
 from gp.core.evaluation import standard as evaluate
+from gp.corpus.dataset import load_dataset
+from gp.corpus.index import CorpusReader
 from gp.hw.program import Program
 from gp.contexts.symbolic_regression.primitive_sets import \
     nicolau_a, nicolau_b, nicolau_c
@@ -15,6 +14,11 @@ from gp.contexts.symbolic_regression.fitness import rmse
 # root_dir = f'{os.getcwd()}/experiment/results/programs'
 root_dir = f'{os.getcwd()}/../../results/programs'
 
+# Directory containing input/target data (e.g., that generated 
+# by the `generate_dataset.py` script, for larger numbers of 
+# fitness cases).
+data_dir = f'{root_dir}/..'
+
 ########################################################################
 
 # Primitive sets.
@@ -40,22 +44,17 @@ n_variables = [len(primitive_sets[name].variables) for name in primitive_sets]
 # Load programs and input/target data.
 # with open(f'{root_dir}/../programs.pkl', 'rb') as f:
 #     programs = pickle.load(f)
-with open(f'{root_dir}/../inputs.pkl', 'rb') as f:
-    inputs = pickle.load(f)
-with open(f'{root_dir}/../target.pkl', 'rb') as f:
-    target = pickle.load(f)
-inputs = np.asarray(inputs)
-target = np.asarray(target)
+inputs, target = load_dataset(data_dir)
 
 # Dictionary to contain fitness results relevant to each primitive set.
 results = {name : [[] for _ in range(len(n_fitness_cases))] 
     for name in primitive_sets}
 
 for name, ps in primitive_sets.items():
-    # Read in the programs relevant to the primitive set from file.
-    # This file contains `num_size_bins * n_programs` programs.
-    with open(f'{root_dir}/{name}/programs.txt', 'r') as f:
-        programs = f.readlines()
+    # Open the programs relevant to the primitive set. The file
+    # contains `num_size_bins * n_programs` programs, and each bin
+    # is read from file only when needed.
+    programs = CorpusReader(f'{root_dir}/{name}/programs.txt', n_programs)
 
     for i, nfc in enumerate(n_fitness_cases):
         # For number of fitness cases `nfc`...
@@ -63,7 +62,7 @@ for name, ps in primitive_sets.items():
         for j in range(n_bins):
             # For program bin `j + 1`...
             program_bin = [Program.from_str(p, ps) for 
-                p in programs[n_programs * (j) : n_programs * (j + 1)]]
+                p in programs.read_bin(j)]
 
             print(f'({dt.datetime.now().ctime()}) Evaluating programs for '
                 f'primitive set `{name}`, bin {j+1}, {nfc} fitness cases...')
@@ -0,0 +1,128 @@
+"""Fit the analytical cycle model to measured FPGA runtimes.
+
+For each primitive set, the programs of the corpus are compiled for the
+relevant tree configuration, so as to obtain the number of windows of
+each program, and the parameters of the cycle model (see the module
+`gp.hw.performance`) are fitted to the runtime files within the
+directory `runtimes/fpga`. Predicted and measured NEPS for each bin are
+written to the file `runtimes/model/{name}.csv`, and the predicted NEPS
+of hypothetical accelerators with more lanes are printed.
+
+The corpus must be the one whose runtimes were measured. Since programs
+depend on the generation method and on the random number stream of each
+program, a corpus generated anew by the `generate.py` script generally
+differs from the measured corpus, which was generated by the 'heuristic'
+method. A corpus whose manifest records any other method is rejected, as
+is a corpus containing a program that does not fit within the measured
+accelerator.
+"""
+# Some relevant imports and initializations.
+import datetime as dt
+import json
+import os
+
+import numpy as np
+
+from gp.corpus.index import CorpusReader
+from gp.hw.compiler import compile_corpus
+from gp.hw.performance import CycleModel, Observation, read_runtimes, report
+from gp.hw.program import Program
+from gp.hw.tree import Tree
+from gp.contexts.symbolic_regression.primitive_sets import \
+    nicolau_a, nicolau_b, nicolau_c
+
+# Useful file path.
+root_dir = f'{os.getcwd()}/../../results/programs'
+
+# Directory containing the corpus whose runtimes were measured (see the
+# module docstring).
+corpus_dir = root_dir
+
+# Directories containing measured runtimes and model results.
+runtime_dir = f'{root_dir}/../runtimes/fpga'
+model_dir = f'{root_dir}/../runtimes/model'
+
+########################################################################
+
+# Primitive sets.
+primitive_sets = {
+    'nicolau_a' : nicolau_a,
+    'nicolau_b' : nicolau_b,
+    'nicolau_c' : nicolau_c,
+}
+
+# Program tree depth constraints for each primitive set.
+d = (9, 7, 7)
+
+# Parallel tree depths of the measured accelerator for each primitive set.
+d_p = (8, 6, 6)
+
+# Numbers of fitness cases relevant to each primitive set.
+n_fitness_cases = (10, 100, 1000, 10000, 100000)
+
+# Number of programs per bin.
+n_programs = 512
+
+# Numbers of lanes of hypothetical accelerators.
+lanes = (1, 2, 4, 8)
+
+# Number of worker processes, where -1 denotes all available threads.
+n_threads = -1
+
+# A corpus generated before manifests were written has no manifest.
+if os.path.exists(f'{corpus_dir}/manifest.json'):
+    with open(f'{corpus_dir}/manifest.json') as f:
+        method = json.load(f)['config']['method']
+    if method != 'heuristic':
+        raise ValueError(f'Corpus within `{corpus_dir}` was generated by '
+                         f'method `{method}`, rather than by the measured '
+                         f'method `heuristic`.')
+
+os.makedirs(model_dir, exist_ok=True)
+
+for (name, ps), d_, d_p_ in zip(primitive_sets.items(), d, d_p):
+    print(f'({dt.datetime.now().ctime()}) Compiling programs for '
+          f'primitive set `{name}`...')
+    with CorpusReader(f'{corpus_dir}/{name}/programs.txt', n_programs) as f:
+        bins = [[Program.from_str(p, ps) for p in f.read_bin(j)]
+            for j in range(f.n_bins)]
+    compiled = compile_corpus(bins, Tree(ps, d_, d_p_), n_threads)
+    if not compiled.valid.all():
+        # Measured cycles include every program, so none may be omitted.
+        raise ValueError(f'{int((~compiled.valid).sum())} of '
+                         f'{len(compiled)} programs for primitive set '
+                         f'`{name}` do not fit within the measured tree.')
+    sizes = np.array([len(p) for program_bin in bins for p in program_bin])
+
+    # Measured runtimes for each number of fitness cases.
+    observations = []
+    for nfc in n_fitness_cases:
+        frequency, cycles = read_runtimes(f'{runtime_dir}/{name}/{nfc}.txt')
+        if len(cycles) != len(bins):
+            raise ValueError(f'Runtimes for primitive set `{name}` and '
+                             f'{nfc} fitness cases are given for '
+                             f'{len(cycles)} bins, rather than '
+                             f'{len(bins)}.')
+        observations.append(Observation(sizes, compiled.terminal_windows,
+            compiled.bins, nfc, frequency, cycles))
+
+    print(f'({dt.datetime.now().ctime()}) Fitting cycle model for '
+          f'primitive set `{name}`...')
+    model = CycleModel.fit(observations)
+    print(f'    {model}')
+    with open(f'{model_dir}/{name}.csv', 'w+') as f:
+        f.write(report(model, observations, [name] * len(observations)))
+
+    for o in observations:
+        predicted, measured = model.neps(o)
+        error = np.abs(predicted / measured - 1)
+        print(f'    {o.nfc} fitness cases: mean relative NEPS error '
+              f'{error.mean():.2%} (max. {error.max():.2%})')
+
+    # Hypothetical accelerators differ only in their numbers of lanes.
+    for lanes_ in lanes:
+        hypothetical = CycleModel(lanes_, model.pipeline_depth,
+            model.word_cycles, model.transfer_overhead)
+        neps = [hypothetical.neps(o)[0].mean() for o in observations]
+        print(f'    {lanes_} lane(s): mean predicted NEPS ' +
+              ', '.join(f'{n:.3e}' for n in neps))
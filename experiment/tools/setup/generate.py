@@ -1,18 +1,23 @@
 # Some relevant imports and initializations.
 import datetime as dt
-import math
 import os
 import pickle
 import random
 
 import numpy as np
 
+from gp.corpus import dataset, pipeline, query
 from gp.hw.program import Program
+from gp.contexts.symbolic_regression import stress
 from gp.contexts.symbolic_regression.primitive_sets import \
     nicolau_a, nicolau_b, nicolau_c
 
-# Random seed for reproducibility.
-random.seed(42)
+# Random seed for reproducibility. Each program is generated with its
+# own random number stream, which is derived from this seed and from
+# the name of the primitive set, the bin index, and the program index, 
+# so that the programs do not depend on the number of worker processes.
+seed = 42
+random.seed(seed)
 
 # Useful file path.
 root_dir = f'{os.getcwd()}/../../results/programs'
@@ -39,6 +44,37 @@ n_bins = 32
 # Number of programs per bin.
 n_programs = 512
 
+# Method by which programs are generated: 'uniform', for which the 
+# programs of each bin have exact sizes spread evenly over the sizes 
+# possible for the bin, and each program is drawn uniformly at random 
+# from all programs of its size; or 'heuristic', for which the sizes 
+# of programs are chosen by way of the `Program._generate` method.
+method = 'uniform'
+
+# Mode of generation: 'standard', or 'stress', for which program 
+# constants and input values are replaced with zero, huge, or infinite 
+# values at the given rates, so that the protections of the relevant 
+# GP functions are used often (see the module `stress`). A stress 
+# corpus and dataset are written within a separate directory.
+mode = 'standard'
+stress_rates = {'zero_rate' : 0.05, 'huge_rate' : 0.05, 'inf_rate' : 0.0}
+
+# Whether or not to pickle all programs (e.g., for the `convert.py`
+# script), which requires the whole corpus to be held in memory.
+pickle_programs = True
+
+# Extensions denoting the compression of program files and of 
+# input/target data files, respectively (i.e., '', '.gz', '.bz2', 
+# or '.xz'). Note that Operon requires uncompressed data files.
+program_compression = ''
+data_compression = ''
+
+if mode == 'stress':
+    root_dir = f'{root_dir}/../stress/programs'
+    for name in primitive_sets:
+        for nfc in n_fitness_cases:
+            os.makedirs(f'{root_dir}/{name}/{nfc}', exist_ok=True)
+
 # Numbers of variables relevant to each primitive set.
 n_variables = [len(primitive_sets[name].variables) for name in primitive_sets]
 
@@ -51,76 +87,54 @@ inputs = np.array(
         for _ in range(max(n_fitness_cases))])
 target = np.array(
     [random.random() for _ in range(max(n_fitness_cases))])
+if mode == 'stress':
+    inputs = stress.inputs(
+        max(n_fitness_cases), max(n_variables), seed, **stress_rates)
+
+print(f'\n')
 
-# Dictionary of programs for each primitive set.
-programs = {name : [] for name in primitive_sets}
+# Generate random programs for each primitive set, one bin at a time. 
+# Each bin is written to all output files as soon as it is complete, 
+# and an interrupted run resumes from the last bin written.
+outputs = {
+    f'programs.txt{program_compression}' : 'prefix', 
+    'program_memory.txt' : 'machine_code',
+}
+for name, i in pipeline.run(root_dir, Program, primitive_sets, d, n_bins, 
+    n_programs, seed, method, outputs, n_threads=-1, 
+    transform=(stress.Stress(seed, stress_rates['zero_rate'], 
+        stress_rates['huge_rate']) if mode == 'stress' else None)):
+    if i == 0 or (i + 1) % 8 == 0:
+        print(f'({dt.datetime.now().ctime()}) Generated bin {i + 1} of '
+              f'{n_bins} for primitive set `{name}`.')
 
 print(f'\n')
 
-for (name, ps), d_ in zip(primitive_sets.items(), d):
-    print(f'({dt.datetime.now().ctime()}) Generating random programs '
-          f'for primitive set `{name}`...')
+for name, ps in primitive_sets.items():
+    # Preserve a table of program properties (e.g., sizes, depths, and 
+    # opcode counts), by which the corpus may be queried.
+    path = f'{root_dir}/{name}/programs.txt{program_compression}'
+    query.ProgramTable.from_file(path, ps).save(query.table_path(path))
 
-    # Maximum possible program size.
-    s_max_possible = Program.max_size(ps.m, d_)
-
-    # Number of unique sizes per program bin (except possibly the last).
-    n_sizes = math.ceil(s_max_possible / n_bins)
-
-    for i in range(n_bins):
-        # Minimum/maximum sizes of programs for the current bin.
-        s_min = i * n_sizes + 1
-        s_max = s_max_possible if i == n_bins - 1 else (i + 1) * n_sizes
-
-        # Construct random program expressions for bin `i`.
-        programs[name].append(Program.generate(
-            primitive_set=ps, d_max=d_, s_max=s_max, d_min=0, 
-            s_min=s_min, n_programs=n_programs, n_threads=-1))
-
-    # Preserve information about program expressions.
-    with open(f'{root_dir}/{name}/programs.txt', 'w+') as f:
-        for i, program_bin in enumerate(programs[name]):
-            for j, program in enumerate(program_bin):
-                f.write(f'{program}')
-                if j < len(program_bin) - 1:
-                    f.write(f'\n')
-            if i < len(programs[name]) - 1:
-                f.write(f'\n')
-    with open(f'{root_dir}/{name}/program_memory.txt', 'w+') as f:
-        for i, program_bin in enumerate(programs[name]):
-            for j, program in enumerate(program_bin):
-                machine_code = program.machine_code()
-                for code in machine_code[:-1]:
-                    f.write(f'{code}\n')
-                f.write(f'{machine_code[-1]}')
-                if j < len(program_bin) - 1:
-                    f.write(f'\n')
-            if i < len(programs[name]) - 1:
-                f.write(f'\n')
+    print(f'({dt.datetime.now().ctime()}) Writing input/target data '
+          f'for primitive set `{name}`...')
 
     # For each number of fitness cases, preserve the relevant 
-    # subset of input/target data.
+    # subset of input/target data. (Note that Operon requires a 
+    # newline at the end of the CSV file to be able to parse it.)
     for nfc in n_fitness_cases:
-        input_ = inputs[:nfc, :len(ps.variables)]
-        target_ = target[:nfc]
-        data = np.column_stack((input_, target_))
-        with open(f'{root_dir}/{name}/{nfc}/data.csv', 'w+') as f:
-            # Write header information.
-            for name_ in ps.variables:
-                f.write(f'{name_},')
-            f.write(f'y\n')
-            # Write data.
-            for i, row in enumerate(data):
-                for value in row[:-1]:
-                    f.write(f'{str(value)},')
-                f.write(f'{str(row[-1])}\n')
-                # NOTE: We need a newline at the end of the CSV file 
-                # for Operon to be able to parse it.
-
-# Pickle the programs and input/target data.
-with open(f'{root_dir}/../programs.pkl', 'wb') as f:
-    pickle.dump(programs, f)
-with open(f'{root_dir}/../inputs.pkl', 'wb') as f:
-    pickle.dump(inputs, f)
-with open(f'{root_dir}/../target.pkl', 'wb') as f:
-    pickle.dump(target, f)
\ No newline at end of file
+        dataset.write_data_csv(
+            f'{root_dir}/{name}/{nfc}/data.csv{data_compression}', 
+            inputs[:nfc, :len(ps.variables)], target[:nfc], ps.variables, 
+            n_threads=-1)
+
+# Preserve the input/target data, and pickle the programs. The 
+# programs are read back from the program files, one primitive set 
+# at a time.
+dataset.save_dataset(f'{root_dir}/..', inputs, target)
+if pickle_programs:
+    programs = {name : pipeline.load(f'{root_dir}/{name}/programs.txt', 
+        Program, ps) for name, ps in primitive_sets.items()}
+    with open(f'{root_dir}/../programs.pkl', 'wb') as f:
+        pickle.dump(programs, f)
+    del programs
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""Generate large synthetic input/target datasets.
+
+The resulting dataset may be used by `evaluate.py` and by the DEAP and 
+TensorGP profilers, by way of their `data_dir` settings, along with 
+numbers of fitness cases up to `n_rows`. For the Operon profiler, the
+relevant subset of the dataset is also written to the file `data.csv`
+within the result directory for each primitive set and each number of
+fitness cases.
+"""
+# Some relevant imports and initializations.
+import datetime as dt
+import os
+
+from gp.corpus.dataset import generate_dataset, write_data_csv
+from gp.contexts.symbolic_regression.primitive_sets import \
+    nicolau_a, nicolau_b, nicolau_c
+
+# Useful file paths.
+root_dir = f'{os.getcwd()}/../../results/programs'
+data_dir = f'{root_dir}/../datasets/large'
+
+########################################################################
+
+# Primitive sets.
+primitive_sets = {
+    'nicolau_a' : nicolau_a, 
+    'nicolau_b' : nicolau_b,
+    'nicolau_c' : nicolau_c,
+}
+
+# Numbers of fitness cases relevant to each primitive set.
+n_fitness_cases = (1000000, 10000000)
+
+# Number of rows within the dataset.
+n_rows = max(n_fitness_cases)
+
+# Random seed for reproducibility.
+seed = 42
+
+# Distribution of input values (i.e., 'uniform', 'normal', 
+# or 'heavy-tailed').
+distribution = 'uniform'
+
+# Target function, given as a program string for the primitive 
+# set `target_primitive_set`, or as `None` for uniformly random
+# target values.
+target = None
+target_primitive_set = nicolau_a
+
+# Number of input variables (i.e., the maximum number of 
+# variables relevant to any primitive set).
+n_variables = max(len(ps.variables) for ps in primitive_sets.values())
+
+print(f'({dt.datetime.now().ctime()}) Generating dataset with {n_rows} '
+      f'rows and {n_variables} variables...')
+
+os.makedirs(data_dir, exist_ok=True)
+inputs, target_ = generate_dataset(data_dir, n_rows, n_variables, seed, 
+    distribution, target, target_primitive_set)
+
+# For each number of fitness cases, write the relevant subset of the
+# dataset for Operon, which reads the file `{nfc}/data.csv` (and which 
+# requires uncompressed data files). The memory-mapped data is written
+# one chunk at a time.
+for name, ps in primitive_sets.items():
+    print(f'({dt.datetime.now().ctime()}) Writing input/target data '
+          f'for primitive set `{name}`...')
+    for nfc in n_fitness_cases:
+        os.makedirs(f'{root_dir}/{name}/{nfc}', exist_ok=True)
+        write_data_csv(f'{root_dir}/{name}/{nfc}/data.csv', 
+            inputs[:nfc, :len(ps.variables)], target_[:nfc], ps.variables, 
+            n_threads=-1)
+
+print(f'({dt.datetime.now().ctime()}) Done.')
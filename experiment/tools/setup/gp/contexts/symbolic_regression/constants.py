@@ -1,5 +1,7 @@
 """GP constants."""
 import numpy as np
 
-def rand(low=0.0, high=1.0):
-    return np.random.uniform(low, high)
\ No newline at end of file
+def rand(low=0.0, high=1.0, rng=None):
+    if rng is None:
+        return np.random.uniform(low, high)
+    return rng.uniform(low, high)
\ No newline at end of file
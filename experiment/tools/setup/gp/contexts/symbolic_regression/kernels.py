@@ -0,0 +1,57 @@
+"""Vectorized GP functions.
+
+Each function is equivalent to the function of the same name within
+the `functions` module, except that it is applied elementwise to
+NumPy arrays.
+"""
+import numpy as np
+
+def _protect(res):
+    """Replace infinite and NaN elements with positive infinity."""
+    return np.where(np.isfinite(res), res, np.inf)
+
+def add(x1, x2):
+    """Return result of addition."""
+    with np.errstate(all='ignore'):
+        return _protect(np.add(x1, x2))
+
+def aq(x1, x2):
+    """Return result of analytical quotient."""
+    with np.errstate(all='ignore'):
+        return _protect(np.divide(x1, np.sqrt(np.add(1, np.square(x2)))))
+
+def exp(x):
+    """Return result of exponentiation, base `e`."""
+    with np.errstate(all='ignore'):
+        return np.exp(x)
+
+def log(x):
+    """Return result of protected logarithm, base `e`."""
+    with np.errstate(all='ignore'):
+        return np.where(np.not_equal(x, 0), np.log(np.abs(x)), 0.0)
+
+def mul(x1, x2):
+    """Return result of multiplication."""
+    with np.errstate(all='ignore'):
+        return _protect(np.multiply(x1, x2))
+
+def sin(x):
+    """Return result of sine."""
+    with np.errstate(all='ignore'):
+        res = np.sin(x)
+        return np.where(np.isnan(res), np.inf, res)
+
+def sqrt(x):
+    """Return result of protected square root."""
+    with np.errstate(all='ignore'):
+        return np.sqrt(np.abs(x))
+
+def sub(x1, x2):
+    """Return result of subtraction."""
+    with np.errstate(all='ignore'):
+        return _protect(np.subtract(x1, x2))
+
+def tanh(x):
+    """Return result of hyperbolic tangent."""
+    with np.errstate(all='ignore'):
+        return np.tanh(x)
@@ -6,11 +6,14 @@ sys.path.insert(1, '../setup/')
 
 from . import constants as c
 from . import functions as f
+from . import kernels as k
 from gp.core.primitive_set import PrimitiveSet
 
 nicolau_a = PrimitiveSet(
     functions=OrderedDict(
         {'add' : f.add, 'sub' : f.sub, 'mul' : f.mul, 'aq' : f.aq}),
+    kernels=OrderedDict(
+        {'add' : k.add, 'sub' : k.sub, 'mul' : k.mul, 'aq' : k.aq}),
     variables=OrderedDict(
         {name : None for name in [f'v{i}' for i in range(3)]}),
     constants=OrderedDict({'rand' : c.rand}))
@@ -19,6 +22,9 @@ nicolau_b = PrimitiveSet(
     functions=OrderedDict(
         {'sin' : f.sin, 'tanh' : f.tanh, 'add' : f.add, 'sub' : f.sub, 
         'mul' : f.mul, 'aq' : f.aq}),
+    kernels=OrderedDict(
+        {'sin' : k.sin, 'tanh' : k.tanh, 'add' : k.add, 'sub' : k.sub, 
+        'mul' : k.mul, 'aq' : k.aq}),
     variables=OrderedDict(
         {name : None for name in [f'v{i}' for i in range(5)]}),
     constants=OrderedDict({'rand' : c.rand}))
@@ -28,6 +34,10 @@ nicolau_c = PrimitiveSet(
         {'sin' : f.sin, 'tanh' : f.tanh, 'exp' : f.exp, 'log' : f.log, 
         'sqrt' : f.sqrt, 'add' : f.add, 'sub' : f.sub, 'mul' : f.mul, 
         'aq' : f.aq}),
+    kernels=OrderedDict(
+        {'sin' : k.sin, 'tanh' : k.tanh, 'exp' : k.exp, 'log' : k.log, 
+        'sqrt' : k.sqrt, 'add' : k.add, 'sub' : k.sub, 'mul' : k.mul, 
+        'aq' : k.aq}),
     variables=OrderedDict(
         {name : None for name in [f'v{i}' for i in range(8)]}),
     constants=OrderedDict({'rand' : c.rand}))
\ No newline at end of file
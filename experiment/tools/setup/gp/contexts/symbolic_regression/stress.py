@@ -0,0 +1,128 @@
+"""Numerical stress tests for protected GP functions.
+
+Uniformly random inputs from the interval [0, 1) rarely cause any of
+the protections within the `functions` module to be used, e.g., for
+overflow to infinity, for NaN results, or for the logarithm of zero.
+This module produces inputs and programs for which these cases occur
+at controlled rates, so that the cost of the relevant code paths can
+be measured for any evaluator.
+
+Three kinds of "special" values are used:
+zero -- The value 0.0, for which `log` is protected.
+huge -- Values of magnitude `huge`, any product of two of which (or
+    the exponential of any one of which) overflows to infinity.
+inf -- Infinite values, for which subtraction or addition of values
+    of opposite sign, multiplication by zero, and `sin` yield NaN.
+"""
+import numpy as np
+
+from gp.core.rng import stream, stream_seed
+
+# Magnitude of "huge" values.
+huge = 1e300
+
+def _special(generator, shape, zero_rate, huge_rate, inf_rate):
+    """Return array of zero/huge/infinite values and a mask of them.
+
+    Each element is independently zero, huge, or infinite with the
+    given probabilities, in which case its sign is random (except for
+    zero) and its mask element is `True`.
+    """
+    u = generator.random(shape)
+    sign = np.where(generator.random(shape) < 0.5, -1.0, 1.0)
+    values = np.select([u < zero_rate, u < zero_rate + huge_rate],
+        [0.0, sign * huge], sign * np.inf)
+    return values, u < zero_rate + huge_rate + inf_rate
+
+def inputs(n_rows, n_variables, seed, zero_rate=0.05, huge_rate=0.05,
+    inf_rate=0.0):
+    """Return input data containing special values at the given rates.
+
+    Every other value is drawn uniformly from the interval [0, 1).
+    """
+    if zero_rate < 0 or huge_rate < 0 or inf_rate < 0 or (
+        zero_rate + huge_rate + inf_rate > 1):
+        raise ValueError('Invalid rates.')
+    generator = np.random.default_rng(stream_seed(seed, 'stress', 'inputs'))
+    X = generator.random((n_rows, n_variables))
+    values, mask = _special(
+        generator, X.shape, zero_rate, huge_rate, inf_rate)
+    return np.where(mask, values, X)
+
+class Stress:
+    """Class for transformation of program bins into stress tests.
+
+    Each constant within a program is independently replaced with zero
+    or with a huge value (of random sign) with the given probabilities,
+    by way of the random number stream given by `seed` and the key of
+    the relevant bin, along with the index of the program within the
+    bin (see the module `gp.core.rng`). Program shapes, and thus sizes
+    and depths, are unchanged. Infinite constants are not used, since
+    they cannot be written within program strings.
+
+    Objects of this class may be used as the `transform` argument of
+    the `gp.corpus.pipeline.run` function.
+    """
+    __slots__ = ('seed', 'zero_rate', 'huge_rate')
+
+    def __init__(self, seed, zero_rate=0.1, huge_rate=0.1):
+        if zero_rate < 0 or huge_rate < 0 or zero_rate + huge_rate > 1:
+            raise ValueError('Invalid rates.')
+        self.seed = seed
+        self.zero_rate = zero_rate
+        self.huge_rate = huge_rate
+
+    def __repr__(self):
+        return (f'Stress(seed={self.seed!r}, zero_rate={self.zero_rate!r}, '
+                f'huge_rate={self.huge_rate!r})')
+
+    def __call__(self, programs, key=()):
+        """Replace constants within bin of programs, and return the bin."""
+        for j, program in enumerate(programs):
+            rng = stream(self.seed, 'stress', *key, j)
+            for node in program:
+                if not node.constant:
+                    continue
+                u = rng.random()
+                if u < self.zero_rate:
+                    node.value = 0.0
+                elif u < self.zero_rate + self.huge_rate:
+                    node.value = huge if rng.random() < 0.5 else -huge
+                else:
+                    continue
+                node.name = str(node.value)
+        return programs
+
+def protection_rates(program, X, primitive_set):
+    """Return rates at which protections are used by program on inputs.
+
+    Rates are given as fractions of all function evaluations (i.e., of
+    the number of function nodes times the number of fitness cases) for
+    which the protected function received a non-finite argument (key
+    `'nonfinite'`), produced a non-finite result from finite arguments
+    (key `'overflow'`), or received a zero argument to a logarithm
+    (key `'zero'`).
+    """
+    ps = primitive_set.freeze()
+    X = np.asarray(X)
+    counts = {'nonfinite' : 0, 'overflow' : 0, 'zero' : 0}
+    n_evaluations = 0
+    stack = []
+    for node in reversed(program):
+        if node.function:
+            args = [stack.pop() for _ in range(node.arity)]
+            res = ps.vector_kernels[node.opcode](*args)
+            finite = np.logical_and.reduce([np.isfinite(a) for a in args])
+            counts['nonfinite'] += int(np.count_nonzero(~finite))
+            counts['overflow'] += int(
+                np.count_nonzero(finite & ~np.isfinite(res)))
+            if node.name == 'log':
+                counts['zero'] += int(np.count_nonzero(args[0] == 0))
+            n_evaluations += len(X)
+            stack.append(res)
+        elif node.variable:
+            stack.append(X[:, node.opcode - ps.constant_opcode - 1])
+        else:
+            stack.append(np.full(len(X), node.value, dtype=np.float64))
+    return {k : c / n_evaluations if n_evaluations != 0 else 0.0
+        for k, c in counts.items()}
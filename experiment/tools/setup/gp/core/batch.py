@@ -0,0 +1,154 @@
+"""Compact, array-based batch of linear programs.
+
+A batch stores the nodes of any number of programs, in pre-order,
+within flat NumPy arrays (one per node attribute), along with the
+offset of each program within these arrays. Program `i` consists of
+nodes `offsets[i]` through `offsets[i + 1] - 1`. As for `Node` objects,
+the `depths` array contains the depth (i.e., height) of the subprogram
+rooted at each node, and the `parents` array contains the index of the
+parent of each node relative to the start of its program, or -1 for
+the root node.
+
+Since the subprogram rooted at any node is a contiguous range of nodes,
+subprograms may be extracted, copied, or replaced by gathering ranges
+of node indices, without constructing any `Node` objects.
+"""
+import numpy as np
+
+from .program import Program
+
+def ranges(starts, lengths):
+    """Return concatenation of the ranges given by starts and lengths.
+
+    That is, return the concatenation of the arrays `np.arange(s, s + n)`
+    for all `s` in `starts` and `n` in `lengths`, without a Python loop.
+    """
+    starts = np.asarray(starts, dtype=np.intp)
+    lengths = np.asarray(lengths, dtype=np.intp)
+    ends = np.cumsum(lengths)
+    total = int(ends[-1]) if len(ends) else 0
+    # Index of the range containing each output element, and the
+    # position of each element within its range.
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    return starts[owner] + np.arange(total) - (ends - lengths)[owner]
+
+class ProgramBatch:
+    """Class for compact, array-based batch of linear programs."""
+    __slots__ = ('opcodes', 'values', 'sizes', 'depths', 'parents', 'offsets')
+
+    def __init__(self, opcodes, values, sizes, depths, parents, offsets):
+        self.opcodes = np.asarray(opcodes, dtype=np.int32)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.sizes = np.asarray(sizes, dtype=np.int32)
+        self.depths = np.asarray(depths, dtype=np.int32)
+        self.parents = np.asarray(parents, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.intp)
+
+    def __len__(self):
+        """Return the number of programs."""
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self):
+        """Return array of program sizes."""
+        return np.diff(self.offsets)
+
+    @property
+    def program_depths(self):
+        """Return array of program depths (i.e., heights)."""
+        return self.depths[self.offsets[:-1]]
+
+    @property
+    def owners(self):
+        """Return index of the program containing each node."""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def levels(self):
+        """Return the number of ancestors of each node."""
+        # Global indices of the parents of each node, where -1
+        # denotes the lack of a parent.
+        base = np.repeat(self.offsets[:-1], self.lengths)
+        parents = np.where(self.parents >= 0, base + self.parents, -1)
+        levels = np.zeros(len(self.opcodes), dtype=np.int32)
+        current = parents
+        while np.any(current >= 0):
+            found = current >= 0
+            levels += found
+            current = np.where(found, parents[np.maximum(current, 0)], -1)
+        return levels
+
+    def gather(self, indices, offsets):
+        """Return batch consisting of the given nodes of this batch.
+
+        Node attributes are copied as they are, so the nodes of each
+        resulting program (given by `offsets`) must form a valid program
+        whose parent indices are unchanged.
+        """
+        return ProgramBatch(self.opcodes[indices], self.values[indices],
+            self.sizes[indices], self.depths[indices],
+            self.parents[indices], offsets)
+
+    def select(self, programs):
+        """Return batch consisting of the given programs, in order."""
+        programs = np.asarray(programs, dtype=np.intp)
+        lengths = self.lengths[programs]
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        return self.gather(ranges(self.offsets[programs], lengths), offsets)
+
+    @staticmethod
+    def concatenate(batches):
+        """Return batch consisting of the programs of all given batches."""
+        offsets = [np.zeros(1, dtype=np.intp)]
+        n = 0
+        for batch in batches:
+            offsets.append(batch.offsets[1:] + n)
+            n += len(batch.opcodes)
+        return ProgramBatch(
+            np.concatenate([b.opcodes for b in batches]),
+            np.concatenate([b.values for b in batches]),
+            np.concatenate([b.sizes for b in batches]),
+            np.concatenate([b.depths for b in batches]),
+            np.concatenate([b.parents for b in batches]),
+            np.concatenate(offsets))
+
+    @staticmethod
+    def from_programs(programs):
+        """Construct batch from list of programs."""
+        nodes = [node for program in programs for node in program]
+        offsets = np.concatenate(([0], np.cumsum(
+            [len(program) for program in programs], dtype=np.intp)))
+        return ProgramBatch(
+            [node.opcode for node in nodes],
+            [node.value if node.constant else 0.0 for node in nodes],
+            [node.size for node in nodes],
+            [node.depth for node in nodes],
+            [node.parent for node in nodes], offsets)
+
+    def to_programs(self, primitive_set, program_type=Program):
+        """Return list of programs, with nodes of type `program_type.node_type`."""
+        ps = primitive_set.freeze()
+        node_type = program_type.node_type
+        names, arities = ps.names, ps.arities
+        constant_opcode = ps.constant_opcode
+        programs = []
+        columns = (self.opcodes.tolist(), self.values.tolist(),
+            self.sizes.tolist(), self.depths.tolist(), self.parents.tolist())
+        offsets = self.offsets.tolist()
+        for i in range(len(self)):
+            nodes = []
+            for opcode, value, size, depth, parent in zip(*(c[offsets[i] :
+                offsets[i + 1]] for c in columns)):
+                if opcode == constant_opcode:
+                    nodes.append(node_type(opcode=opcode, depth=depth,
+                        size=size, parent=parent, value=value,
+                        name=str(value), terminal=True, constant=True))
+                elif arities[opcode] > 0:
+                    nodes.append(node_type(opcode=opcode, depth=depth,
+                        size=size, parent=parent, name=names[opcode],
+                        arity=arities[opcode], function=True))
+                else:
+                    nodes.append(node_type(opcode=opcode, depth=depth,
+                        size=size, parent=parent, name=names[opcode],
+                        terminal=True, variable=True))
+            programs.append(program_type(nodes))
+        return programs
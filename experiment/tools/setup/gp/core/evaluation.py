@@ -1,4 +1,5 @@
 """Core evaluation algorithms."""
+import numpy as np
 from pathos.pools import ProcessPool
 
 def standard(programs, X, t, fitness, primitive_set, n_threads=1):
@@ -20,4 +21,57 @@ def standard(programs, X, t, fitness, primitive_set, n_threads=1):
 
     # Perform a map operation for evaluation.
     outputs, fitnesses = zip(*ProcessPool(n_threads).map(evaluate, programs))
-    return outputs, fitnesses
\ No newline at end of file
+    return outputs, fitnesses
+
+def vectorized(program, X, primitive_set, dtype=np.float64):
+    """Return outputs of program for every row of the given inputs.
+
+    The program is evaluated node by node, with each node applied to 
+    whole columns of data by way of the vectorized kernels of the given 
+    primitive set. The `j`-th column of `X` provides the values of the 
+    `j`-th variable, and constants are given the floating-point type
+    `dtype` (e.g., `np.float32`, along with single-precision inputs,
+    for single-precision evaluation).
+    """
+    ps = primitive_set.freeze()
+    X = np.asarray(X)
+    # Stack of intermediate outputs; the program is traversed in 
+    # reverse pre-order, so that the outputs of the children of 
+    # each function are on the stack, in order, when it is reached.
+    stack = []
+    for node in reversed(program):
+        if node.function:
+            args = [stack.pop() for _ in range(node.arity)]
+            stack.append(ps.vector_kernels[node.opcode](*args))
+        elif node.variable:
+            stack.append(X[:, node.opcode - ps.constant_opcode - 1])
+        else:
+            with np.errstate(over='ignore'):
+                stack.append(np.full(len(X), node.value, dtype=dtype))
+    return stack.pop()
+
+def vectorized_batch(batch, X, primitive_set):
+    """Yield outputs of each program of a `ProgramBatch`, in order.
+
+    Programs are evaluated as by the `vectorized` function, but from the
+    opcode and value arrays of the batch, so that no `Node` objects are
+    needed.
+    """
+    ps = primitive_set.freeze()
+    X = np.asarray(X)
+    kernels, arities = ps.vector_kernels, ps.arities
+    constant_opcode = ps.constant_opcode
+    opcodes, values = batch.opcodes.tolist(), batch.values.tolist()
+    offsets = batch.offsets.tolist()
+    for i in range(len(batch)):
+        stack = []
+        for k in range(offsets[i + 1] - 1, offsets[i] - 1, -1):
+            opcode = opcodes[k]
+            if opcode < constant_opcode:
+                args = [stack.pop() for _ in range(arities[opcode])]
+                stack.append(kernels[opcode](*args))
+            elif opcode > constant_opcode:
+                stack.append(X[:, opcode - constant_opcode - 1])
+            else:
+                stack.append(np.full(len(X), values[k], dtype=np.float64))
+        yield stack.pop()
@@ -0,0 +1,303 @@
+"""Generational and steady-state evolutionary loops.
+
+Populations are `ProgramBatch` objects (see the module `gp.core.batch`),
+and offspring are produced by the array-native operators of the module
+`gp.core.variation`, so that the cost of each generation apart from
+evaluation is small and measurable. Evaluators are pluggable: any
+callable object that maps a batch to an array of fitness values (where
+lower is better) may be used, e.g., a `VectorizedEvaluator` object, or a
+wrapper around an accelerator.
+
+The wall time of every generation is split into selection, variation,
+evaluation, and I/O (i.e., logging) by way of a `Timings` object, from
+which the end-to-end speedup given by a faster evaluator is predicted
+with Amdahl's law.
+
+If `overlap` is true, the evaluation of the offspring of step `g` (in
+a background thread) is overlapped with the production of the offspring
+of step `g + 1`, which are thus bred from the population as it was
+before step `g` (i.e., selection lags evaluation by one step). This
+hides the cost of selection and variation for evaluators that release
+the GIL (e.g., NumPy kernels or accelerators).
+"""
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import numpy as np
+
+from .batch import ProgramBatch
+from .evaluation import vectorized_batch
+from .program import Program
+from .rng import stream, stream_seed
+from . import variation
+
+# Phases of each generation.
+phases = ('selection', 'variation', 'evaluation', 'io')
+
+# Evolutionary loop modes.
+modes = ('generational', 'steady-state')
+
+class Timings:
+    """Class for wall time of each phase of each generation.
+
+    For each phase, and for the whole of each generation (key `'wall'`),
+    a list contains the number of seconds spent within each generation.
+    When evaluation is overlapped, the `'evaluation'` time is that of the
+    evaluator itself, whereas the `'wait'` time is the part of it that
+    was not hidden by the other phases (which is otherwise zero).
+    """
+    __slots__ = ('seconds', 'overlap')
+
+    def __init__(self, overlap=False):
+        self.seconds = {k : [] for k in phases + ('wait', 'wall')}
+        self.overlap = overlap
+
+    def start(self):
+        """Begin a generation."""
+        for times in self.seconds.values():
+            times.append(0.0)
+
+    def add(self, phase, seconds):
+        """Add time to a phase of the current generation."""
+        self.seconds[phase][-1] += seconds
+
+    def totals(self):
+        """Return total time of each phase, over all generations."""
+        return {k : sum(times) for k, times in self.seconds.items()}
+
+    def fractions(self):
+        """Return fraction of wall time spent within each phase."""
+        totals = self.totals()
+        wall = totals.pop('wall')
+        return {k : t / wall if wall != 0 else 0.0
+            for k, t in totals.items()}
+
+    def amdahl(self, speedup):
+        """Return end-to-end speedup predicted for an evaluation speedup.
+
+        Without overlap, this is given by Amdahl's law, i.e., by
+        `1 / ((1 - f) + f / speedup)`, where `f` is the fraction of wall
+        time spent evaluating programs. With overlap, only the time spent
+        waiting for evaluation can be reduced, and it remains positive
+        only while evaluation takes longer than all other phases.
+        """
+        totals = self.totals()
+        wall, evaluation = totals['wall'], totals['evaluation']
+        if wall == 0:
+            return 1.0
+        if not self.overlap:
+            return wall / (wall - evaluation + evaluation / speedup)
+        rest = wall - totals['wait']
+        return wall / (rest + max(0.0, evaluation / speedup - rest))
+
+class VectorizedEvaluator:
+    """Class for evaluation of program batches by root-mean-square error.
+
+    Programs are evaluated as by `gp.core.evaluation.vectorized_batch`.
+    Non-finite errors are replaced by infinity, so that the relevant
+    programs are never preferred by selection.
+    """
+    __slots__ = ('X', 't', 'primitive_set')
+
+    def __init__(self, X, t, primitive_set):
+        self.X = np.asarray(X)
+        self.t = np.asarray(t)
+        self.primitive_set = primitive_set.freeze()
+
+    def __call__(self, batch):
+        fitnesses = np.empty(len(batch))
+        with np.errstate(all='ignore'):
+            for i, y in enumerate(
+                vectorized_batch(batch, self.X, self.primitive_set)):
+                fitnesses[i] = np.sqrt(np.mean((y - self.t) ** 2))
+        fitnesses[~np.isfinite(fitnesses)] = np.inf
+        return fitnesses
+
+def _timed(evaluator, batch):
+    """Return fitness values of batch, and the time spent evaluating."""
+    t0 = time.perf_counter()
+    fitnesses = np.asarray(evaluator(batch), dtype=np.float64)
+    return fitnesses, time.perf_counter() - t0
+
+def tournament(fitnesses, n, size, rng):
+    """Return indices of `n` individuals chosen by tournament selection."""
+    contestants = rng.integers(len(fitnesses), size=(n, size))
+    return contestants[np.arange(n), np.argmin(fitnesses[contestants], axis=1)]
+
+def donor_batch(primitive_set, d_max, n_programs, seed, program_type=Program):
+    """Return batch of random programs for subtree mutation.
+
+    Program `i` is generated by way of the `Program._generate` method
+    with the random number stream given by `seed` and the key
+    `('donors', i)`.
+    """
+    ps = primitive_set.freeze()
+    s_max = program_type.max_size(ps.m, d_max)
+    return ProgramBatch.from_programs([program_type._generate(primitive_set=ps,
+        d_max=d_max, s_max=s_max, rng=stream(seed, 'donors', i))
+            for i in range(n_programs)])
+
+def breed(population, fitnesses, n_offspring, primitive_set, donors, rng,
+    timings, d_max=None, tournament_size=7, rates=None, sigma=0.1):
+    """Return batch of offspring of the population.
+
+    Each offspring is produced by the operator chosen at random with
+    the probabilities given by `rates`, a dictionary with keys
+    `'crossover'`, `'subtree'`, `'hoist'`, and `'point'`, where any
+    remaining probability denotes reproduction (i.e., copying). The
+    constants of all offspring are then perturbed, unless `sigma` is 0.
+    Offspring are not in any particular order.
+    """
+    rates = {'crossover' : 0.8, 'subtree' : 0.1, 'hoist' : 0.0,
+        'point' : 0.05} if rates is None else rates
+    t0 = time.perf_counter()
+    operators = ('crossover', 'subtree', 'hoist', 'point')
+    choice = np.searchsorted(np.cumsum([rates.get(k, 0.0)
+        for k in operators]), rng.random(n_offspring), side='right')
+    counts = np.bincount(choice, minlength=len(operators) + 1)
+    parents = tournament(fitnesses, n_offspring + counts[0], tournament_size,
+        rng)
+    t1 = time.perf_counter()
+    timings.add('selection', t1 - t0)
+
+    # Parents of each operator, where crossover uses two parents per
+    # offspring (i.e., the last `counts[0]` parents as donors).
+    groups = np.split(parents[:n_offspring], np.cumsum(counts)[:-1])
+    batches = []
+    if counts[0] > 0:
+        batches.append(variation.crossover(population, np.column_stack(
+            (groups[0], parents[n_offspring:])), primitive_set, rng, d_max))
+    if counts[1] > 0:
+        batches.append(variation.subtree_mutation(population.select(
+            groups[1]), donors, primitive_set, rng, d_max))
+    if counts[2] > 0:
+        batches.append(variation.hoist_mutation(population.select(groups[2]),
+            rng))
+    if counts[3] > 0:
+        batches.append(variation.point_mutation(population.select(groups[3]),
+            primitive_set, rng))
+    if counts[4] > 0:
+        batches.append(population.select(groups[4]))
+    offspring = ProgramBatch.concatenate(batches)
+    if sigma != 0:
+        offspring = variation.perturb_constants(
+            offspring, primitive_set, rng, sigma)
+    timings.add('variation', time.perf_counter() - t1)
+    return offspring
+
+def _survive(population, fitnesses, offspring, offspring_fitnesses, mode,
+    n_elites):
+    """Return next population and its fitness values.
+
+    In generational mode, the offspring replace the population, except
+    that the `n_elites` best individuals replace the worst offspring. In
+    steady-state mode, the offspring replace the worst individuals.
+    """
+    if mode == 'generational':
+        elites = np.argsort(fitnesses, kind='stable')[:n_elites]
+        keep = np.argsort(offspring_fitnesses, kind='stable')[
+            :len(offspring) - len(elites)]
+        return (ProgramBatch.concatenate((population.select(elites),
+            offspring.select(keep))), np.concatenate((fitnesses[elites],
+                offspring_fitnesses[keep])))
+    keep = np.argsort(fitnesses, kind='stable')[
+        :len(population) - len(offspring)]
+    return (ProgramBatch.concatenate((population.select(keep), offspring)),
+        np.concatenate((fitnesses[keep], offspring_fitnesses)))
+
+def evolve(population, evaluator, primitive_set, n_generations, seed,
+    mode='generational', d_max=None, donors=None, n_elites=1, step_size=None,
+        overlap=False, log=None, **kwargs):
+    """Evolve a population, and return it along with its fitness values
+    and the timings of all generations.
+
+    Keyword arguments:
+    population -- Initial `ProgramBatch` object.
+    evaluator -- Callable object that maps a `ProgramBatch` object to
+        an array of fitness values, where lower is better.
+    primitive_set -- `PrimitiveSet` object.
+    n_generations -- Number of generations.
+    seed -- Random seed.
+    mode -- Loop mode, i.e., 'generational' or 'steady-state'.
+        (default: 'generational')
+    d_max -- Maximum depth of offspring, or `None`. (default: None)
+    donors -- Batch of random programs for subtree mutation, or `None`
+        for a batch given by `donor_batch(primitive_set, 3, 1000, seed)`.
+    n_elites -- Number of elites in generational mode. (default: 1)
+    step_size -- Number of offspring per step in steady-state mode,
+        where a generation consists of enough steps to produce as many
+        offspring as there are individuals, which is at most the
+        population size. (default: one tenth of the population size)
+    overlap -- Whether evaluation is overlapped with breeding.
+        (default: False)
+    log -- Writable text file, to which a CSV line of statistics is
+        written after every generation, or `None`. (default: None)
+    kwargs -- Extra keyword arguments for the `breed` function.
+    """
+    if mode not in modes:
+        raise ValueError(f'Value provided for argument `mode`, '
+                         f'`{mode}`, is invalid.')
+    if step_size is not None and not 1 <= step_size <= len(population):
+        raise ValueError(f'Value provided for argument `step_size`, '
+                         f'`{step_size}`, is invalid.')
+    ps = primitive_set.freeze()
+    rng = np.random.default_rng(stream_seed(seed, 'evolve'))
+    donors = donor_batch(ps, 3, 1000, seed) if donors is None else donors
+    n = len(population)
+    if mode == 'generational':
+        step_size, n_steps = n, 1
+    else:
+        step_size = max(1, n // 10) if step_size is None else step_size
+        n_steps = -(-n // step_size)
+
+    timings = Timings(overlap)
+    fitnesses, _ = _timed(evaluator, population)
+    if log is not None:
+        log.write(','.join(('generation', 'best', 'median', 'mean_size')
+            + tuple(phases) + ('wait', 'wall')) + '\n')
+
+    executor = ThreadPoolExecutor(1) if overlap else None
+    # Offspring whose evaluation is pending, and the relevant future.
+    pending = future = None
+    for g in range(n_generations):
+        timings.start()
+        t0 = time.perf_counter()
+        for _ in range(n_steps):
+            offspring = breed(population, fitnesses, step_size, ps, donors,
+                rng, timings, d_max, **kwargs)
+            if overlap:
+                if future is not None:
+                    t1 = time.perf_counter()
+                    offspring_fitnesses, seconds = future.result()
+                    timings.add('wait', time.perf_counter() - t1)
+                    timings.add('evaluation', seconds)
+                    population, fitnesses = _survive(population, fitnesses,
+                        pending, offspring_fitnesses, mode, n_elites)
+                pending = offspring
+                future = executor.submit(_timed, evaluator, offspring)
+            else:
+                offspring_fitnesses, seconds = _timed(evaluator, offspring)
+                timings.add('evaluation', seconds)
+                population, fitnesses = _survive(population, fitnesses,
+                    offspring, offspring_fitnesses, mode, n_elites)
+        if overlap and g == n_generations - 1:
+            # Complete the final evaluation.
+            t1 = time.perf_counter()
+            offspring_fitnesses, seconds = future.result()
+            timings.add('wait', time.perf_counter() - t1)
+            timings.add('evaluation', seconds)
+            population, fitnesses = _survive(population, fitnesses,
+                pending, offspring_fitnesses, mode, n_elites)
+        if log is not None:
+            t1 = time.perf_counter()
+            log.write(f'{g},{float(fitnesses.min())!r},'
+                      f'{float(np.median(fitnesses))!r},'
+                      f'{float(population.lengths.mean())!r},' + ','.join(
+                        repr(timings.seconds[k][-1]) for k in phases + (
+                            'wait',)) + f',{t1 - t0!r}\n')
+            log.flush()
+            timings.add('io', time.perf_counter() - t1)
+        timings.add('wall', time.perf_counter() - t0)
+    if executor is not None:
+        executor.shutdown()
+    return population, fitnesses, timings
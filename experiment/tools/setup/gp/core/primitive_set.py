@@ -1,22 +1,43 @@
 """Primitive set."""
 from collections import OrderedDict
+import hashlib
 import inspect
 from itertools import count, filterfalse
 import keyword
 from operator import itemgetter
 import re
+from types import MappingProxyType
+
+import numpy as np
 
 class PrimitiveSet:
     """Class for generic primitive set."""
-    __slots__ = ('functions', 'variables', 'constants', 'namespace')
+    __slots__ = (
+        'functions', 'variables', 'constants', 'namespace', 'kernels', 
+        '_frozen')
 
     def __init__(
         self, functions=OrderedDict(), variables=OrderedDict(), 
-            constants=OrderedDict()):
+            constants=OrderedDict(), kernels=None):
         self.functions = functions
         self.variables = variables
         self.constants = constants
         self.namespace = functions | variables | constants
+        # Vectorized implementations of functions, specified by name.
+        self.kernels = OrderedDict() if kernels is None else kernels
+        # Most recent result of the `freeze` method.
+        self._frozen = None
+
+    def freeze(self):
+        """Return immutable, compiled version of primitive set.
+
+        The result is cached until the primitive set is next modified
+        by way of the `add_function`, `add_variable`, `add_constant`,
+        or `remove` methods.
+        """
+        if self._frozen is None:
+            self._frozen = FrozenPrimitiveSet(self)
+        return self._frozen
 
     @property
     def terminals(self):
@@ -110,7 +131,7 @@ class PrimitiveSet:
                 arity = 0
             return arity
 
-    def add_function(self, function, name=None):
+    def add_function(self, function, name=None, kernel=None):
         """Add function to primitive set.
 
         If `name` is `None` and `function` is callable,
@@ -130,6 +151,8 @@ class PrimitiveSet:
         name -- Name for function. Must be either `None` 
             or a valid Python identifier that is not a
             reserved keyword. (default: None)
+        kernel -- Vectorized implementation of function, which
+            is applied elementwise to NumPy arrays. (default: None)
         """
         try:
             args, *_ = inspect.getfullargspec(function)
@@ -156,6 +179,9 @@ class PrimitiveSet:
                              f'the primitive set.')
         self.namespace[name] = function
         self.functions[name] = function
+        if kernel is not None:
+            self.kernels[name] = kernel
+        self._frozen = None
 
     def add_variable(self, name=None):
         """Add variable terminal.
@@ -203,6 +229,7 @@ class PrimitiveSet:
                                 f'the primitive set.')
         self.namespace[name] = None
         self.variables[name] = None
+        self._frozen = None
 
     def add_constant(self, constant, name=None):
         """Add constant terminal.
@@ -251,6 +278,7 @@ class PrimitiveSet:
                              f'the primitive set.')
         self.namespace[name] = constant        
         self.constants[name] = constant
+        self._frozen = None
 
     def remove(self, name, default=None):
         """Remove primitive, if it exists.
@@ -275,10 +303,167 @@ class PrimitiveSet:
                 raise
             return default
         else:
+            self._frozen = None
             if name in self.functions:
                 self.functions.pop(name)
+                self.kernels.pop(name, None)
             elif name in self.variables:
                 self.variables.pop(name)
             else:
                 self.constants.pop(name)
-            return None
\ No newline at end of file
+            return None
+
+
+class FrozenPrimitiveSet(PrimitiveSet):
+    """Class for immutable, compiled primitive set.
+
+    Primitive metadata is precomputed into tables, most of which are 
+    indexed by opcode. Opcode 0 denotes the null node, opcodes 1 through
+    `F` denote the `F` functions (in order), opcode `F + 1` denotes any
+    constant, and the following opcodes denote the variables (in order).
+    """
+    __slots__ = (
+        'opcodes', 'names', 'arities', 'function_arities', 
+        'scalar_kernels', 'vector_kernels', 'function_names', 
+        'terminal_names', 'seeded_constants', 'constant_opcode', 'version', 
+        '_terminals', '_arity', '_a_min', '_a_max', '_proportions')
+
+    def __init__(self, primitive_set):
+        ps = primitive_set
+        functions = OrderedDict(ps.functions)
+        variables = OrderedDict(ps.variables)
+        constants = OrderedDict(ps.constants)
+        kernels = OrderedDict(ps.kernels)
+        set_ = lambda name, value: object.__setattr__(self, name, value)
+
+        set_('functions', MappingProxyType(functions))
+        set_('variables', MappingProxyType(variables))
+        set_('constants', MappingProxyType(constants))
+        set_('namespace', MappingProxyType(functions | variables | constants))
+        set_('kernels', MappingProxyType(kernels))
+        set_('_frozen', self)
+        set_('_terminals', MappingProxyType(variables | constants))
+
+        # Arity of each primitive, specified by name.
+        arity = {name : len(inspect.getfullargspec(f).args) 
+            for name, f in functions.items()}
+        arity |= {name : 0 for name in variables | constants}
+        set_('_arity', MappingProxyType(arity))
+
+        # Opcode of each primitive, specified by name.
+        n_functions = len(functions)
+        opcodes = {name : 1 + i for i, name in enumerate(functions)}
+        opcodes |= {name : 1 + n_functions for name in constants}
+        opcodes |= {name : 2 + n_functions + i 
+            for i, name in enumerate(variables)}
+        set_('opcodes', MappingProxyType(opcodes))
+        set_('constant_opcode', 1 + n_functions)
+
+        # Tables indexed by opcode. Since all constants share one 
+        # opcode, the name of the constant opcode is `None`.
+        names = (None,) + tuple(functions) + (None,) + tuple(variables)
+        set_('names', names)
+        set_('arities', tuple(arity.get(name, 0) if name is not None 
+            else 0 for name in names))
+        set_('scalar_kernels', (None,) + tuple(functions.values()) 
+            + (None,) * (1 + len(variables)))
+        set_('vector_kernels', (None,) + tuple(kernels[name] 
+            if name in kernels else np.vectorize(f, otypes=[float]) 
+                for name, f in functions.items()) 
+            + (None,) * (1 + len(variables)))
+
+        # Tables indexed by position within the function/terminal sets.
+        set_('function_names', tuple(functions))
+        set_('function_arities', tuple(arity[f] for f in functions))
+        set_('terminal_names', tuple(self._terminals))
+
+        # Names of constants whose functions accept a random number 
+        # generator by way of the keyword argument `rng`.
+        set_('seeded_constants', frozenset(name for name, c in constants.items()
+            if 'rng' in inspect.signature(c).parameters))
+
+        set_('_a_min', min(self.function_arities, default=0))
+        set_('_a_max', max(self.function_arities, default=0))
+        n = len(self.namespace)
+        set_('_proportions', tuple(k / n if n != 0 else 0 for k in (
+            len(functions), len(self._terminals), len(variables), 
+            len(constants))))
+
+        # Stable identifier of the primitive set, based on the names, 
+        # kinds, and arities of all primitives, in order.
+        signature = '\n'.join(
+            [f'f {name} {arity[name]}' for name in functions] 
+            + [f'v {name}' for name in variables] 
+            + [f'c {name}' for name in constants])
+        set_('version', hashlib.sha256(signature.encode()).hexdigest()[:16])
+
+    def __setattr__(self, name, value):
+        raise AttributeError('A frozen primitive set cannot be modified.')
+
+    def __reduce__(self):
+        return (FrozenPrimitiveSet, (PrimitiveSet(
+            OrderedDict(self.functions), OrderedDict(self.variables), 
+            OrderedDict(self.constants), OrderedDict(self.kernels)),))
+
+    def freeze(self):
+        """Return primitive set, which is already frozen."""
+        return self
+
+    @property
+    def terminals(self):
+        """Return all terminal primitives."""
+        return self._terminals
+
+    @property
+    def function_proportion(self):
+        """Return proportion of primitives that are functions."""
+        return self._proportions[0]
+
+    @property
+    def terminal_proportion(self):
+        """Return proportion of primitives that are terminals."""
+        return self._proportions[1]
+
+    @property
+    def variable_proportion(self):
+        """Return proportion of primitives that are variables."""
+        return self._proportions[2]
+        
+    @property
+    def constant_proportion(self):
+        """Return proportion of primitives that are constants."""
+        return self._proportions[3]
+
+    @property
+    def a_min(self):
+        """Return minimum arity of function set."""
+        return self._a_min
+
+    @property
+    def a_max(self):
+        """Return maximum arity of function set."""
+        return self._a_max
+
+    @property
+    def m(self):
+        """Return the "ary-ness" of the primitive set."""
+        return self._a_max
+
+    def arity(self, name, default=None):
+        """Return arity of primitive, if it exists.
+
+        See `PrimitiveSet.arity`.
+        """
+        try:
+            return self._arity[name]
+        except KeyError:
+            if default is None:
+                print(f'Name `{name}` is not in primitive set.')
+                raise
+            return default
+
+    def _immutable(self, *args, **kwargs):
+        """Raise exception upon attempted modification."""
+        raise TypeError('A frozen primitive set cannot be modified.')
+
+    add_function = add_variable = add_constant = remove = _immutable
@@ -1,16 +1,23 @@
 """Generic linear program."""
+from collections.abc import MutableSequence
 import random
 import re
 import shlex
 
 from pathos.pools import ProcessPool
 
+from . import serialization
 from .node import Node
+from .rng import stream
 
 class Program(list):
     """Class for generic linear program."""
     __slots__ = ('nodes', 'code')
 
+    # Type of the node objects constructed by the `from_str`
+    # and `generate` methods.
+    node_type = Node
+
     def __init__(self, nodes=[]):
         super().__init__(nodes)
         self.code = None
@@ -19,6 +26,13 @@ class Program(list):
         """Return subprogram rooted at the node whose index is `i`."""
         return Program(self[i : i + self[i].size])
 
+    def view(self, i=0):
+        """Return view of subprogram rooted at the node whose index is `i`.
+        
+        Unlike the `subprogram` method, no nodes are copied.
+        """
+        return ProgramView(self, i, self[i].size)
+
     @property
     def depth(self):
         """Return depth (i.e., height) of program."""
@@ -41,20 +55,12 @@ class Program(list):
         Pre-order traversal infers prefix (i.e., Polish) notation.
         Spacing is used to separate node elements.
         """
-        return ' '.join([n.name for n in self.preorder])
+        return serialization.dumps(self, 'preorder')
 
     @property
     def inorder(self):
-        """Return tuple of node names given by in-order traversal."""
-        stack = []
-        for node in reversed(self):
-            if node.function:
-                operands = [stack.pop() for _ in range(node.arity)]
-                stack.append([op_ for op in operands[:-1] for op_ in op] 
-                    + [node] + operands[-1:])
-            else:
-                stack.append([node])
-        return stack.pop() if stack != [] else []
+        """Return list of nodes given by in-order traversal."""
+        return serialization.inorder(self)
 
     @property
     def inorder_str(self):
@@ -64,35 +70,12 @@ class Program(list):
         are added where it is necessary, and some spacing is 
         added in places where it may enhance readability.
         """
-        stack = []
-        for node in reversed(self):
-            if node.function:
-                operands = [stack.pop() for _ in range(node.arity)]
-                L = ' '.join(operands[:-1])
-                R = operands[-1]
-                if L == '':
-                    # Only one child exists.
-                    stack.append(f'({node.name} {R})')
-                else:
-                    # More than one child exists.
-                    stack.append(f'({L} {node.name} {R})')
-            else:
-                stack.append(node.name)
-        s = stack.pop() if stack != [] else ''
-        # Remove any outer parentheses.
-        return s[1:-1] if s != '' and s[0] == '(' else s
+        return serialization.dumps(self, 'infix')
 
     @property
     def postorder(self):
-        """Return tuple of node names given by post-order traversal."""
-        stack = []
-        for node in reversed(self):
-            if node.function:
-                operands = [stack.pop() for _ in range(node.arity)]
-                stack.append([op_ for op in operands for op_ in op] + [node])
-            else:
-                stack.append([node])
-        return stack.pop() if stack != [] else []
+        """Return list of nodes given by post-order traversal."""
+        return serialization.postorder(self)
 
     @property
     def postorder_str(self):
@@ -101,7 +84,16 @@ class Program(list):
         Post-order traversal infers postfix (i.e., Reverse Polish) 
         notation. Spacing is used to separate node elements.
         """
-        return ' '.join([n.name for n in self.postorder])
+        return serialization.dumps(self, 'postfix')
+
+    @property
+    def tensorgp_str(self):
+        """Return program string for TensorGP.
+        
+        Constant terminal values `t` are rewritten as 
+        the string `scalar(t)`.
+        """
+        return serialization.dumps(self, 'tensorgp')
 
     def __str__(self):
         """Return program string in prefix (i.e., Polish) notation.
@@ -111,16 +103,7 @@ class Program(list):
         easily create a Python code object, and spacing is added 
         where it may enhance readability.
         """
-        stack = []
-        for node in reversed(self):
-            if node.function:
-                operands = [stack.pop() for _ in range(node.arity)]
-                stack.append((')' + ' ,'.join(
-                    [op[::-1] for op in operands[::-1]]) 
-                    + '(' + node.name[::-1])[::-1])
-            else:
-                stack.append(node.name)
-        return stack.pop() if stack != [] else ''
+        return serialization.dumps(self, 'prefix')
 
     def __call__(self, *args):
         """Evaluate program."""
@@ -166,8 +149,8 @@ class Program(list):
         else:
             return (1 - m ** (d + 1)) // (1 - m)
 
-    @staticmethod
-    def from_str(s, ps):
+    @classmethod
+    def from_str(cls, s, ps):
         """Construct `Program` object from program string.
         
         It is assumed that the string gives the program in 
@@ -188,38 +171,32 @@ class Program(list):
         # Size of program.
         n = len(s)
 
+        # Compiled primitive set, and namespace for evaluating 
+        # constant expressions.
+        ps = ps.freeze()
+        namespace = dict(ps.namespace)
+
         # Initialize list of `Node` objects.
-        nodes = [Node() for _ in range(n)]
+        nodes = [cls.node_type() for _ in range(n)]
 
-        for i, name in reversed(list(enumerate(s))):
+        for node, name in reversed(list(zip(nodes, s))):
             # Update the relevant `Node` element.
-            node = nodes[i]
             node.name = name
+            opcode = ps.opcodes.get(name, ps.constant_opcode)
             if name in ps.functions:
                 # The string element represents a function node.
-                arity = ps.arity(name)
+                arity = ps.arities[opcode]
                 node.arity = arity
-                node.opcode = 1 + list(ps.functions.keys()).index(name)
+                node.opcode = opcode
                 node.function = True
-                # Extract all child nodes associated with the function, 
-                # and update some relevant node attributes.
-                k = i + 1
-                for _ in range(arity):
-                    child = nodes[k]
-                    child.parent = i
-                    node.size += child.size
-                    node.depth = max(node.depth, child.depth)
-                    k += child.size
-                node.depth += 1
             elif name in ps.variables:
                 # The string element represents a variable node.
-                node.opcode = (1 + len(ps.functions) + 1 
-                    + list(ps.variables.keys()).index(name))
+                node.opcode = opcode
                 node.terminal = True
                 node.variable = True
             elif name in ps.constants:
                 # The string element represents a constant function node.
-                node.opcode = 1 + len(ps.functions)
+                node.opcode = opcode
                 node.value = ps[name]()
                 node.name = str(node.value)
                 node.terminal = True
@@ -230,18 +207,77 @@ class Program(list):
                 #
                 # Remove outer quotations, if needed.
                 name = name[1:-1] if name[0] == '"' else name
-                node.opcode = 1 + len(ps.functions)
-                node.value = eval(name, ps.namespace)
+                node.opcode = opcode
+                node.value = eval(name, namespace)
                 node.name = str(node.value)
                 node.terminal = True
                 node.constant = True
 
-        return Program(nodes)
+        return cls(Program._link(nodes))
 
     @staticmethod
-    def _generate(primitive_set, d_max, s_max, d_min=0, s_min=1, trait='size'):
-        """Generate a random program expression."""
-        ps = primitive_set
+    def _link(nodes):
+        """Update parent, size, and depth attributes of pre-order nodes.
+        
+        The nodes are visited in reverse order, so that the subprograms 
+        rooted at the children of a function node have been sized before 
+        the function node itself. The given list is returned.
+        """
+        for i in range(len(nodes) - 1, -1, -1):
+            node = nodes[i]
+            node.size = 1
+            node.depth = 0
+            # Extract all child nodes associated with the function, 
+            # and update some relevant node attributes.
+            k = i + 1
+            for _ in range(node.arity):
+                child = nodes[k]
+                child.parent = i
+                node.size += child.size
+                if child.depth + 1 > node.depth:
+                    node.depth = child.depth + 1
+                k += child.size
+        return nodes
+
+    @classmethod
+    def _terminal(cls, ps, name, rng=None):
+        """Return terminal node for the given terminal name.
+
+        A constant terminal is replaced with the result of the 
+        relevant constant function, which is given the random number 
+        generator `rng` if it is not `None` and the function accepts it.
+        """
+        node = cls.node_type(opcode=ps.opcodes[name], name=name, terminal=True)
+        if name in ps.constants:
+            value = (ps[name](rng=rng) if rng is not None and 
+                name in ps.seeded_constants else ps[name]())
+            node.value = float(value) if isinstance(value, float) else value
+            node.name = str(node.value)
+            node.constant = True
+        else:
+            node.variable = True
+        return node
+
+    @classmethod
+    def _generate(
+        cls, primitive_set, d_max, s_max, d_min=0, s_min=1, trait='size',
+            rng=None):
+        """Generate a random program expression.
+        
+        The amount of work done is linear in the size of the program. 
+        Outstanding capacity totals (i.e., the maximum number of nodes 
+        that could yet descend from the nodes on the stack) are updated 
+        incrementally as nodes are pushed to and popped from the stack, 
+        and all arity information is taken from the tables of the 
+        compiled primitive set.
+
+        Random numbers are drawn from the generator `rng`, which is 
+        a `random.Random` object, or, if `rng` is `None`, from the 
+        global generator of the `random` module (and from whatever 
+        generators are used by constant functions).
+        """
+        ps = primitive_set.freeze()
+        generator = random if rng is None else rng
 
         # Validate parameters.
         if len(ps.terminals) == 0:
@@ -264,23 +300,46 @@ class Program(list):
         # The given parameters are valid; choose a desired 
         # depth/size value, depending on the specified trait.
         if trait == 'depth':
-            desired = random.randint(d_min, d_max)
+            desired = generator.randint(d_min, d_max)
         elif trait == 'size':
-            desired = random.randint(s_min, s_max)
-            
-        # Chosen primitives.
-        names = []
+            desired = generator.randint(s_min, s_max)
+
+        # Function arities, names, and opcodes.
+        arities = ps.function_arities
+        function_names = ps.function_names
+        functions = range(len(arities))
+
+        # Distinct function arities, i.e., the possible "ary-ness" 
+        # values `m` of any subset of functions.
+        ms = sorted(set(a for a in arities if a > 0))
+
+        # Look-up tables such that `capacity[m][d]` is one less than 
+        # the maximum size of an `m`-ary subprogram rooted at depth 
+        # `d`, for `0 <= d <= d_max + 1`.
+        capacity = {m : [Program.max_size(m, d_max - d) - 1 
+            for d in range(d_max + 2)] for m in ms}
+
+        # Sum of `capacity[m][d]` over the depths `d` of all nodes 
+        # within the stack, for each value `m`.
+        totals = {m : capacity[m][0] for m in ms}
+
+        # Chosen nodes, in pre-order.
+        nodes = []
+
+        # Stack containing the depths of outstanding nodes.
+        stack = [0]
 
-        # Stack for constructing the program.
-        stack = [(0, 1)]
+        # Current size of the program, including outstanding nodes.
+        s = 1
 
         # Overall depth of the program.
         depth = 0
 
         while len(stack) != 0:
-            # Retrieve the depth of the next relevant node
-            # and the current size of the overall program.
-            d, s = stack.pop()
+            # Retrieve the depth of the next relevant node.
+            d = stack.pop()
+            for m in ms:
+                totals[m] -= capacity[m][d]
 
             # Eliminate from consideration functions that will cause 
             # the program to violate given size constraints.
@@ -294,70 +353,44 @@ class Program(list):
 
             # Eliminate functions that would cause the maximum
             # size constraint to be violated.
-            valid_functions = [f for f in list(ps.functions.keys())
-                if s + ps.arity(f) <= s_max]
+            valid_functions = [f for f in functions 
+                if s + arities[f] <= s_max]
 
             if trait == 'size':
                 # Eliminate functions that would cause the desired
                 # size constraint not to be met.
                 temp_functions = [f for f in valid_functions 
-                    if s + ps.arity(f) <= desired]
-                # Update the set of valid functions if the current 
-                # `if` block did not eliminate all functions. (The 
-                # set of valid functions might already be empty.)
+                    if s + arities[f] <= desired]
                 if temp_functions != []:
                     valid_functions = temp_functions
 
             # Maximum arity for the current valid functions.
-            m = (max([ps.arity(f) for f in valid_functions]) if
+            m = (max([arities[f] for f in valid_functions]) if
                 valid_functions != [] else 0)
 
-            # Eliminate functions that would cause the minimum
-            # size constraint to be violated.
-            temp_functions = valid_functions[:]
-            for f in valid_functions:
-                # Maximum possible size of subprogram rooted 
-                # at the current node, excluding this node, 
-                # if the current node is given to be `f`.
-                # (For simplicity, we assume that all functions
-                # with an arity not too big for the current node
-                # could be continually be used.)
-                s_ = ps.arity(f) * Program.max_size(m, d_max-(d+1))
-                # Maximum possible program size if the relevant 
-                # node under consideration was chosen to be the 
-                # function `f`.
-                s_ = s + s_ + sum([Program.max_size(m, d_max-d)-1 
-                    for (d, *_) in stack]) if stack != [] else s + s_
-                if s_ < s_min:
-                    # The current function is not acceptable.
-                    temp_functions.remove(f)
-            valid_functions = temp_functions
-
-            if trait == 'size':
-                # Eliminate functions that would cause the desired
-                # size constraint not to be met.
-                temp_functions = valid_functions[:]
-                for f in valid_functions:
-                    # Maximum possible size of subprogram rooted 
-                    # at the current node, excluding this node, 
-                    # if the current node is given to be `f`.
-                    # (For simplicity, we assume that all functions
-                    # with an arity not too big for the current node
-                    # could be continually be used.)
-                    s_ = ps.arity(f) * Program.max_size(m, d_max-(d+1))
-                    # Maximum possible program size if the relevant 
-                    # node under consideration was chosen to be the 
-                    # function `f`.
-                    s_ = s + s_ + sum([Program.max_size(m, d_max-d)-1 
-                        for (d, *_) in stack]) if stack != [] else s + s_
-                    if s_ < desired:
-                        # The current function is not acceptable.
-                        temp_functions.remove(f)
-                # Update the set of valid functions if the current 
-                # `if` block did not eliminate all functions. (The 
-                # set of valid functions might already be empty.)
-                if temp_functions != []:
-                    valid_functions = temp_functions
+            if m > 0:
+                # Maximum possible size of each child subprogram of 
+                # the current node, and maximum possible size of all 
+                # subprograms rooted at outstanding nodes, excluding 
+                # these nodes. (For simplicity, we assume that all 
+                # functions with an arity not too big for the current 
+                # node could continually be used.)
+                s_child = capacity[m][d + 1] + 1
+                s_outstanding = totals[m]
+
+                # Eliminate functions that would cause the minimum
+                # size constraint to be violated.
+                valid_functions = [f for f in valid_functions 
+                    if s + arities[f] * s_child + s_outstanding >= s_min]
+
+                if trait == 'size':
+                    # Eliminate functions that would cause the desired
+                    # size constraint not to be met.
+                    temp_functions = [f for f in valid_functions 
+                        if s + arities[f] * s_child + s_outstanding 
+                            >= desired]
+                    if temp_functions != []:
+                        valid_functions = temp_functions
 
             # Maximum possible program size if the relevant node 
             # under consideration is chosen to be a terminal. This 
@@ -366,8 +399,7 @@ class Program(list):
             # full `m`-ary subtree such that the sum of the depth 
             # of this subtree and the depth of the root node within 
             # the overall program is equal to `d_max`.
-            s_max_possible = s + sum([Program.max_size(m, d_max-d) - 1 
-                for (d, *_) in stack]) if stack != [] and m > 0 else s
+            s_max_possible = s + totals[m] if m > 0 else s
 
             # Determine if the current node should be a terminal.
             choose_terminal = (valid_functions == [] or 
@@ -376,33 +408,25 @@ class Program(list):
                 (trait == 'size' and s >= desired) or 
                     (d >= d_min and s >= s_min and (trait == 'depth' or 
                         (trait == 'size' and s_max_possible >= desired)) and
-                            random.random() < ps.terminal_proportion))
+                            generator.random() < ps.terminal_proportion))
 
             if choose_terminal:
                 # A random terminal is to be chosen.
-                name = random.choice(list(ps.terminals.keys()))
-                if name in ps.constants:
-                    # Replace name with result of constant.
-                    name = str(ps[name]())
-                names.append(name)
-                # If the stack is nonempty, update the size of the
-                # next element to be equivalent to the size of the
-                # current node under consideration, so that, upon
-                # considering this upcoming element, the `s` value
-                # specified by this element will accurately represent 
-                # the current program size.
-                if len(stack) != 0:
-                    d, _ = stack.pop()
-                    stack.append((d, s))
+                name = generator.choice(ps.terminal_names)
+                nodes.append(cls._terminal(ps, name, rng))
             else:
                 # A random valid function is to be chosen.
-                name = random.choice(valid_functions) 
-                names.append(name)
+                f = generator.choice(valid_functions)
+                arity = arities[f]
+                nodes.append(cls.node_type(opcode=1 + f, 
+                    name=function_names[f], arity=arity, function=True))
                 # Add a placeholder stack element for each 
                 # argument needed by the chosen function.
-                arity = ps.arity(name)
                 for _ in range(arity):
-                    stack.append((d + 1, s + arity))
+                    stack.append(d + 1)
+                for m in ms:
+                    totals[m] += arity * capacity[m][d + 1]
+                s += arity
                 # Update the overall program depth if appropriate.
                 if d + 1 > depth:
                     depth = d + 1
@@ -412,21 +436,165 @@ class Program(list):
         if depth < d_min or depth > d_max or s < s_min or s > s_max:
             raise ValueError('No program exists for the given constraints.')
         else:
-            # Construct a `Program` object from the chosen nodes.
-            return Program.from_str(' '.join(names), ps)
+            # Construct a program object from the chosen nodes.
+            return cls(Program._link(nodes))
 
-    @staticmethod
-    def generate(primitive_set, d_max, s_max, d_min=0, s_min=1, 
-        trait='size', n_programs=1, n_threads=1):
+    @classmethod
+    def generate(cls, primitive_set, d_max, s_max, d_min=0, s_min=1, 
+        trait='size', n_programs=1, n_threads=1, seed=None, key=()):
         """Generate some number of random program expressions.
         
         Parallel processing is used based on the `n_threads` parameter.
+
+        If `seed` is not `None`, program `i` is generated with the 
+        random number stream given by `seed` and the key `(*key, i)` 
+        (see the module `gp.core.rng`), so that the result does not 
+        depend on the number of threads.
         """
         if n_threads == -1:
             # Use all available threads.
             n_threads = None
+        primitive_set = primitive_set.freeze()
         with ProcessPool(n_threads) as pool:
-            programs = pool.map(lambda _ : Program._generate(
+            programs = pool.map(lambda i : cls._generate(
                 primitive_set=primitive_set, d_max=d_max, s_max=s_max, 
-                d_min=d_min, s_min=s_min, trait=trait), range(n_programs))
+                d_min=d_min, s_min=s_min, trait=trait, 
+                rng=None if seed is None else stream(seed, *key, i)), 
+                    range(n_programs))
         return programs
+
+
+class ProgramView(MutableSequence):
+    """Class for view of a contiguous subprogram.
+
+    A view refers to the node list of some parent program through a
+    start index and a length, and it supports the read-only interface
+    of `Program` (traversals, serialization, compilation, evaluation,
+    and hashing) without copying any nodes. Upon the first mutation 
+    of a view, the relevant nodes are copied into storage owned by the 
+    view, so that the parent program is never modified.
+
+    Note that node objects are shared with the parent program, and 
+    that node attributes such as `parent` continue to refer to indices 
+    within the parent program.
+    """
+    __slots__ = ('_nodes', '_start', '_size', '_owner', '_owned', 'code')
+
+    def __init__(self, nodes, start=0, size=None):
+        if start < 0 or start > len(nodes):
+            raise IndexError(f'Start index `{start}` is out of range.')
+        if size is None:
+            size = len(nodes) - start
+        if size < 0 or start + size > len(nodes):
+            raise IndexError(f'Size `{size}` is out of range.')
+        self._nodes = nodes
+        self._start = start
+        self._size = size
+        # Class of program to which the view refers.
+        self._owner = type(nodes) if isinstance(nodes, Program) else Program
+        # Whether or not the view owns its node list.
+        self._owned = False
+        self.code = None
+
+    def _index(self, i):
+        """Return index within node list for view index `i`."""
+        if i < 0:
+            i += self._size
+        if i < 0 or i >= self._size:
+            raise IndexError('Program view index out of range.')
+        return self._start + i
+
+    def _detach(self):
+        """Copy nodes into storage owned by the view, if necessary."""
+        if not self._owned:
+            self._nodes = list(
+                self._nodes[self._start : self._start + self._size])
+            self._start = 0
+            self._owned = True
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._nodes[self._start + j] 
+                for j in range(*i.indices(self._size))]
+        return self._nodes[self._index(i)]
+
+    def __iter__(self):
+        return map(self._nodes.__getitem__, 
+            range(self._start, self._start + self._size))
+
+    def __reversed__(self):
+        return map(self._nodes.__getitem__, 
+            reversed(range(self._start, self._start + self._size)))
+
+    def __setitem__(self, i, value):
+        self._detach()
+        if isinstance(i, slice):
+            self._nodes[i] = value
+            self._size = len(self._nodes)
+        else:
+            self._nodes[self._index(i)] = value
+
+    def __delitem__(self, i):
+        self._detach()
+        if isinstance(i, slice):
+            del self._nodes[i]
+        else:
+            del self._nodes[self._index(i)]
+        self._size = len(self._nodes)
+
+    def insert(self, i, value):
+        self._detach()
+        self._nodes.insert(i, value)
+        self._size = len(self._nodes)
+
+    @property
+    def key(self):
+        """Return tuple of opcodes and values of all nodes.
+        
+        Two views (or programs) with the same key represent the same
+        program expression.
+        """
+        return tuple((n.opcode, n.value) for n in self)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        if isinstance(other, (Program, ProgramView)):
+            return len(self) == len(other) and all(
+                n.opcode == n_.opcode and n.value == n_.value 
+                    for n, n_ in zip(self, other))
+        return NotImplemented
+
+    def __reduce__(self):
+        # Only the nodes within the view are serialized.
+        return (ProgramView, (self._owner(self), 0, self._size))
+
+    def copy(self):
+        """Return `Program` object containing the nodes of the view."""
+        return self._owner(self)
+
+    def view(self, i=0):
+        """Return view of subprogram rooted at the node whose index is `i`."""
+        return ProgramView(self._nodes, self._index(i), self[i].size)
+
+    def subprogram(self, i):
+        """Return subprogram rooted at the node whose index is `i`."""
+        return self._owner(self[i : i + self[i].size])
+
+    # Read-only `Program` interface.
+    depth = Program.depth
+    size = Program.size
+    preorder = Program.preorder
+    preorder_str = Program.preorder_str
+    inorder = Program.inorder
+    inorder_str = Program.inorder_str
+    postorder = Program.postorder
+    postorder_str = Program.postorder_str
+    tensorgp_str = Program.tensorgp_str
+    __str__ = Program.__str__
+    __call__ = Program.__call__
+    compile = Program.compile
@@ -0,0 +1,25 @@
+"""Reproducible random number streams.
+
+A stream is a random number generator whose seed is derived from a base
+seed and a key (e.g., the name of a primitive set, the index of a bin,
+and the index of a program within the bin) by way of a cryptographic
+hash. Each task of a parallel computation can thus be given its own
+independent stream, so that results do not depend on the number of
+workers, the order in which tasks are scheduled, or the machine on
+which each task is run.
+"""
+import hashlib
+import random
+
+def stream_seed(seed, *key):
+    """Return 128-bit integer seed for the stream given by `seed` and `key`."""
+    digest = hashlib.blake2b(
+        repr((seed,) + key).encode(), digest_size=16).digest()
+    return int.from_bytes(digest, 'little')
+
+def stream(seed, *key):
+    """Return random number generator for the stream given by `seed` and `key`.
+
+    The key may consist of any integers and strings.
+    """
+    return random.Random(stream_seed(seed, *key))
@@ -0,0 +1,184 @@
+"""Uniform random sampling of programs of an exact size.
+
+For a given primitive set and maximum depth, dynamic programming tables
+count the programs of every size, where two programs are distinct if
+they differ in shape or in the primitive at any node (with a constant
+primitive counted once, regardless of its value). A program of an exact
+size is then drawn uniformly at random from all such programs, top-down,
+by choosing the primitive at each node and the sizes of the subprograms
+rooted at its children in proportion to the number of programs that
+remain possible after each choice. No program is ever rejected.
+
+Counts are exact (i.e., Python integers of arbitrary precision), and
+drawing a program of size `s` with maximum depth `d` takes at most
+`O(s * d)` operations.
+"""
+import random
+
+from pathos.pools import ProcessPool
+
+from .program import Program
+from .rng import stream
+
+class Sampler:
+    """Class for uniform sampler of programs of an exact size.
+
+    Keyword arguments:
+    primitive_set -- `PrimitiveSet` object.
+    d_max -- Maximum program depth.
+    s_max -- Maximum program size.
+    """
+    __slots__ = (
+        'primitive_set', 'd_max', 's_max', 'counts', 'tuples', 'sizes',
+        'functions')
+
+    def __init__(self, primitive_set, d_max, s_max):
+        ps = primitive_set.freeze()
+        if len(ps.terminals) == 0:
+            raise ValueError('Invalid primitive set.')
+        elif d_max < 0:
+            raise ValueError(f'Value provided for argument `d_max`, '
+                             f'`{d_max}`, is invalid.')
+        elif s_max < 1:
+            raise ValueError(f'Value provided for argument `s_max`, '
+                             f'`{s_max}`, is invalid.')
+        self.primitive_set = ps
+        self.d_max = d_max
+        self.s_max = s_max = min(s_max, Program.max_size(ps.m, d_max))
+
+        # Function opcodes, grouped by (nonzero) arity.
+        self.functions = {}
+        for f, a in enumerate(ps.function_arities):
+            if a > 0:
+                self.functions.setdefault(a, []).append(1 + f)
+        a_max = max(self.functions, default=0)
+        n_terminals = len(ps.terminal_names)
+
+        # Tables such that `counts[h][s]` is the number of programs
+        # of size `s` and depth at most `h`, and `tuples[h][k][t]` is
+        # the number of ordered `k`-tuples of such programs whose
+        # sizes sum to `t`. The list `sizes[h]` contains the sizes `s`
+        # for which `counts[h][s]` is nonzero, in increasing order.
+        self.counts, self.tuples, self.sizes = [], [], []
+        for h in range(d_max + 1):
+            counts = [0] * (s_max + 1)
+            counts[1] = n_terminals
+            if h > 0:
+                tuples = self.tuples[h - 1]
+                for a, functions in self.functions.items():
+                    for t, n in enumerate(tuples[a][:s_max]):
+                        counts[t + 1] += len(functions) * n
+            sizes = [s for s in range(s_max + 1) if counts[s] != 0]
+            # The `k`-tuple table follows from the `(k-1)`-tuple table
+            # by convolution with the counts for a single program.
+            tuples = [[1] + [0] * s_max]
+            for k in range(1, a_max + 1):
+                previous = tuples[-1]
+                nonzero = [t for t in range(s_max + 1) if previous[t] != 0]
+                current = [0] * (s_max + 1)
+                for s in sizes:
+                    n = counts[s]
+                    for t in nonzero:
+                        if s + t > s_max:
+                            break
+                        current[s + t] += n * previous[t]
+                tuples.append(current)
+            self.counts.append(counts)
+            self.tuples.append(tuples)
+            self.sizes.append(sizes)
+
+    def count(self, s):
+        """Return number of distinct programs of size `s`."""
+        return self.counts[self.d_max][s] if 0 <= s <= self.s_max else 0
+
+    def feasible_sizes(self, s_min=1, s_max=None):
+        """Return sizes between `s_min` and `s_max` for which programs exist."""
+        s_max = self.s_max if s_max is None else s_max
+        return [s for s in self.sizes[self.d_max] if s_min <= s <= s_max]
+
+    def sample(self, s, program_type=Program, rng=None):
+        """Return program of size `s` drawn uniformly at random.
+
+        The program is constructed from nodes of the type given by
+        `program_type.node_type`. Random numbers are drawn from the
+        generator `rng`, as for the `Program._generate` method.
+        """
+        if self.count(s) == 0:
+            raise ValueError('No program exists for the given constraints.')
+        ps = self.primitive_set
+        generator = random if rng is None else rng
+
+        # Chosen nodes, in pre-order.
+        nodes = []
+
+        # Stack containing the maximum depth and the size of the
+        # subprogram rooted at each outstanding node.
+        stack = [(self.d_max, s)]
+
+        while len(stack) != 0:
+            h, s = stack.pop()
+            if s == 1:
+                # A random terminal is to be chosen.
+                name = generator.choice(ps.terminal_names)
+                nodes.append(program_type._terminal(ps, name, rng))
+                continue
+
+            # Choose the arity and the function for the current node,
+            # in proportion to the number of programs rooted at the
+            # node for each choice.
+            tuples = self.tuples[h - 1]
+            r = generator.randrange(self.counts[h][s])
+            for a, functions in self.functions.items():
+                n = tuples[a][s - 1]
+                if r < len(functions) * n:
+                    break
+                r -= len(functions) * n
+            opcode = functions[r // n]
+            nodes.append(program_type.node_type(opcode=opcode,
+                name=ps.names[opcode], arity=a, function=True))
+
+            # Choose the sizes of the subprograms rooted at the
+            # children of the current node, in order, in proportion
+            # to the number of tuples of the remaining subprograms
+            # for each choice.
+            sizes, t = [], s - 1
+            for k in range(a, 1, -1):
+                r = generator.randrange(tuples[k][t])
+                for u in self.sizes[h - 1]:
+                    n = self.counts[h - 1][u] * tuples[k - 1][t - u]
+                    if r < n:
+                        break
+                    r -= n
+                sizes.append(u)
+                t -= u
+            sizes.append(t)
+
+            # Add a stack element for each child, such that the
+            # first child is considered next.
+            for u in reversed(sizes):
+                stack.append((h - 1, u))
+
+        return program_type(Program._link(nodes))
+
+def sample(primitive_set, d_max, sizes, program_type=Program, n_threads=1,
+    seed=None, key=()):
+    """Return programs drawn uniformly at random, one for each given size.
+
+    Parallel processing is used based on the `n_threads` parameter.
+    If `seed` is not `None`, program `i` is drawn with the random number
+    stream given by `seed` and the key `(*key, i)` (see the module 
+    `gp.core.rng`), so that the result does not depend on the number 
+    of threads.
+    """
+    sizes = list(sizes)
+    sampler = Sampler(primitive_set, d_max, max(sizes, default=1))
+    task = lambda i : sampler.sample(sizes[i], program_type, 
+        None if seed is None else stream(seed, *key, i))
+    if n_threads == 1:
+        return [task(i) for i in range(len(sizes))]
+    if n_threads == -1:
+        # Use all available threads.
+        n_threads = None
+    with ProcessPool(n_threads) as pool:
+        programs = pool.map(task, range(len(sizes)))
+    return programs
@@ -0,0 +1,193 @@
+"""Linear-time program serialization.
+
+Every serializer makes a single pass over the pre-order node sequence
+of a program, together with a stack of outstanding operand counts, so
+that the amount of work done is proportional to the program size.
+
+Supported notations:
+prefix -- Prefix (i.e., Polish) notation with parentheses and commas,
+    e.g., `add(v0, mul(v1, 0.5))`. This is the notation given by
+    `Program.__str__` and parsed by `Program.from_str`.
+preorder -- Space-separated prefix notation, e.g., `add v0 mul v1 0.5`.
+infix -- Infix notation, as utilized by Operon, e.g.,
+    `v0 add (v1 mul 0.5)`.
+postfix -- Postfix (i.e., Reverse Polish) notation, e.g.,
+    `v0 v1 0.5 mul add`.
+tensorgp -- Prefix notation in which constant terminals `t` are
+    rewritten as `scalar(t)`, as utilized by TensorGP.
+"""
+
+def _prefix(program, out, scalar=False):
+    """Append tokens of prefix program string to list `out`."""
+    # Stack containing the number of outstanding operands
+    # for each function encountered thus far.
+    stack = []
+    for node in program:
+        if node.function:
+            out.append(node.name)
+            out.append('(')
+            stack.append(node.arity)
+            continue
+        if scalar and not node.variable:
+            out.append(f'scalar({node.name})')
+        else:
+            out.append(node.name)
+        # Close every function for which all operands have
+        # been encountered, or separate the next operand.
+        while stack:
+            if stack[-1] == 1:
+                stack.pop()
+                out.append(')')
+            else:
+                stack[-1] -= 1
+                out.append(', ')
+                break
+
+def _tensorgp(program, out):
+    """Append tokens of TensorGP program string to list `out`."""
+    _prefix(program, out, scalar=True)
+
+def _preorder(program, out):
+    """Append tokens of pre-order program string to list `out`."""
+    for i, node in enumerate(program):
+        if i > 0:
+            out.append(' ')
+        out.append(node.name)
+
+def _infix(program, out):
+    """Append tokens of infix program string to list `out`.
+
+    Parentheses are added around every function, except for the
+    outermost function, and the function name is placed before the
+    rightmost operand.
+    """
+    # Stack containing each function encountered thus far, along
+    # with its number of outstanding operands.
+    stack = []
+    for node in program:
+        if node.function:
+            if stack:
+                out.append('(')
+            if node.arity == 1:
+                out.append(node.name)
+                out.append(' ')
+            stack.append([node, node.arity])
+            continue
+        out.append(node.name)
+        while stack:
+            parent = stack[-1]
+            parent[1] -= 1
+            if parent[1] == 0:
+                # All operands of the function have been encountered.
+                stack.pop()
+                if stack:
+                    out.append(')')
+            else:
+                if parent[1] == 1:
+                    # The rightmost operand is next.
+                    out.append(' ')
+                    out.append(parent[0].name)
+                out.append(' ')
+                break
+
+def _postfix(program, out):
+    """Append tokens of postfix program string to list `out`."""
+    for i, node in enumerate(postorder(program)):
+        if i > 0:
+            out.append(' ')
+        out.append(node.name)
+
+# Serializers for each supported notation.
+_serializers = {
+    'prefix' : _prefix,
+    'preorder' : _preorder,
+    'infix' : _infix,
+    'postfix' : _postfix,
+    'tensorgp' : _tensorgp,
+}
+
+# Names of supported notations.
+notations = tuple(_serializers)
+
+def _serializer(notation):
+    """Return serializer for the given notation."""
+    try:
+        return _serializers[notation]
+    except KeyError:
+        raise ValueError(f'Value provided for argument `notation`, '
+                         f'`{notation}`, is invalid.') from None
+
+def dumps(program, notation='prefix'):
+    """Return program string in the given notation."""
+    out = []
+    _serializer(notation)(program, out)
+    return ''.join(out)
+
+def dump(program, f, notation='prefix'):
+    """Write program string in the given notation to file object `f`."""
+    f.write(dumps(program, notation))
+
+def dump_corpus(bins, f, notation='prefix'):
+    """Write program strings for a corpus to file object `f`.
+
+    The corpus is given as an iterable of program bins. Every program
+    is written on its own line, in bin order, without a newline
+    following the final program. The number of programs written is
+    returned.
+    """
+    serializer = _serializer(notation)
+    n = 0
+    for program_bin in bins:
+        out = []
+        for program in program_bin:
+            if n > 0:
+                out.append('\n')
+            serializer(program, out)
+            n += 1
+        f.write(''.join(out))
+    return n
+
+def inorder(program):
+    """Return list of nodes given by in-order traversal.
+
+    For a function with more than one operand, every operand other
+    than the rightmost one is visited before the function.
+    """
+    nodes = []
+    stack = []
+    for node in program:
+        if node.function:
+            if node.arity == 1:
+                nodes.append(node)
+            stack.append([node, node.arity])
+            continue
+        nodes.append(node)
+        while stack:
+            parent = stack[-1]
+            parent[1] -= 1
+            if parent[1] == 0:
+                stack.pop()
+            else:
+                if parent[1] == 1:
+                    nodes.append(parent[0])
+                break
+    return nodes
+
+def postorder(program):
+    """Return list of nodes given by post-order traversal."""
+    nodes = []
+    stack = []
+    for node in program:
+        if node.function:
+            stack.append([node, node.arity])
+            continue
+        nodes.append(node)
+        while stack:
+            parent = stack[-1]
+            parent[1] -= 1
+            if parent[1] == 0:
+                stack.pop()
+                nodes.append(parent[0])
+            else:
+                break
+    return nodes
@@ -0,0 +1,237 @@
+"""Array-native variation operators.
+
+Every operator acts on a whole `ProgramBatch` (see the module
+`gp.core.batch`) and returns a new batch of offspring, without
+constructing any `Node` objects. Since the subprogram rooted at any
+node is a contiguous range of nodes, offspring are assembled by
+gathering ranges of node indices, and the `size`, `depth`, and `parent`
+attributes are then updated incrementally, i.e., only for the nodes
+whose attributes change:
+- sizes change only for the ancestors of a replaced subprogram;
+- depths are recomputed only along the path from a replaced subprogram
+  to the root, with one vectorized step per level;
+- parent indices are shifted only for nodes that are moved.
+
+Random choices are made with a NumPy `Generator` object, e.g., one
+given by `np.random.default_rng(stream_seed(seed, *key))` (see the
+module `gp.core.rng`), so that offspring are reproducible.
+"""
+import numpy as np
+
+from .batch import ProgramBatch, ranges
+
+def _arities(primitive_set):
+    """Return array of arities, indexed by opcode."""
+    return np.asarray(primitive_set.freeze().arities, dtype=np.int32)
+
+def _choose(rng, starts, lengths, valid=None):
+    """Return global index of a random node within each range.
+
+    If `valid` is given, it is a Boolean mask of all nodes within the
+    ranges (in order), and a random valid node is chosen for each range.
+    Every range must contain at least one valid node.
+    """
+    lengths = np.asarray(lengths, dtype=np.intp)
+    if valid is None:
+        return starts + (rng.random(len(lengths)) * lengths).astype(np.intp)
+    # Assign random keys to valid nodes, and choose the node
+    # with the largest key within each range.
+    keys = np.where(valid, rng.random(len(valid)), -1.0)
+    first = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    best = np.maximum.reduceat(keys, first)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    hits = np.flatnonzero(keys == best[owner])
+    _, k = np.unique(owner[hits], return_index=True)
+    return starts + hits[k] - first
+
+def _update_depths(batch, points, arities):
+    """Recompute depths of the ancestors of the given nodes, in place.
+
+    The depths of the nodes given by the global indices `points`, and
+    of all nodes other than their ancestors, must already be correct.
+    """
+    base = np.repeat(batch.offsets[:-1], batch.lengths)
+    current = np.asarray(points, dtype=np.intp)
+    a_max = int(arities.max(initial=0))
+    while len(current) > 0:
+        # Global indices of the parents of the current nodes.
+        parents = batch.parents[current]
+        current = base[current[parents >= 0]] + parents[parents >= 0]
+        # Depth of each parent is one more than the maximum
+        # depth of its children.
+        arity = arities[batch.opcodes[current]]
+        child = current + 1
+        depth = np.zeros(len(current), dtype=np.int32)
+        for k in range(a_max):
+            has = k < arity
+            child_ = np.where(has, child, 0)
+            depth = np.where(has, np.maximum(depth, batch.depths[child_]),
+                depth)
+            child = np.where(has, child + batch.sizes[child_], child)
+        batch.depths[current] = depth + 1
+
+def _splice(recipients, points, donors, donor_points, arities):
+    """Return batch given by replacing subprograms with donor subprograms.
+
+    Offspring `c` is program `r` of `recipients`, with the subprogram
+    rooted at global node index `points[c]` (which lies within program
+    `r`) replaced by the subprogram of `donors` rooted at global node
+    index `donor_points[c]`.
+    """
+    owners = recipients.owners
+    r = owners[points]
+    starts = recipients.offsets[r]
+    lengths = recipients.lengths[r]
+    a = points - starts
+    sa = recipients.sizes[points].astype(np.intp)
+    sb = donors.sizes[donor_points].astype(np.intp)
+    n_children = lengths - sa + sb
+    offsets = np.concatenate(([0], np.cumsum(n_children)))
+
+    # Nodes of both batches, where donor nodes follow recipient nodes.
+    n = len(recipients.opcodes)
+    source = ProgramBatch(*(np.concatenate((getattr(recipients, k),
+        getattr(donors, k))) for k in ProgramBatch.__slots__[:-1]), [0, 0])
+    segments = np.column_stack((starts, a, n + donor_points, sb,
+        points + sa, lengths - a - sa))
+    indices = ranges(segments[:, 0::2].ravel(), segments[:, 1::2].ravel())
+    child = source.gather(indices, offsets)
+
+    # Position of each node within its offspring, and the relevant
+    # properties of the offspring.
+    c = np.repeat(np.arange(len(n_children)), n_children)
+    p = np.arange(len(indices)) - offsets[c]
+    a_, sa_, sb_ = a[c], sa[c], sb[c]
+    prefix = p < a_
+    inserted = ~prefix & (p < a_ + sb_)
+    suffix = p >= a_ + sb_
+
+    # Sizes of the ancestors of the insertion point change by the
+    # difference in size between the subprograms.
+    ancestor = prefix & (p + child.sizes > a_)
+    child.sizes[ancestor] += (sb_ - sa_)[ancestor]
+
+    # Parents of inserted nodes are shifted from the donor point to
+    # the insertion point, except for the root of the subprogram, whose
+    # parent is that of the replaced subprogram; parents of the suffix
+    # nodes that follow the replaced subprogram are shifted by the
+    # difference in size.
+    root = inserted & (p == a_)
+    donor_a = (donor_points - donors.offsets[donors.owners[donor_points]])
+    child.parents[inserted] += (a - donor_a)[c][inserted]
+    child.parents[root] = recipients.parents[points]
+    moved = suffix & (child.parents >= a_)
+    child.parents[moved] += (sb_ - sa_)[moved]
+
+    _update_depths(child, offsets[:-1] + a, arities)
+    return child
+
+def _donor_points(rng, recipients, points, donors, programs, d_max):
+    """Return global index of a random donor node for each recipient node.
+
+    Donor nodes are chosen from the given donor programs, such that
+    the depth of each offspring is at most `d_max` (if not `None`).
+    """
+    starts = donors.offsets[programs]
+    lengths = donors.lengths[programs]
+    if d_max is None:
+        return _choose(rng, starts, lengths)
+    limit = d_max - recipients.levels()[points]
+    nodes = ranges(starts, lengths)
+    valid = donors.depths[nodes] <= np.repeat(limit, lengths)
+    return _choose(rng, starts, lengths, valid)
+
+def crossover(batch, pairs, primitive_set, rng, d_max=None):
+    """Return offspring given by subtree crossover.
+
+    For each pair `(i, j)` of program indices within `pairs`, the
+    offspring is program `i` with a random subprogram replaced by
+    a random subprogram of program `j`. If `d_max` is not `None`, the
+    subprogram of program `j` is chosen such that the depth of the
+    offspring is at most `d_max`.
+    """
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    points = _choose(rng, batch.offsets[pairs[:, 0]],
+        batch.lengths[pairs[:, 0]])
+    donor_points = _donor_points(
+        rng, batch, points, batch, pairs[:, 1], d_max)
+    return _splice(batch, points, batch, donor_points,
+        _arities(primitive_set))
+
+def subtree_mutation(batch, donors, primitive_set, rng, d_max=None):
+    """Return offspring given by subtree mutation.
+
+    Each program has a random subprogram replaced by a random
+    subprogram of a random program within the batch `donors`, which
+    should consist of randomly generated programs (e.g., as given by
+    `ProgramBatch.from_programs(Program.generate(...))`). Hence, a
+    single batch of random programs may serve any number of mutations.
+    If `d_max` is not `None`, the donor subprogram is chosen such that
+    the depth of the offspring is at most `d_max`.
+    """
+    points = _choose(rng, batch.offsets[:-1], batch.lengths)
+    programs = rng.integers(len(donors), size=len(batch))
+    donor_points = _donor_points(rng, batch, points, donors, programs, d_max)
+    return _splice(batch, points, donors, donor_points,
+        _arities(primitive_set))
+
+def hoist_mutation(batch, rng):
+    """Return offspring given by hoist mutation.
+
+    Each offspring is a random subprogram of the relevant program.
+    """
+    points = _choose(rng, batch.offsets[:-1], batch.lengths)
+    sizes = batch.sizes[points].astype(np.intp)
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    child = batch.gather(ranges(points, sizes), offsets)
+    # Shift parent indices by the position of the new root.
+    shift = np.repeat(points - batch.offsets[:-1], sizes)
+    child.parents -= shift.astype(np.int32)
+    child.parents[offsets[:-1]] = -1
+    return child
+
+def point_mutation(batch, primitive_set, rng, rate=0.1,
+    constant_range=(0.0, 1.0)):
+    """Return offspring given by point mutation.
+
+    Each node is independently replaced with probability `rate` by a
+    random primitive of the same arity, where terminals are chosen as
+    by the `Program._generate` method (i.e., uniformly from the names
+    of all terminals). Sizes, depths, and parents are unchanged. New
+    constant values are drawn uniformly from the interval given by
+    `constant_range`.
+    """
+    ps = primitive_set.freeze()
+    arities = _arities(ps)
+    child = ProgramBatch(batch.opcodes.copy(), batch.values.copy(),
+        batch.sizes, batch.depths, batch.parents, batch.offsets)
+    mutated = rng.random(len(child.opcodes)) < rate
+    node_arities = arities[child.opcodes]
+    choices = {a : np.array([ps.opcodes[name] for name, a_ in zip(
+        ps.function_names, ps.function_arities) if a_ == a])
+            for a in set(ps.function_arities)}
+    choices[0] = np.array([ps.opcodes[name] for name in ps.terminal_names])
+    for a, opcodes in choices.items():
+        nodes = np.flatnonzero(mutated & (node_arities == a))
+        child.opcodes[nodes] = opcodes[
+            rng.integers(len(opcodes), size=len(nodes))]
+    constants = np.flatnonzero(
+        mutated & (child.opcodes == ps.constant_opcode))
+    child.values[constants] = rng.uniform(*constant_range, len(constants))
+    child.values[child.opcodes != ps.constant_opcode] = 0.0
+    return child
+
+def perturb_constants(batch, primitive_set, rng, sigma=0.1, rate=1.0):
+    """Return offspring given by Gaussian perturbation of constants.
+
+    Each constant is independently perturbed with probability `rate`,
+    by adding a value drawn from a normal distribution whose standard
+    deviation is `sigma`.
+    """
+    constants = np.flatnonzero(
+        batch.opcodes == primitive_set.freeze().constant_opcode)
+    constants = constants[rng.random(len(constants)) < rate]
+    values = batch.values.copy()
+    values[constants] += rng.normal(0.0, sigma, len(constants))
+    return ProgramBatch(batch.opcodes, values, batch.sizes, batch.depths,
+        batch.parents, batch.offsets)
@@ -0,0 +1,58 @@
+"""Compressed streams based on standard library codecs.
+
+The codec of a file is inferred from its extension: `.gz` for gzip,
+`.bz2` for bzip2, and `.xz` for LZMA. Any other extension denotes an
+uncompressed file.
+
+For each codec, the concatenation of independently compressed blocks
+is itself a valid compressed stream, so that a file composed of such
+blocks may be decompressed as a whole by standard tools, or block by
+block given the byte offsets of the blocks.
+"""
+import bz2
+import gzip
+import lzma
+
+# Codec names, specified by codec identifier.
+codecs = (None, 'gzip', 'bz2', 'lzma')
+
+# File extensions, specified by codec name.
+extensions = {'gzip' : '.gz', 'bz2' : '.bz2', 'lzma' : '.xz'}
+
+# Modules implementing each codec.
+_modules = {'gzip' : gzip, 'bz2' : bz2, 'lzma' : lzma}
+
+def codec(path):
+    """Return name of codec for file, inferred from its extension."""
+    for name, extension in extensions.items():
+        if str(path).endswith(extension):
+            return name
+    return None
+
+def compress(data, codec, level=6):
+    """Return data compressed as a single block with the given codec."""
+    if codec is None:
+        return data
+    elif codec == 'gzip':
+        # A fixed modification time keeps the output reproducible.
+        return gzip.compress(data, level, mtime=0)
+    elif codec == 'lzma':
+        return lzma.compress(data, preset=level)
+    return bz2.compress(data, level)
+
+def decompress(data, codec):
+    """Return decompressed data for block(s) given with the given codec."""
+    if codec is None:
+        return data
+    return _modules[codec].decompress(data)
+
+def open_stream(path, mode='rt', **kwargs):
+    """Open file, which is possibly compressed, as a stream.
+
+    The codec is inferred from the extension of `path`, and the
+    remaining arguments are as for the built-in `open` function.
+    """
+    codec_ = codec(path)
+    if codec_ is None:
+        return open(path, mode, **kwargs)
+    return _modules[codec_].open(path, mode, **kwargs)
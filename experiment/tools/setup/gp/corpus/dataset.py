@@ -0,0 +1,186 @@
+"""Input/target datasets.
+
+The input and target data shared by all primitive sets are stored as
+NumPy `.npy` files in column-major (i.e., Fortran) order, so that the
+values of each variable are contiguous. The data relevant to any number
+of fitness cases and any number of variables is then a view of these
+files (e.g., `inputs[:nfc, :n_variables]`), rather than a copy, and
+the files may be memory-mapped rather than read in full.
+
+CSV files are written in large chunks, with every value formatted as
+by `float.__repr__`, i.e., with the shortest string that round-trips
+to the same value.
+
+Synthetic datasets of arbitrary size may be generated directly into
+memory-mapped `.npy` files, in chunks, so that memory usage is bounded
+regardless of the number of fitness cases. The values of each variable
+are drawn from their own random number stream, so that a dataset does
+not depend on the chunk size, and the values of the first `k` variables
+do not depend on the total number of variables.
+"""
+import os
+import pickle
+
+import numpy as np
+from pathos.pools import ProcessPool
+
+from gp.core.evaluation import vectorized
+from gp.core.program import Program
+from gp.core.rng import stream_seed
+from .compression import open_stream
+
+# Default number of rows formatted at once when writing CSV files.
+_chunk_size = 2 ** 14
+
+# Default number of rows generated at once for synthetic datasets.
+_generate_chunk_size = 2 ** 20
+
+# Distributions for synthetic input data.
+distributions = ('uniform', 'normal', 'heavy-tailed')
+
+def save(path, data):
+    """Write array to `.npy` file in column-major order."""
+    np.save(path, np.asfortranarray(data))
+
+def load(path, mmap=True):
+    """Return array from `.npy` file, which is memory-mapped if `mmap`."""
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+def save_dataset(directory, inputs, target):
+    """Write input/target data to the files `inputs.npy` and `target.npy`."""
+    save(f'{directory}/inputs.npy', inputs)
+    save(f'{directory}/target.npy', target)
+
+def load_dataset(directory, mmap=True):
+    """Return input/target data from the given directory.
+
+    If the files `inputs.npy` and `target.npy` do not exist, the
+    data is read from the files `inputs.pkl` and `target.pkl`.
+    """
+    if os.path.exists(f'{directory}/inputs.npy'):
+        return (load(f'{directory}/inputs.npy', mmap),
+            load(f'{directory}/target.npy', mmap))
+    with open(f'{directory}/inputs.pkl', 'rb') as f:
+        inputs = pickle.load(f)
+    with open(f'{directory}/target.pkl', 'rb') as f:
+        target = pickle.load(f)
+    return np.asarray(inputs), np.asarray(target)
+
+def _format_rows(chunk):
+    """Return CSV text for two-dimensional array of rows."""
+    row = ','.join(['%s'] * chunk.shape[1]) + '\n'
+    return (row * len(chunk)) % tuple(
+        map(float.__repr__, chunk.ravel().tolist()))
+
+def _draw(generator, distribution, n):
+    """Return `n` values drawn from the given distribution."""
+    if distribution == 'uniform':
+        # Uniform distribution over the interval [0, 1).
+        return generator.random(n)
+    elif distribution == 'normal':
+        # Standard normal distribution.
+        return generator.standard_normal(n)
+    # Student's t-distribution with two degrees of freedom, which 
+    # has infinite variance.
+    return generator.standard_t(2, n)
+
+def generate_dataset(directory, n_rows, n_variables, seed, 
+    distribution='uniform', target=None, primitive_set=None, 
+        chunk_size=_generate_chunk_size):
+    """Generate synthetic input/target data, and return it.
+
+    The data is written to the files `inputs.npy` and `target.npy` 
+    within the given directory (see the `load_dataset` function), and 
+    the returned arrays are memory-mapped.
+
+    Keyword arguments:
+    directory -- Output directory.
+    n_rows -- Number of fitness cases.
+    n_variables -- Number of input variables.
+    seed -- Random seed.
+    distribution -- Distribution of input values, i.e., 'uniform', 
+        'normal', or 'heavy-tailed'. (default: 'uniform')
+    target -- Target function, given as `None`, for which target values 
+        are drawn uniformly from the interval [0, 1); as a callable 
+        object, which maps a two-dimensional array of inputs to a 
+        one-dimensional array of targets; or as a `Program` object or 
+        program string, which is evaluated on the inputs with respect 
+        to `primitive_set`. (default: None)
+    primitive_set -- `PrimitiveSet` object, needed only if `target` is
+        a program. (default: None)
+    chunk_size -- Number of rows generated at once.
+    """
+    if distribution not in distributions:
+        raise ValueError(f'Value provided for argument `distribution`, '
+                         f'`{distribution}`, is invalid.')
+    if isinstance(target, (str, Program)):
+        if primitive_set is None:
+            raise ValueError('A primitive set must be provided to '
+                             'evaluate a target program.')
+        program = (Program.from_str(target, primitive_set) 
+            if isinstance(target, str) else target)
+        target = lambda X : vectorized(program, X, primitive_set)
+
+    inputs = np.lib.format.open_memmap(f'{directory}/inputs.npy', 
+        mode='w+', dtype=np.float64, shape=(n_rows, n_variables), 
+        fortran_order=True)
+    for j in range(n_variables):
+        # Random number stream for variable `j`.
+        generator = np.random.default_rng(stream_seed(seed, 'inputs', j))
+        for i in range(0, n_rows, chunk_size):
+            inputs[i : i + chunk_size, j] = _draw(
+                generator, distribution, min(chunk_size, n_rows - i))
+    inputs.flush()
+
+    target_ = np.lib.format.open_memmap(f'{directory}/target.npy', 
+        mode='w+', dtype=np.float64, shape=(n_rows,))
+    generator = np.random.default_rng(stream_seed(seed, 'target'))
+    for i in range(0, n_rows, chunk_size):
+        target_[i : i + chunk_size] = (
+            generator.random(min(chunk_size, n_rows - i)) if target is None
+                else target(np.asarray(inputs[i : i + chunk_size])))
+    target_.flush()
+
+    return load_dataset(directory)
+
+def write_csv(path, data, header, chunk_size=_chunk_size, n_threads=1):
+    """Write two-dimensional data to CSV file, including a header.
+
+    The data is given as an array, or as a tuple of arrays whose 
+    columns are stacked, chunk by chunk, to form the rows of the file.
+    Every row, including the last, is followed by a newline. The file
+    may be compressed, as inferred from the extension of `path` (see
+    the module `gp.corpus.compression`).
+
+    Since formatting values dominates the cost of writing, chunks are 
+    formatted in parallel, based on the `n_threads` parameter, with 
+    a bounded number of chunks in memory at any time.
+    """
+    columns = data if isinstance(data, tuple) else (data,)
+    n_rows = len(columns[0])
+    chunk = lambda i : np.column_stack(
+        [c[i : i + chunk_size] for c in columns]).astype(np.float64)
+    starts = range(0, n_rows, chunk_size)
+    with open_stream(path, 'wt') as f:
+        f.write(','.join(header) + '\n')
+        if n_threads == 1:
+            for i in starts:
+                f.write(_format_rows(chunk(i)))
+            return
+        if n_threads == -1:
+            # Use all available threads.
+            n_threads = os.cpu_count()
+        with ProcessPool(n_threads) as pool:
+            for k in range(0, len(starts), 2 * n_threads):
+                for text in pool.map(_format_rows, 
+                    [chunk(i) for i in starts[k : k + 2 * n_threads]]):
+                    f.write(text)
+
+def write_data_csv(path, inputs, target, variables, chunk_size=_chunk_size,
+    n_threads=1):
+    """Write input/target data to CSV file for the given variable names.
+
+    The final column, named `y`, contains the target data.
+    """
+    write_csv(path, (inputs, target), list(variables) + ['y'], chunk_size,
+        n_threads)
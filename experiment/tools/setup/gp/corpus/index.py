@@ -0,0 +1,395 @@
+"""Line-offset indices for random access into program files.
+
+A program file contains one program string per line, with the programs
+of each bin given consecutively and no newline following the final
+program. A sidecar index file, whose path is that of the program file
+with the suffix `.idx` appended, contains the byte offset of every
+program and the index of the first program within every bin, so that
+a single bin or any range of programs may be read without reading the
+whole program file.
+
+A program file may be compressed with any codec of the module
+`gp.corpus.compression`, as inferred from its extension. In this case,
+every bin is compressed as an independent block, and the index also
+contains the byte offset of every block within the compressed file,
+so that any bin can be decompressed on its own (and in parallel with
+other bins). Byte offsets of programs always refer to the uncompressed
+program text.
+
+Index file layout (all integers are little-endian, unsigned, 64-bit):
+magic -- The bytes `b'GPIDX\\x00\\x00\\x02'`.
+n_bins, n_programs, codec -- Number of bins, number of programs, and
+    codec identifier (see `gp.corpus.compression.codecs`).
+bins -- `n_bins + 1` program indices; bin `j` consists of programs
+    `bins[j]` through `bins[j + 1] - 1`.
+offsets -- `n_programs + 1` byte offsets; program `i` starts at byte
+    `offsets[i]`, and `offsets[n_programs]` is the size of the file
+    plus one (i.e., the position of a hypothetical final newline).
+blocks -- `n_bins + 1` byte offsets; bin `j` is stored within bytes
+    `blocks[j]` through `blocks[j + 1] - 1` of the (possibly compressed)
+    program file. Every block includes the newline preceding its first
+    program, if such a newline exists.
+"""
+import os
+
+import numpy as np
+from pathos.pools import ThreadPool
+
+from gp.core.serialization import dumps
+from . import compression
+
+# Magic bytes for index files.
+_magic = b'GPIDX\x00\x00\x02'
+
+# Default number of bytes read at once when streaming programs.
+_chunk_size = 2 ** 20
+
+# Extensions of program files that are checked for, in order,
+# when a program file is opened by the `CorpusReader` class.
+_extensions = ('', '.gz', '.bz2', '.xz')
+
+class ProgramIndex:
+    """Class for line-offset index of program file."""
+    __slots__ = ('bins', 'offsets', 'blocks', 'codec')
+
+    def __init__(self, bins, offsets, blocks=None, codec=None):
+        self.bins = np.asarray(bins, dtype=np.uint64)
+        self.offsets = np.asarray(offsets, dtype=np.uint64)
+        if blocks is None:
+            # For an uncompressed file, every block starts at the
+            # newline preceding the first program of the relevant bin.
+            blocks = np.maximum(
+                self.offsets[self.bins.astype(np.intp)], 1) - 1
+        self.blocks = np.asarray(blocks, dtype=np.uint64)
+        self.codec = codec
+
+    @property
+    def n_bins(self):
+        """Return number of bins."""
+        return len(self.bins) - 1
+
+    @property
+    def n_programs(self):
+        """Return number of programs."""
+        return len(self.offsets) - 1
+
+    def bin_range(self, j):
+        """Return range of program indices for bin `j`."""
+        if j < 0:
+            j += self.n_bins
+        if j < 0 or j >= self.n_bins:
+            raise IndexError(f'Bin index `{j}` is out of range.')
+        return range(int(self.bins[j]), int(self.bins[j + 1]))
+
+    def byte_range(self, start, stop):
+        """Return byte range spanned by programs `start` to `stop - 1`.
+
+        The byte range excludes the newline following the final program,
+        and it refers to the uncompressed program text.
+        """
+        return int(self.offsets[start]), int(self.offsets[stop]) - 1
+
+    def block_range(self, j):
+        """Return byte range of the block for bin `j` within the file."""
+        return int(self.blocks[j]), int(self.blocks[j + 1])
+
+    def save(self, path):
+        """Write index to file."""
+        with open(path, 'wb') as f:
+            f.write(_magic)
+            f.write(np.array([self.n_bins, self.n_programs,
+                compression.codecs.index(self.codec)], dtype='<u8').tobytes())
+            f.write(self.bins.astype('<u8').tobytes())
+            f.write(self.offsets.astype('<u8').tobytes())
+            f.write(self.blocks.astype('<u8').tobytes())
+
+    @staticmethod
+    def load(path):
+        """Read index from file."""
+        with open(path, 'rb') as f:
+            if f.read(len(_magic)) != _magic:
+                raise ValueError(f'File `{path}` is not a valid index file.')
+            n_bins, n_programs, codec = (
+                int(n) for n in np.frombuffer(f.read(24), dtype='<u8'))
+            bins = np.frombuffer(f.read(8 * (n_bins + 1)), dtype='<u8')
+            offsets = np.frombuffer(f.read(8 * (n_programs + 1)), dtype='<u8')
+            blocks = np.frombuffer(f.read(8 * (n_bins + 1)), dtype='<u8')
+        return ProgramIndex(bins, offsets, blocks, compression.codecs[codec])
+
+    @staticmethod
+    def build(path, n_programs):
+        """Construct index for an existing, uncompressed program file.
+
+        The file is scanned in fixed-size chunks. Every bin is assumed
+        to contain `n_programs` programs, except possibly the last. A
+        newline at the end of the file terminates the last program,
+        rather than beginning an empty one.
+        """
+        if compression.codec(path) is not None:
+            raise ValueError(f'An index cannot be built for the '
+                             f'compressed file `{path}`.')
+        offsets = [np.zeros(1, dtype=np.uint64)]
+        with open(path, 'rb') as f:
+            position, last = 0, b''
+            while chunk := f.read(_chunk_size):
+                newlines = np.flatnonzero(
+                    np.frombuffer(chunk, dtype=np.uint8) == ord('\n'))
+                offsets.append((newlines + position + 1).astype(np.uint64))
+                position += len(chunk)
+                last = chunk[-1:]
+        if position > 0 and last != b'\n':
+            # The last program is not followed by a newline.
+            offsets.append(np.array([position + 1], dtype=np.uint64))
+        offsets = np.concatenate(offsets)
+        n = len(offsets) - 1
+        bins = list(range(0, n, n_programs)) + [n]
+        return ProgramIndex(bins, offsets)
+
+def index_path(path):
+    """Return path of index file for program file."""
+    return f'{path}.idx'
+
+class CorpusWriter:
+    """Class for writing a program file, one bin at a time.
+
+    Programs are written in the given notation (see the module
+    `gp.core.serialization`). If the extension of `path` denotes a
+    compressed file, every bin is compressed as an independent block
+    with compression level `level`. The index file is written whenever
+    the `flush` method is called, and upon closing the writer.
+
+    If `n_bins` is nonzero, an existing program file and its index
+    are reopened, and the writer continues after the first `n_bins` 
+    bins of the file; any further bins are discarded.
+    """
+    __slots__ = ('path', 'notation', 'level', 'codec', '_file', '_bins', 
+        '_offsets', '_blocks')
+
+    def __init__(self, path, notation='prefix', level=6, n_bins=0):
+        self.path = path
+        self.notation = notation
+        self.level = level
+        self.codec = compression.codec(path)
+        if n_bins == 0:
+            self._bins, self._offsets, self._blocks = [0], [0], [0]
+            self._file = open(path, 'wb')
+        else:
+            index = ProgramIndex.load(index_path(path))
+            if n_bins > index.n_bins:
+                raise ValueError(f'Value provided for argument `n_bins`, '
+                                 f'`{n_bins}`, is invalid.')
+            self._bins = [int(i) for i in index.bins[:n_bins + 1]]
+            self._offsets = [int(o) for o in 
+                index.offsets[:self._bins[-1] + 1]]
+            self._blocks = [int(b) for b in index.blocks[:n_bins + 1]]
+            self._file = open(path, 'r+b')
+            self._file.truncate(self._blocks[-1])
+            self._file.seek(self._blocks[-1])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def index(self):
+        """Return index for the bins written so far."""
+        return ProgramIndex(self._bins, self._offsets, self._blocks, 
+            self.codec)
+
+    def write_bin(self, programs):
+        """Write bin of programs."""
+        offsets = self._offsets
+        # Program strings for the bin, each preceded by a newline
+        # if it is not the first program within the file.
+        out = []
+        for program in programs:
+            if len(offsets) > 1:
+                out.append(b'\n')
+            out.append(dumps(program, self.notation).encode())
+            offsets.append(offsets[-1] + len(out[-1]) + 1)
+        if out:
+            self._file.write(
+                compression.compress(b''.join(out), self.codec, self.level))
+        self._blocks.append(self._file.tell())
+        self._bins.append(len(offsets) - 1)
+
+    def flush(self):
+        """Flush program file, and write index file."""
+        self._file.flush()
+        self.index.save(index_path(self.path))
+
+    def close(self):
+        """Close program file, and write index file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+def write_corpus(path, bins, notation='prefix', level=6):
+    """Write program strings for a corpus, along with an index.
+
+    The corpus is given as an iterable of program bins, and each
+    program is written in the given notation (see the module
+    `gp.core.serialization`). If the extension of `path` denotes
+    a compressed file, every bin is compressed as an independent
+    block with compression level `level`. The resulting index is
+    returned.
+    """
+    with CorpusWriter(path, notation, level) as writer:
+        for program_bin in bins:
+            writer.write_bin(program_bin)
+    return writer.index
+
+class CorpusReader:
+    """Class for random access into a program file.
+
+    If `path` does not exist, a compressed program file whose path
+    is `path` with a compression extension appended is opened instead,
+    if one exists. If no index file exists for an uncompressed program
+    file, an index is built by scanning the program file, with every
+    bin assumed to contain `n_programs` programs, and the index is
+    written to file, if possible.
+    """
+    __slots__ = ('path', 'index', '_file')
+
+    def __init__(self, path, n_programs=None):
+        for extension in _extensions:
+            if os.path.exists(f'{path}{extension}'):
+                path = f'{path}{extension}'
+                break
+        self.path = path
+        if os.path.exists(index_path(path)):
+            self.index = ProgramIndex.load(index_path(path))
+        elif n_programs is None:
+            raise ValueError(f'No index file exists for `{path}`, and no '
+                             f'value was provided for `n_programs`.')
+        else:
+            self.index = ProgramIndex.build(path, n_programs)
+            try:
+                self.index.save(index_path(path))
+            except OSError:
+                pass
+        self._file = open(path, 'rb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close program file."""
+        self._file.close()
+
+    def __len__(self):
+        """Return the number of programs."""
+        return self.index.n_programs
+
+    @property
+    def n_bins(self):
+        """Return number of bins."""
+        return self.index.n_bins
+
+    def _read_block(self, j):
+        """Return raw (possibly compressed) block for bin `j`."""
+        a, b = self.index.block_range(j)
+        self._file.seek(a)
+        return self._file.read(b - a)
+
+    def _decompress(self, block):
+        """Return decompressed block."""
+        return (compression.decompress(block, self.index.codec) 
+            if block else block)
+
+    def _split_block(self, j, data, start=None, stop=None):
+        """Return program strings within decompressed block for bin `j`."""
+        r = self.index.bin_range(j)
+        start = r.start if start is None else max(start, r.start)
+        stop = r.stop if stop is None else min(stop, r.stop)
+        if start >= stop:
+            return []
+        # Uncompressed byte offset at which the block starts.
+        base = int(self.index.offsets[r.start]) - (r.start > 0)
+        a, b = self.index.byte_range(start, stop)
+        return data[a - base : b - base].decode().split('\n')
+
+    def iter_programs(self, start=0, stop=None, chunk_size=_chunk_size):
+        """Generate program strings for programs `start` to `stop - 1`.
+
+        For an uncompressed file, program strings are read in chunks
+        of roughly `chunk_size` bytes; for a compressed file, they are
+        read one block at a time. Either way, memory usage stays bounded.
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if self.index.codec is not None:
+            # Bins overlapping the range of programs.
+            bins = self.index.bins
+            j = int(np.searchsorted(bins, start, side='right')) - 1
+            while start < stop:
+                data = self._decompress(self._read_block(j))
+                yield from self._split_block(j, data, start, stop)
+                start = int(bins[j + 1])
+                j += 1
+            return
+        offsets = self.index.offsets
+        while start < stop:
+            # Index of the final program within the current chunk;
+            # at least one program is read.
+            end = int(np.searchsorted(
+                offsets, offsets[start] + chunk_size, side='right')) - 1
+            end = min(max(end, start + 1), stop)
+            a, b = self.index.byte_range(start, end)
+            self._file.seek(a)
+            yield from self._file.read(b - a).decode().split('\n')
+            start = end
+
+    def read_programs(self, start=0, stop=None):
+        """Return list of program strings for programs `start` to `stop - 1`."""
+        return list(self.iter_programs(start, stop))
+
+    def iter_bin(self, j):
+        """Generate program strings for bin `j`."""
+        r = self.index.bin_range(j)
+        return self.iter_programs(r.start, r.stop)
+
+    def read_bin(self, j):
+        """Return list of program strings for bin `j`."""
+        return list(self.iter_bin(j))
+
+    def read_indices(self, indices):
+        """Return list of program strings for the given program indices.
+
+        Programs are read in runs of consecutive indices.
+        """
+        indices = [int(i) for i in indices]
+        programs = []
+        k = 0
+        while k < len(indices):
+            # Extend the current run of consecutive indices.
+            n = 1
+            while (k + n < len(indices) and 
+                indices[k + n] == indices[k] + n):
+                n += 1
+            programs.extend(self.iter_programs(indices[k], indices[k] + n))
+            k += n
+        return programs
+
+    def read_bins(self, bins=None, n_threads=1):
+        """Return list of program string lists for the given bins.
+
+        For a compressed file, blocks are decompressed in parallel,
+        based on the `n_threads` parameter; the standard library codecs
+        release the global interpreter lock while decompressing.
+        """
+        bins = range(self.n_bins) if bins is None else bins
+        if self.index.codec is None:
+            return [self.read_bin(j) for j in bins]
+        if n_threads == -1:
+            # Use all available threads.
+            n_threads = None
+        # Raw blocks are read sequentially, since they share a file.
+        blocks = [self._read_block(j) for j in bins]
+        with ThreadPool(n_threads) as pool:
+            data = pool.map(self._decompress, blocks)
+        return [self._split_block(j, data_) for j, data_ in zip(bins, data)]
@@ -0,0 +1,270 @@
+"""Pipelined generation of program corpora.
+
+Bins of programs are generated by worker processes, and, as soon as
+each bin is complete, all configured output files are extended with
+the programs of the bin by a single writer (i.e., the calling process).
+At most a bounded number of bins is held in memory at any time.
+
+The progress of the writer is recorded within a manifest file, named
+`manifest.json`, after each bin is written. If generation is interrupted,
+a subsequent run with the same configuration truncates every output file
+to its size after the last recorded bin and resumes from the next bin.
+Since every program is generated with its own random number stream
+(see the module `gp.core.rng`), a resumed run yields the same corpus
+as an uninterrupted run.
+
+Outputs are specified by a dictionary mapping file names, relative to
+the directory for the relevant primitive set, to notations. Any notation
+of the module `gp.core.serialization` yields a program file with an index
+(see the module `gp.corpus.index`), and the notation `'machine_code'`
+yields a program memory file, which contains one machine code word per
+node, including a null word after each program, in the format inferred
+from its extension (see the module `gp.hw.memory`), e.g., one word per
+line for `.txt` files or raw words for `.bin` files.
+"""
+from collections import deque
+import json
+import math
+import os
+import pickle
+
+from pathos.pools import ProcessPool
+
+from gp.core.rng import stream
+from gp.core.sampling import Sampler
+from gp.hw import memory
+from .index import CorpusReader, CorpusWriter
+
+# Default outputs for each primitive set.
+outputs = {'programs.txt' : 'prefix', 'program_memory.txt' : 'machine_code'}
+
+# Generation methods.
+methods = ('uniform', 'heuristic')
+
+# Samplers constructed within the current process, specified by
+# primitive set version, maximum depth, and maximum size.
+_samplers = {}
+
+def bin_bounds(i, n_bins, s_max_possible):
+    """Return minimum/maximum program sizes for bin `i`.
+
+    Sizes are divided evenly between bins, except that the last bin
+    may contain fewer sizes.
+    """
+    # Number of unique sizes per program bin (except possibly the last).
+    n_sizes = math.ceil(s_max_possible / n_bins)
+    s_min = i * n_sizes + 1
+    s_max = s_max_possible if i == n_bins - 1 else (i + 1) * n_sizes
+    return s_min, s_max
+
+def _sampler(ps, d_max, s_max):
+    """Return sampler, which is cached within the current process."""
+    key = (ps.version, d_max, s_max)
+    if key not in _samplers:
+        _samplers[key] = Sampler(ps, d_max, s_max)
+    return _samplers[key]
+
+def generate_bin(program_type, ps, d_max, i, n_bins, n_programs, seed,
+    key=(), method='uniform'):
+    """Return list of programs for bin `i`.
+
+    Program `j` of the bin is generated with the random number stream
+    given by `seed` and the key `(*key, i, j)`. For the `'uniform'`
+    method, program sizes are spread evenly over the sizes possible for
+    the bin, and each program is drawn uniformly at random from all
+    programs of its size; for the `'heuristic'` method, programs are
+    generated by way of the `Program._generate` method.
+    """
+    s_max_possible = program_type.max_size(ps.m, d_max)
+    s_min, s_max = bin_bounds(i, n_bins, s_max_possible)
+    if method == 'uniform':
+        sampler = _sampler(ps, d_max, s_max_possible)
+        sizes = sampler.feasible_sizes(s_min, s_max)
+        return [sampler.sample(sizes[j * len(sizes) // n_programs],
+            program_type, stream(seed, *key, i, j))
+                for j in range(n_programs)]
+    elif method == 'heuristic':
+        return [program_type._generate(primitive_set=ps, d_max=d_max,
+            s_max=s_max, d_min=0, s_min=s_min,
+            rng=stream(seed, *key, i, j)) for j in range(n_programs)]
+    raise ValueError(f'Value provided for argument `method`, '
+                     f'`{method}`, is invalid.')
+
+def _generate_bin(transform, *args):
+    """Return pickled list of programs for bin, as for `generate_bin`.
+
+    If `transform` is not `None`, the bin is replaced by the result of
+    `transform(programs, key)`, where `key` is the key of the bin, i.e.,
+    the value `(*key, i)` for the arguments `key` and `i` of the
+    `generate_bin` function.
+
+    Results are returned from worker processes by way of `dill`, whose 
+    pure-Python pickler is much slower than the standard pickler for 
+    large lists of nodes; hence, bins are pickled in advance.
+    """
+    programs = generate_bin(*args)
+    if transform is not None:
+        _, _, _, i, _, _, _, key, _ = args
+        programs = transform(programs, (*key, i))
+    return pickle.dumps(programs, pickle.HIGHEST_PROTOCOL)
+
+class _MemoryWriter:
+    """Class for writing a program memory file, one bin at a time."""
+    __slots__ = ('_file', '_format')
+
+    def __init__(self, path, size=0):
+        self._format = memory.image_format(path)
+        if size == 0:
+            self._file = open(path, 'wb')
+        else:
+            self._file = open(path, 'r+b')
+            self._file.truncate(size)
+            self._file.seek(size)
+
+    def write_bin(self, programs):
+        """Write machine code for bin of programs."""
+        out = memory.dumps(memory.encode(programs), self._format)
+        if self._format != 'bin' and self._file.tell() != 0 and out:
+            out = b'\n' + out
+        self._file.write(out)
+
+    def flush(self):
+        """Flush program memory file."""
+        self._file.flush()
+
+    def close(self):
+        """Close program memory file."""
+        self._file.close()
+
+class Manifest:
+    """Class for manifest of corpus generation progress.
+
+    For each primitive set, the manifest records the number of bins
+    written, and the size of each output file after the final such bin.
+    """
+    __slots__ = ('path', 'config', 'progress')
+
+    def __init__(self, path, config):
+        self.path = path
+        self.config = config
+        self.progress = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+            if manifest.get('config') == config:
+                self.progress = manifest['progress']
+
+    def n_bins(self, name):
+        """Return number of bins written for primitive set."""
+        return self.progress.get(name, {}).get('bins', 0)
+
+    def sizes(self, name):
+        """Return sizes of output files for primitive set."""
+        return self.progress.get(name, {}).get('sizes', {})
+
+    def update(self, name, n_bins, sizes):
+        """Record progress for primitive set, and write manifest file.
+
+        The manifest file is replaced atomically.
+        """
+        self.progress[name] = {'bins' : n_bins, 'sizes' : sizes}
+        with open(f'{self.path}.tmp', 'w') as f:
+            json.dump({'config' : self.config, 'progress' : self.progress},
+                f, indent=2)
+        os.replace(f'{self.path}.tmp', self.path)
+
+def _open_writer(path, notation, n_bins, size):
+    """Return writer for output file, continuing after `n_bins` bins."""
+    if notation == 'machine_code':
+        return _MemoryWriter(path, size if n_bins > 0 else 0)
+    return CorpusWriter(path, notation, n_bins=n_bins)
+
+def run(root_dir, program_type, primitive_sets, depths, n_bins, n_programs,
+    seed, method='uniform', outputs=outputs, n_threads=1, n_buffered=None,
+        transform=None):
+    """Generate corpus for each primitive set, resuming if possible.
+
+    This is a generator function that yields the primitive set name
+    and bin index for each bin, as the bin is written.
+
+    Keyword arguments:
+    root_dir -- Directory containing a subdirectory for each primitive
+        set, as well as the manifest file.
+    program_type -- Type of generated programs (e.g., the class
+        `gp.hw.program.Program`).
+    primitive_sets -- Dictionary of `PrimitiveSet` objects.
+    depths -- Maximum program depth for each primitive set, in order.
+    n_bins -- Number of bins per primitive set.
+    n_programs -- Number of programs per bin.
+    seed -- Random seed.
+    method -- Generation method. (default: 'uniform')
+    outputs -- Dictionary mapping output file names to notations.
+    n_threads -- Number of worker processes, where -1 denotes all
+        available threads. (default: 1)
+    n_buffered -- Maximum number of bins generated ahead of the writer.
+        (default: twice the number of worker processes)
+    transform -- Callable object applied to each bin within the worker
+        processes (see the `_generate_bin` function), or `None`. Since
+        its representation is recorded within the manifest, it should 
+        be the same for equivalent transformations. (default: None)
+    """
+    if method not in methods:
+        raise ValueError(f'Value provided for argument `method`, '
+                         f'`{method}`, is invalid.')
+    if n_threads == -1:
+        # Use all available threads.
+        n_threads = os.cpu_count()
+    n_buffered = 2 * n_threads if n_buffered is None else n_buffered
+
+    config = {
+        'primitive_sets' : {name : ps.freeze().version
+            for name, ps in primitive_sets.items()},
+        'depths' : list(depths), 'n_bins' : n_bins,
+        'n_programs' : n_programs, 'seed' : seed, 'method' : method,
+        'outputs' : outputs, 
+        'transform' : None if transform is None else repr(transform)}
+    manifest = Manifest(f'{root_dir}/manifest.json', config)
+
+    with ProcessPool(n_threads) as pool:
+        for (name, ps), d_max in zip(primitive_sets.items(), depths):
+            ps = ps.freeze()
+            start = manifest.n_bins(name)
+            if start == n_bins:
+                # The corpus for the primitive set is complete.
+                continue
+            paths = {file : f'{root_dir}/{name}/{file}' for file in outputs}
+            sizes = manifest.sizes(name)
+            writers = {file : _open_writer(paths[file], notation, start,
+                sizes.get(file, 0)) for file, notation in outputs.items()}
+
+            # Bins submitted to the worker processes, in order.
+            pending = deque()
+            submitted = start
+            for i in range(start, n_bins):
+                while submitted < n_bins and len(pending) < n_buffered:
+                    pending.append(pool.apipe(_generate_bin, transform, 
+                        program_type, ps, d_max, submitted, n_bins, 
+                        n_programs, seed, (name,), method))
+                    submitted += 1
+                programs = pickle.loads(pending.popleft().get())
+                for writer in writers.values():
+                    writer.write_bin(programs)
+                    writer.flush()
+                del programs
+                manifest.update(name, i + 1,
+                    {file : os.path.getsize(path)
+                        for file, path in paths.items()})
+                yield name, i
+
+            for writer in writers.values():
+                writer.close()
+
+def load(path, program_type, primitive_set):
+    """Return list of program bins read from a prefix program file.
+
+    Since constant values are written with round-trip precision,
+    the resulting programs are identical to those that were written.
+    """
+    with CorpusReader(path) as reader:
+        return [[program_type.from_str(s, primitive_set) for s in bin_]
+            for bin_ in reader.read_bins()]
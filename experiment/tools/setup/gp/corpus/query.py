@@ -0,0 +1,199 @@
+"""Columnar program tables for querying corpora.
+
+A program table contains, for every program of a corpus, the index of
+its bin, its size, its depth, its number of constants, a structural
+hash, and a histogram of its opcodes, with each quantity stored as one
+column (i.e., one NumPy array). Tables are stored within sidecar files,
+whose paths are those of the relevant program files with the suffix
+`.table.npz` appended, so that programs can be selected by any of
+these quantities without reading or parsing any program strings, e.g.,
+
+    table = ProgramTable.load(table_path(path))
+    indices = table.query(size=(100, 200), aq=(4, None))
+    with CorpusReader(path) as reader:
+        programs = reader.read_indices(indices)
+
+The structural hash of a program depends only on its opcodes (in
+pre-order), and thus not on the values of any constants.
+"""
+import hashlib
+import re
+
+import numpy as np
+
+from .index import CorpusReader
+
+# Pattern for the names of nodes within a prefix program string.
+_token = re.compile(r'[^\s(),]+')
+
+def table_path(path):
+    """Return path of table file for program file."""
+    return f'{path}.table.npz'
+
+def _hash(opcodes):
+    """Return 64-bit structural hash of array of opcodes."""
+    return int.from_bytes(hashlib.blake2b(
+        opcodes.astype('<u2').tobytes(), digest_size=8).digest(), 'little')
+
+def _depth(opcodes, arities):
+    """Return depth of program given by pre-order opcodes."""
+    # Stack containing the number of outstanding children of every
+    # function node along the current path.
+    stack = []
+    depth = 0
+    for opcode in opcodes:
+        while stack and stack[-1] == 0:
+            stack.pop()
+        if len(stack) > depth:
+            depth = len(stack)
+        if stack:
+            stack[-1] -= 1
+        if arities[opcode] > 0:
+            stack.append(arities[opcode])
+    return depth
+
+class ProgramTable:
+    """Class for columnar table of program properties.
+
+    Keyword arguments:
+    names -- Names of opcodes, where the name of the constant opcode
+        is 'constant' and that of the null opcode is 'null'.
+    bins, sizes, depths, constants, hashes -- Arrays containing the
+        relevant quantities for each program.
+    histogram -- Two-dimensional array, such that `histogram[i, k]` is
+        the number of nodes with opcode `k` within program `i`.
+    """
+    __slots__ = ('names', 'bins', 'sizes', 'depths', 'constants', 'hashes',
+        'histogram')
+
+    def __init__(self, names, bins, sizes, depths, constants, hashes,
+        histogram):
+        self.names = tuple(names)
+        self.bins = np.asarray(bins, dtype=np.uint32)
+        self.sizes = np.asarray(sizes, dtype=np.uint32)
+        self.depths = np.asarray(depths, dtype=np.uint16)
+        self.constants = np.asarray(constants, dtype=np.uint32)
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        histogram = np.asarray(histogram)
+        self.histogram = histogram.astype(
+            np.min_scalar_type(histogram.max(initial=0)))
+
+    def __len__(self):
+        """Return the number of programs."""
+        return len(self.sizes)
+
+    @staticmethod
+    def _names(ps):
+        """Return names of opcodes for primitive set."""
+        return tuple('null' if i == 0 else 'constant' if name is None
+            else name for i, name in enumerate(ps.names))
+
+    @staticmethod
+    def _from_opcodes(names, arities, bins):
+        """Construct table from lists of pre-order opcodes, per bin."""
+        columns = {k : [] for k in ProgramTable.__slots__[1:]}
+        constant_opcode = names.index('constant')
+        for j, program_bin in enumerate(bins):
+            for opcodes in program_bin:
+                opcodes = np.asarray(opcodes, dtype=np.intp)
+                histogram = np.bincount(opcodes, minlength=len(names))
+                columns['bins'].append(j)
+                columns['sizes'].append(len(opcodes))
+                columns['depths'].append(_depth(opcodes.tolist(), arities))
+                columns['constants'].append(histogram[constant_opcode])
+                columns['hashes'].append(_hash(opcodes))
+                columns['histogram'].append(histogram)
+        histogram = columns.pop('histogram')
+        histogram = (np.array(histogram) if histogram 
+            else np.zeros((0, len(names)), dtype=np.intp))
+        return ProgramTable(names, histogram=histogram, **columns)
+
+    @staticmethod
+    def from_programs(bins, primitive_set):
+        """Construct table from list of program bins."""
+        ps = primitive_set.freeze()
+        return ProgramTable._from_opcodes(ProgramTable._names(ps),
+            ps.arities, ([[node.opcode for node in program]
+                for program in program_bin] for program_bin in bins))
+
+    @staticmethod
+    def from_file(path, primitive_set):
+        """Construct table from program file in prefix notation.
+
+        Program strings are tokenized, but not parsed into programs.
+        """
+        ps = primitive_set.freeze()
+        opcodes = ps.opcodes
+        constant_opcode = ps.constant_opcode
+        with CorpusReader(path) as reader:
+            bins = ([[[opcodes.get(name, constant_opcode)
+                for name in _token.findall(s)] for s in reader.iter_bin(j)]
+                    for j in range(reader.n_bins)])
+            return ProgramTable._from_opcodes(
+                ProgramTable._names(ps), ps.arities, bins)
+
+    def save(self, path):
+        """Write table to file."""
+        np.savez(path, names=np.array(self.names), bins=self.bins,
+            sizes=self.sizes, depths=self.depths, constants=self.constants,
+            hashes=self.hashes, histogram=self.histogram)
+
+    @staticmethod
+    def load(path):
+        """Read table from file."""
+        with np.load(path) as f:
+            return ProgramTable(f['names'].tolist(), f['bins'], f['sizes'],
+                f['depths'], f['constants'], f['hashes'], f['histogram'])
+
+    def count(self, name):
+        """Return number of nodes with the given name, for each program."""
+        try:
+            return self.histogram[:, self.names.index(name)]
+        except ValueError:
+            raise ValueError(f'Value provided for argument `name`, '
+                             f'`{name}`, is invalid.') from None
+
+    def mask(self, bin=None, size=None, depth=None, constants=None,
+        **counts):
+        """Return Boolean mask of programs satisfying all conditions.
+
+        Each condition is given as an integer, for an exact value, or as
+        a pair `(low, high)` of inclusive bounds, either of which may be
+        `None`. Conditions on the number of nodes with some name (e.g.,
+        `aq=(2, None)` for at least two `aq` nodes) are given as extra
+        keyword arguments.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        columns = [(self.bins, bin), (self.sizes, size),
+            (self.depths, depth), (self.constants, constants)]
+        columns += [(self.count(name), c) for name, c in counts.items()]
+        for column, condition in columns:
+            if condition is None:
+                continue
+            low, high = (condition if isinstance(condition, tuple)
+                else (condition, condition))
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        return mask
+
+    def query(self, bin=None, size=None, depth=None, constants=None,
+        **counts):
+        """Return indices of programs satisfying all conditions.
+
+        See the `mask` method.
+        """
+        return np.flatnonzero(
+            self.mask(bin, size, depth, constants, **counts))
+
+    def unique(self, indices=None):
+        """Return indices of programs with distinct structural hashes.
+
+        If `indices` is given, only the relevant programs are considered.
+        For each hash, the index of the first relevant program is kept.
+        """
+        indices = np.arange(len(self)) if indices is None else np.asarray(
+            indices)
+        _, first = np.unique(self.hashes[indices], return_index=True)
+        return indices[np.sort(first)]
@@ -0,0 +1,183 @@
+"""Batch compilation of programs into tree configuration tables.
+
+The `Tree.machine_code` method compiles one program into ragged nested
+lists, with one list of windows per terminal node and per function node
+of a compacted tree. This module compiles any number of programs, in
+parallel worker processes, into dense padded arrays:
+terminal_sel -- Array of shape `(n_programs, W_t, T)`, such that
+    `terminal_sel[p, w, k]` is the terminal select value of window `w`
+    for terminal node `k` of program `p`, where `T` is the number of
+    terminal nodes and `W_t` is the maximum number of terminal windows.
+constants -- Array of shape `(n_programs, W_t, T)` containing the
+    relevant constant values, in single precision.
+function_sel -- Array of shape `(n_programs, W_f, F)`, such that
+    `function_sel[p, w, k]` is the function select value of window `w`
+    for function node `k`, where `F` is the number of function nodes and
+    `W_f` is the maximum number of windows of any function node.
+terminal_windows -- Array containing the number of terminal windows of
+    each program (which is the same for every terminal node).
+function_windows -- Array of shape `(n_programs, F)` containing the
+    number of windows of each function node of each program.
+Elements beyond the relevant numbers of windows contain -1, as do unused
+elements within windows (as for `Tree.machine_code`). Programs that are
+too large or too deep for the tree have no windows, and are marked as
+invalid.
+
+Compiled programs are written to uncompressed `.npz` files, along with
+the tree configuration, the version of the primitive set, and the bin
+of each program.
+"""
+import os
+
+import numpy as np
+from pathos.pools import ProcessPool
+
+def _pad(arrays, shape, fill, dtype):
+    """Return arrays stacked along a new first axis, with padding."""
+    out = np.full((len(arrays),) + shape, fill, dtype=dtype)
+    for i, a in enumerate(arrays):
+        out[(i,) + tuple(slice(0, n) for n in a.shape)] = a
+    return out
+
+def _compile_chunk(tree, programs):
+    """Return dictionary of padded arrays for list of programs."""
+    n_t, n_f = tree.n_terminal_nodes(), tree.n_function_nodes()
+    terminal_sel, constants, function_sel = [], [], []
+    function_windows = np.zeros((len(programs), n_f), dtype=np.uint16)
+    valid = np.ones(len(programs), dtype=bool)
+    for i, program in enumerate(programs):
+        if len(program) > tree.max_size() or program.depth > tree.d:
+            valid[i] = False
+            terminal_sel.append(np.zeros((0, n_t)))
+            constants.append(np.zeros((0, n_t)))
+            function_sel.append(np.zeros((0, n_f)))
+            function_windows[i] = 0
+            continue
+        t, c, f = tree.machine_code(program)
+        # All terminal nodes have the same number of windows.
+        terminal_sel.append(np.array(t).T)
+        constants.append(np.array(c, dtype=np.float64).T)
+        function_windows[i] = [len(w) for w in f]
+        windows = _pad([np.array(w) for w in f],
+            (int(function_windows[i].max()),), -1, np.int16)
+        function_sel.append(windows.T)
+    w_t = max((len(t) for t in terminal_sel), default=0)
+    w_f = max((len(f) for f in function_sel), default=0)
+    with np.errstate(over='ignore'):
+        # Constants that overflow single precision become infinities.
+        constants = _pad(constants, (w_t, n_t), -1, np.float64).astype(
+            np.float32)
+    return {
+        'terminal_sel' : _pad(terminal_sel, (w_t, n_t), -1, np.int16),
+        'constants' : constants,
+        'function_sel' : _pad(function_sel, (w_f, n_f), -1, np.int16),
+        'terminal_windows' : np.array([len(t) for t in terminal_sel],
+            dtype=np.uint16),
+        'function_windows' : function_windows,
+        'valid' : valid}
+
+class CompiledPrograms:
+    """Class for dense tree configuration tables of many programs.
+
+    See the module docstring for the meaning of each array. The array
+    `bins` contains the bin index of each program, and `config` is a
+    dictionary containing the tree configuration (`m`, `d`, and `d_p`)
+    and the version of the primitive set.
+    """
+    __slots__ = ('terminal_sel', 'constants', 'function_sel',
+        'terminal_windows', 'function_windows', 'valid', 'bins', 'config')
+
+    def __init__(self, terminal_sel, constants, function_sel,
+        terminal_windows, function_windows, valid, bins, config):
+        self.terminal_sel = terminal_sel
+        self.constants = constants
+        self.function_sel = function_sel
+        self.terminal_windows = terminal_windows
+        self.function_windows = function_windows
+        self.valid = valid
+        self.bins = bins
+        self.config = config
+
+    def __len__(self):
+        """Return the number of programs."""
+        return len(self.valid)
+
+    def machine_code(self, i):
+        """Return nested lists for program `i`, as for `Tree.machine_code`.
+
+        Constants are given in single precision.
+        """
+        w_t = int(self.terminal_windows[i])
+        return ([self.terminal_sel[i, :w_t, k].tolist()
+                for k in range(self.terminal_sel.shape[2])],
+            [self.constants[i, :w_t, k].tolist()
+                for k in range(self.constants.shape[2])],
+            [self.function_sel[i, :w, k].tolist() for k, w in enumerate(
+                self.function_windows[i].tolist())])
+
+    def save(self, path):
+        """Write compiled programs to uncompressed `.npz` file."""
+        np.savez(path, **{k : getattr(self, k)
+            for k in self.__slots__[:-1]}, **{f'config_{k}' : v
+                for k, v in self.config.items()})
+
+    @staticmethod
+    def load(path):
+        """Read compiled programs from `.npz` file."""
+        with np.load(path) as f:
+            config = {k[len('config_'):] : f[k].item()
+                for k in f.files if k.startswith('config_')}
+            return CompiledPrograms(*(f[k]
+                for k in CompiledPrograms.__slots__[:-1]), config)
+
+def compile_programs(programs, tree, bins=None, n_threads=1, chunk_size=64):
+    """Compile list of programs for the given `Tree` object.
+
+    Chunks of `chunk_size` programs are compiled by worker processes,
+    based on the `n_threads` parameter. The look-up tables of the tree
+    (see the `Tree.prepare` method) are computed before the worker
+    processes are forked, so that every worker process inherits them.
+    """
+    if n_threads == -1:
+        # Use all available threads.
+        n_threads = os.cpu_count()
+    chunks = [programs[i : i + chunk_size]
+        for i in range(0, len(programs), chunk_size)]
+    if n_threads == 1:
+        results = [_compile_chunk(tree, chunk) for chunk in chunks]
+    else:
+        tree.prepare()
+        with ProcessPool(n_threads) as pool:
+            # Since pathos reuses pools, any existing worker processes
+            # (i.e., forked before the tables existed) are replaced.
+            pool.clear()
+            results = pool.map(_compile_chunk, [tree] * len(chunks), chunks)
+
+    # Pad the arrays of all chunks to the same numbers of windows.
+    n_t, n_f = tree.n_terminal_nodes(), tree.n_function_nodes()
+    w_t = max((r['terminal_sel'].shape[1] for r in results), default=0)
+    w_f = max((r['function_sel'].shape[1] for r in results), default=0)
+    pad = lambda k, shape, fill, dtype : np.concatenate([_pad(r[k], shape,
+        fill, dtype) for r in results]) if results else np.full(
+            (0,) + shape, fill, dtype=dtype)
+    ps = tree.primitive_set.freeze()
+    return CompiledPrograms(
+        pad('terminal_sel', (w_t, n_t), -1, np.int16),
+        pad('constants', (w_t, n_t), -1, np.float32),
+        pad('function_sel', (w_f, n_f), -1, np.int16),
+        np.concatenate([r['terminal_windows'] for r in results]
+            or [np.zeros(0, dtype=np.uint16)]),
+        np.concatenate([r['function_windows'] for r in results]
+            or [np.zeros((0, n_f), dtype=np.uint16)]),
+        np.concatenate([r['valid'] for r in results]
+            or [np.zeros(0, dtype=bool)]),
+        np.zeros(len(programs), dtype=np.uint32) if bins is None
+            else np.asarray(bins, dtype=np.uint32),
+        {'m' : tree.m, 'd' : tree.d, 'd_p' : tree.d_p,
+            'version' : ps.version})
+
+def compile_corpus(bins, tree, n_threads=1, chunk_size=64):
+    """Compile list of program bins for the given `Tree` object."""
+    programs = [program for program_bin in bins for program in program_bin]
+    indices = np.repeat(np.arange(len(bins)), [len(b) for b in bins])
+    return compile_programs(programs, tree, indices, n_threads, chunk_size)
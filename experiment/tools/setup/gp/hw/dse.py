@@ -0,0 +1,158 @@
+"""Design-space exploration of compacted tree configurations.
+
+Each configuration of a compacted tree (i.e., program depth `d` and
+parallel depth `d_p`, where the ary-ness `m` is that of the primitive
+set) trades area against the number of windows needed per program. A
+sweep compiles a sample of programs for every configuration, and
+aggregates the following metrics:
+area -- Number of function and terminal nodes of the tree.
+coverage -- Fraction of sampled programs that fit within the tree.
+windows -- Mean number of parallel windows per valid program.
+waste -- Fraction of the node slots within the windows of valid
+    programs that are unused or bypassed (i.e., padding).
+cycles -- Mean number of cycles per valid program, as predicted by a
+    `gp.hw.performance.CycleModel` object.
+Compiled samples are cached within a directory, as `.npz` files that
+are specific to the configuration, the primitive set version, and the
+sampled programs and their bins (by way of a digest of their prefix
+strings and bin indices).
+"""
+import hashlib
+import os
+
+import numpy as np
+from pathos.pools import ProcessPool
+
+from gp.core.serialization import dumps
+from .compiler import CompiledPrograms, compile_programs
+from .performance import CycleModel
+from .tree import Tree
+
+# Metrics of each configuration, and whether each is to be minimized
+# (1) or maximized (-1) by Pareto-optimal configurations.
+metrics = {
+    'area' : 1,
+    'coverage' : -1,
+    'windows' : 1,
+    'waste' : 1,
+    'cycles' : 1,
+}
+
+def sample(bins, n_programs, seed=None):
+    """Return programs sampled from each bin, along with bin indices.
+
+    At most `n_programs` programs are sampled, without replacement,
+    from each bin of the list `bins`.
+    """
+    rng = np.random.default_rng(seed)
+    programs, indices = [], []
+    for j, program_bin in enumerate(bins):
+        k = min(n_programs, len(program_bin))
+        for i in sorted(rng.choice(len(program_bin), k, replace=False)):
+            programs.append(program_bin[i])
+            indices.append(j)
+    return programs, indices
+
+def _digest(programs, bins):
+    """Return hexadecimal digest of programs and their bin indices."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update('\n'.join(dumps(program) for program in programs).encode())
+    if bins is not None:
+        h.update(np.asarray(bins, dtype='<u4').tobytes())
+    return h.hexdigest()
+
+def _compile(tree, programs, bins, cache_dir):
+    """Return compiled programs, read from or written to cache."""
+    if cache_dir is None:
+        return compile_programs(programs, tree, bins)
+    ps = tree.primitive_set.freeze()
+    path = (f'{cache_dir}/{ps.version}_d{tree.d}_p{tree.d_p}_'
+            f'{_digest(programs, bins)}.npz')
+    if os.path.exists(path):
+        return CompiledPrograms.load(path)
+    compiled = compile_programs(programs, tree, bins)
+    compiled.save(path)
+    return compiled
+
+def evaluate(tree, programs, bins=None, model=CycleModel(), nfc=1,
+    cache_dir=None):
+    """Return dictionary of metrics for the given `Tree` object.
+
+    See the module docstring for the meaning of each metric.
+    """
+    compiled = _compile(tree, programs, bins, cache_dir)
+    valid = compiled.valid
+    sizes = np.array([len(p) for p in programs])[valid]
+    windows = compiled.terminal_windows[valid].astype(np.int64)
+    # Node slots within the windows of each program, and those in use.
+    slots = (windows * tree.n_terminal_nodes()
+        + compiled.function_windows[valid].sum(axis=1, dtype=np.int64))
+    used = ((compiled.terminal_sel[valid] >= 0).sum(axis=(1, 2))
+        + (compiled.function_sel[valid] > 0).sum(axis=(1, 2)))
+    return {
+        'd' : tree.d,
+        'd_p' : tree.d_p,
+        'm' : tree.m,
+        'area' : tree.n_function_nodes() + tree.n_terminal_nodes(),
+        'coverage' : float(valid.mean()) if len(valid) else 0.0,
+        'windows' : float(windows.mean()) if len(windows) else np.inf,
+        'waste' : float(1 - used.sum() / slots.sum()) if len(slots)
+            else np.inf,
+        'cycles' : float(model.cycles(sizes, windows, nfc).mean())
+            if len(sizes) else np.inf,
+    }
+
+def pareto(rows, keys=tuple(metrics)):
+    """Return mask of Pareto-optimal rows, with respect to `keys`.
+
+    A row is Pareto-optimal if no other row is at least as good for
+    every metric and strictly better for some metric.
+    """
+    if not rows:
+        return np.zeros(0, dtype=bool)
+    values = np.array([[metrics[k] * r[k] for k in keys] for r in rows])
+    dominated = np.array([np.any(np.all(values <= v, axis=1)
+        & np.any(values < v, axis=1)) for v in values])
+    return ~dominated
+
+def sweep(primitive_set, programs, configs, bins=None, model=CycleModel(),
+    nfc=1, cache_dir=None, n_threads=1):
+    """Return list of metric dictionaries for each `(d, d_p)` config.
+
+    Configurations are evaluated by worker processes, based on the
+    `n_threads` parameter, which inherit the look-up tables of every
+    tree (see the `Tree.prepare` method), and each dictionary contains
+    the additional key `pareto`, denoting whether the configuration is
+    Pareto-optimal.
+    """
+    if n_threads == -1:
+        # Use all available threads.
+        n_threads = os.cpu_count()
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    trees = [Tree(primitive_set, d, d_p) for d, d_p in configs]
+    args = lambda x : [x] * len(trees)
+    if n_threads == 1:
+        rows = list(map(evaluate, trees, args(programs), args(bins),
+            args(model), args(nfc), args(cache_dir)))
+    else:
+        for tree in trees:
+            tree.prepare()
+        with ProcessPool(n_threads) as pool:
+            # Since pathos reuses pools, any existing worker processes
+            # (i.e., forked before the tables existed) are replaced.
+            pool.clear()
+            rows = pool.map(evaluate, trees, args(programs), args(bins),
+                args(model), args(nfc), args(cache_dir))
+    for row, optimal in zip(rows, pareto(rows).tolist()):
+        row['pareto'] = optimal
+    return rows
+
+def report(rows):
+    """Return CSV text of the rows returned by `sweep`."""
+    keys = ('d', 'd_p', 'm') + tuple(metrics) + ('pareto',)
+    lines = [','.join(keys)]
+    for row in rows:
+        lines.append(','.join(f'{row[k]:.6g}' if isinstance(row[k], float)
+            else str(int(row[k])) for k in keys))
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,171 @@
+"""Functional emulation of the compacted FPGA program tree.
+
+The emulator executes the terminal select, constant, and function select
+windows produced by `Tree.machine_code` (or by the `gp.hw.compiler`
+module) over any number of fitness cases, in single precision, as the
+accelerator would:
+- The parallel tree (i.e., the full `m`-ary function tree of depth `d_p`,
+  along with its terminal nodes) evaluates one window at a time. Within
+  each window, every terminal node selects a constant (select value 0) or
+  a variable (select value `k > 0`, for variable `k - 1`), and every
+  function node, level by level, applies its function to its children,
+  bypasses its leftmost child (select value 0), or is unused (-1).
+- Each node of the sequential tree (i.e., the chain of function nodes
+  above the parallel tree) consumes one of its windows whenever it is
+  evaluated. A bypassed node passes on the result of its child, whereas
+  a node with function `f` of arity `a` evaluates its child `a` times in
+  succession, where every evaluation after the first begins a new window
+  at the child, and applies `f` to the results.
+Every evaluation of the root of the parallel tree thus consumes the
+next window of the parallel tree and its terminal nodes.
+
+Within each level of the parallel tree, function nodes are grouped by
+function, so that each function is applied once per level, to all of
+the relevant nodes and fitness cases at once.
+"""
+import numpy as np
+
+from gp.core.evaluation import vectorized
+from .tree import Tree
+
+class Emulator:
+    """Class for functional emulator of a compacted program tree."""
+    __slots__ = ('tree', 'primitive_set', 'levels', 'children', 'n_s')
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.primitive_set = tree.primitive_set.freeze()
+        m, d_p = tree.m, tree.d_p
+        # Number of sequential function nodes, which is also the index
+        # of the root of the parallel tree.
+        self.n_s = tree.d_s + 1
+        depth, first_terminal = Tree._descend_all(m, d_p)
+        index = np.arange(len(depth))
+        # Indices of the parallel function nodes at each depth (i.e.,
+        # level), from the leaves upward, relative to the parallel root.
+        self.levels = [index[depth == d_] for d_ in range(d_p + 1)]
+        # Indices of the children of each parallel function node, where
+        # the children of leaf nodes are terminal nodes.
+        self.children = [np.stack([nodes + 1 + k * Tree._n_nodes(m, d_ - 1)
+            for k in range(m)], axis=1) if d_ > 0 else np.stack(
+                [first_terminal[nodes] + k for k in range(m)], axis=1)
+                    for d_, nodes in enumerate(self.levels)]
+
+    def _terminals(self, terminal_sel, constants, X):
+        """Return values of all terminal nodes for one window."""
+        sel = np.asarray(terminal_sel)
+        values = X[:, np.maximum(sel, 1) - 1].T.copy()
+        values[sel == 0] = np.asarray(constants, dtype=np.float32)[
+            sel == 0, None]
+        values[sel < 0] = 0
+        return values
+
+    def _parallel(self, terminal_sel, constants, sel, X):
+        """Return outputs of all parallel function nodes for one window.
+
+        The array `sel` contains the function select values of the
+        parallel function nodes only, and the output of the parallel
+        tree is the first row of the result.
+        """
+        ps = self.primitive_set
+        inputs = self._terminals(terminal_sel, constants, X)
+        values = np.zeros((len(sel), len(X)), dtype=np.float32)
+        for nodes, children in zip(self.levels, self.children):
+            out = np.zeros((len(nodes), len(X)), dtype=np.float32)
+            codes = sel[nodes]
+            # Bypassed nodes pass on their leftmost child.
+            bypass = codes == 0
+            out[bypass] = inputs[children[bypass, 0]]
+            for opcode in np.unique(codes[codes > 0]).tolist():
+                mask = codes == opcode
+                args = [inputs[children[mask, k]]
+                    for k in range(ps.arities[opcode])]
+                out[mask] = ps.vector_kernels[opcode](*args)
+            values[nodes] = out
+            inputs = values
+        return values
+
+    def run(self, terminal_sel, constants, function_sel, X):
+        """Return outputs of the program given by its windows.
+
+        The windows are given as by `Tree.machine_code`, i.e., as lists
+        of windows per terminal node and per function node, and `X` is
+        a two-dimensional array whose `j`-th column provides the values
+        of the `j`-th variable.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        # Select values and constants of each window of the parallel
+        # tree and its terminal nodes.
+        parallel = np.array(function_sel[self.n_s:]).T
+        terminals = np.array(terminal_sel).T
+        constants = np.array(constants, dtype=np.float64).T
+        # Index of the next window of each sequential node, and of the
+        # next window of the parallel tree.
+        pointers = [0] * (self.n_s + 1)
+        ps = self.primitive_set
+
+        def evaluate(k):
+            """Evaluate function node `k` of the sequential tree."""
+            if k == self.n_s:
+                w = pointers[k]
+                pointers[k] += 1
+                with np.errstate(over='ignore'):
+                    c = constants[w].astype(np.float32)
+                return self._parallel(terminals[w], c, parallel[w], X)[0]
+            code = function_sel[k][pointers[k]]
+            pointers[k] += 1
+            if code <= 0:
+                return evaluate(k + 1)
+            args = [evaluate(k + 1) for _ in range(ps.arities[code])]
+            return ps.vector_kernels[code](*args)
+
+        return evaluate(0)
+
+    def run_compiled(self, compiled, i, X):
+        """Return outputs of program `i` of a `CompiledPrograms` object."""
+        return self.run(*compiled.machine_code(i), X)
+
+    def run_all(self, compiled, X):
+        """Return outputs of all programs of a `CompiledPrograms` object.
+
+        The result is an array of shape `(n_programs, n_fitness_cases)`,
+        whose rows for invalid (i.e., uncompiled) programs contain NaN.
+        """
+        out = np.full((len(compiled), len(X)), np.nan, dtype=np.float32)
+        for i in np.flatnonzero(compiled.valid).tolist():
+            out[i] = self.run_compiled(compiled, i, X)
+        return out
+
+    def run_packed(self, packed, X):
+        """Return outputs of all programs of a `PackedPrograms` object.
+
+        The result is an array of shape `(n_programs, n_fitness_cases)`,
+        whose rows for programs that are not packed contain NaN.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        out = np.full((len(packed), len(X)), np.nan, dtype=np.float32)
+        for w in range(packed.n_windows):
+            on = np.flatnonzero(packed.routes[:, 0] == w)
+            values = self._parallel(packed.terminal_sel[w],
+                packed.constants[w], packed.function_sel[w, self.n_s:], X)
+            out[on] = values[packed.routes[on, 1] - self.n_s]
+        return out
+
+def validate(programs, tree, X):
+    """Return indices of programs whose emulated outputs are invalid.
+
+    The outputs of each program, as emulated for the given `Tree` object,
+    must be identical to those of `gp.core.evaluation.vectorized`, given
+    the same inputs, in single precision. Since both apply the same
+    kernels to the same operands, any difference denotes an error in
+    compilation or emulation, rather than in rounding.
+    """
+    emulator = Emulator(tree)
+    X = np.asarray(X, dtype=np.float32)
+    invalid = []
+    for i, program in enumerate(programs):
+        y = emulator.run(*tree.machine_code(program), X)
+        t = vectorized(program, X, tree.primitive_set, np.float32)
+        if not np.array_equal(y, t, equal_nan=True):
+            invalid.append(i)
+    return invalid
@@ -0,0 +1,173 @@
+"""Minimal-width, bit-packed encoding of program memory images.
+
+Program memory images (see the module `gp.hw.memory`) use fixed field
+widths that are multiples of four bits, and every word has a value field,
+although only constants use it. Here, the image is instead split into two
+streams:
+instructions -- The opcode and depth of every word (including the null
+    word after each program), packed into `w_opcode + w_depth` bits per
+    word, from least to most significant bit of each byte, where the
+    depth occupies the least significant bits of each word.
+constants -- The single-precision IEEE-754 bits of the value of every
+    constant node, in program order, packed into `w_constant = 32` bits
+    per constant, or, for an image with a constant pool, the index of
+    the value of every constant node within the pool, packed into the
+    fewest bits `w_constant` that can represent every index.
+pool -- For an image with a constant pool, the distinct single-precision
+    bits of all constant values, in ascending order. Since values are
+    deduplicated after conversion to single precision, constants that
+    round to the same value share one element of the pool.
+The widths are the fewest bits that can represent every opcode of the
+frozen primitive set and every depth up to the depth limit `d`. Streams
+are packed as for the instruction stream.
+
+Encoded images are serialized as a header of six little-endian 32-bit
+unsigned integers (`w_opcode`, `w_depth`, `w_constant`, the number of
+words, the number of constants, and the size of the pool), followed by
+the pool, in little-endian byte order, and then the instruction and
+constant streams.
+"""
+import numpy as np
+
+from . import memory
+
+# Number of bytes in the header of a serialized image.
+_header_size = 24
+
+def widths(primitive_set, d):
+    """Return minimal opcode and depth widths, in bits.
+
+    The widths suffice for the opcodes of the given primitive set and
+    for programs of depth (i.e., height) at most `d`.
+    """
+    ps = primitive_set.freeze()
+    return max(len(ps.names) - 1, 1).bit_length(), max(d, 1).bit_length()
+
+def _pack_bits(values, w):
+    """Return bytes packing the `w` least significant bits of values."""
+    bits = (np.asarray(values, dtype=np.uint64)[:, None]
+        >> np.arange(w, dtype=np.uint64)) & np.uint64(1)
+    return np.packbits(bits.astype(np.uint8).ravel(), bitorder='little')
+
+def _unpack_bits(data, w, n):
+    """Return array of `n` values of `w` bits, as packed by `_pack_bits`."""
+    bits = np.unpackbits(data, count=n * w, bitorder='little').reshape(n, w)
+    return (bits.astype(np.uint64) << np.arange(w, dtype=np.uint64)).sum(
+        axis=1, dtype=np.uint64)
+
+class EncodedImage:
+    """Class for bit-packed program memory image.
+
+    The arrays `instructions` and `constants` contain the bytes of the
+    instruction and constant streams, and the array `pool` contains the
+    constant pool, which is empty for images without a pool (see the
+    module docstring).
+    """
+    __slots__ = ('instructions', 'constants', 'pool', 'n_words',
+        'n_constants', 'w_opcode', 'w_depth', 'w_constant')
+
+    def __init__(self, instructions, constants, pool, n_words, n_constants,
+        w_opcode, w_depth, w_constant):
+        self.instructions = instructions
+        self.constants = constants
+        self.pool = pool
+        self.n_words = n_words
+        self.n_constants = n_constants
+        self.w_opcode = w_opcode
+        self.w_depth = w_depth
+        self.w_constant = w_constant
+
+    def __len__(self):
+        """Return the number of words."""
+        return self.n_words
+
+    @property
+    def nbytes(self):
+        """Return the number of bytes of the serialized image."""
+        return (_header_size + 4 * len(self.pool) + len(self.instructions)
+            + len(self.constants))
+
+    def values(self):
+        """Return array of single-precision bits of each constant."""
+        values = _unpack_bits(self.constants, self.w_constant,
+            self.n_constants)
+        if len(self.pool):
+            values = self.pool[values.astype(np.intp)]
+        return values.astype(np.uint32)
+
+    def dumps(self):
+        """Return bytes of serialized image."""
+        header = np.array([self.w_opcode, self.w_depth, self.w_constant,
+            self.n_words, self.n_constants, len(self.pool)], dtype='<u4')
+        return (header.tobytes() + self.pool.astype('<u4').tobytes()
+            + self.instructions.tobytes() + self.constants.tobytes())
+
+    @staticmethod
+    def loads(data):
+        """Return image deserialized from bytes."""
+        w_opcode, w_depth, w_constant, n_words, n_constants, n_pool = (
+            np.frombuffer(data, dtype='<u4', count=6).tolist())
+        offsets = np.cumsum([_header_size, 4 * n_pool,
+            -(-n_words * (w_opcode + w_depth) // 8),
+            -(-n_constants * w_constant // 8)]).tolist()
+        pool, instructions, constants = (np.frombuffer(data, dtype=np.uint8,
+            count=stop - start, offset=start).copy()
+                for start, stop in zip(offsets[:-1], offsets[1:]))
+        return EncodedImage(instructions, constants, pool.view('<u4').astype(
+            np.uint32), n_words, n_constants, w_opcode, w_depth, w_constant)
+
+def encode(programs, primitive_set, d, pool=False):
+    """Return bit-packed image for programs with depth at most `d`.
+
+    The programs are given as for `gp.hw.memory.encode`. If `pool` is
+    true, the image has a constant pool (see the module docstring), and
+    if `pool` is `None`, the image has a constant pool only if the pool
+    makes the image smaller (i.e., if enough constants are duplicates).
+    """
+    w_opcode, w_depth = widths(primitive_set, d)
+    image = memory.encode(programs, 16, 16)
+    if len(image) and int(image['depth'].max()) >= 1 << w_depth:
+        raise ValueError(f'Value provided for argument `d`, `{d}`, '
+                         f'is invalid.')
+    words = ((image['opcode'].astype(np.uint64) << np.uint64(w_depth))
+        | image['depth'].astype(np.uint64))
+    constants = image['value'][
+        image['opcode'] == primitive_set.freeze().constant_opcode]
+    pooled = bool(pool)
+    if pool or pool is None:
+        values, indices = np.unique(constants, return_inverse=True)
+        w_index = max(len(values) - 1, 1).bit_length()
+        # Bytes of the pool and indices versus bytes of the values.
+        pooled = pooled or (4 * len(values)
+            + -(-len(constants) * w_index // 8) < 4 * len(constants))
+    if pooled:
+        pool, constants, w_constant = values, indices, w_index
+    else:
+        pool, w_constant = np.zeros(0, dtype=np.uint32), memory.w_value
+    return EncodedImage(_pack_bits(words, w_opcode + w_depth),
+        _pack_bits(constants, w_constant), pool.astype(np.uint32),
+        len(image), len(constants), w_opcode, w_depth, w_constant)
+
+def encode_bins(bins, primitive_set, d, pool=None):
+    """Return list of bit-packed images, one per bin of programs.
+
+    Each image has a constant pool of its own, depending on `pool` (as
+    for the `encode` function).
+    """
+    return [encode(programs, primitive_set, d, pool) for programs in bins]
+
+def decode(encoded, primitive_set, w_opcode=16, w_depth=16):
+    """Return program memory image (see `gp.hw.memory`) of bit-packed image.
+
+    The opcode and depth fields of the result have the given widths.
+    Since only constants have values within the bit-packed image, the
+    values of all other words are zero.
+    """
+    words = _unpack_bits(encoded.instructions,
+        encoded.w_opcode + encoded.w_depth, encoded.n_words)
+    image = np.zeros(len(words), dtype=memory.word_dtype(w_opcode, w_depth))
+    image['opcode'] = words >> np.uint64(encoded.w_depth)
+    image['depth'] = words & np.uint64((1 << encoded.w_depth) - 1)
+    image['value'][image['opcode'] == primitive_set.freeze(
+        ).constant_opcode] = encoded.values()
+    return image
@@ -0,0 +1,141 @@
+"""Bulk encoding of program memory images.
+
+A program memory image is a NumPy structured array with one element
+(i.e., word) per node, whose fields are the opcode, the depth, and the
+single-precision IEEE-754 bits of the value of the node, in that order,
+where each program is followed by a null word. An image thus contains
+the same words as the `machine_code` methods of `gp.hw.program.Program`
+objects (given the same widths), but it is built for a whole bin or
+corpus of programs at once, and it can be written in any of the
+following formats, as inferred from the file extension:
+.bin -- Raw words, each given by packing the fields (from most to least
+    significant bits) into an unsigned integer of 64 bits, which is
+    stored in little-endian byte order.
+.mem -- One word per line, in hexadecimal, without prefix, as read by
+    the Verilog `$readmemh` system task.
+.txt or .hex -- One word per line, in hexadecimal, with the prefix `0x`,
+    as written by the `machine_code` method (i.e., as for the
+    `program_memory.txt` files).
+Lines are separated by newlines, with no newline after the last word.
+"""
+import numpy as np
+
+from gp.core.batch import ProgramBatch
+
+# Width of the value field, in bits.
+w_value = 32
+
+# Image formats, specified by file extension.
+formats = {'.bin' : 'bin', '.mem' : 'mem', '.txt' : 'hex', '.hex' : 'hex'}
+
+# ASCII codes of hexadecimal digits.
+_digits = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+def _field_dtype(w):
+    """Return smallest unsigned integer type with at least `w` bits."""
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if np.iinfo(dtype).bits >= w:
+            return np.dtype(dtype)
+    raise ValueError(f'Value provided for width, `{w}`, is invalid.')
+
+def word_dtype(w_opcode=16, w_depth=16):
+    """Return structured data type for words with the given field widths."""
+    if w_opcode % 4 != 0 or w_depth % 4 != 0 or (
+        w_opcode + w_depth + w_value > 64):
+        raise ValueError(f'Values provided for arguments `w_opcode` and '
+                         f'`w_depth`, `{w_opcode}` and `{w_depth}`, are '
+                         f'invalid.')
+    return np.dtype([('opcode', _field_dtype(w_opcode)),
+        ('depth', _field_dtype(w_depth)), ('value', np.uint32)])
+
+def _value_bits(values):
+    """Return single-precision bits of array of values.
+
+    As for any IEEE-754 conversion, values that overflow single
+    precision are encoded as infinities.
+    """
+    with np.errstate(over='ignore'):
+        return np.asarray(values, dtype=np.float64).astype(
+            np.float32).view(np.uint32)
+
+def encode(programs, w_opcode=16, w_depth=16):
+    """Return program memory image for programs.
+
+    The programs are given as a list of `gp.hw.program.Program` objects
+    or as a `ProgramBatch` object (see the module `gp.core.batch`), in
+    which case no Python loop over nodes is needed. Opcodes and depths
+    are truncated to their least significant `w_opcode` and `w_depth`
+    bits, respectively.
+    """
+    if isinstance(programs, ProgramBatch):
+        opcodes, depths = programs.opcodes, programs.depths
+        values, lengths = programs.values, programs.lengths
+    else:
+        opcodes = [node.opcode for program in programs for node in program]
+        depths = [node.depth for program in programs for node in program]
+        values = [node.value for program in programs for node in program]
+        lengths = [len(program) for program in programs]
+    dtype = word_dtype(w_opcode, w_depth)
+    lengths = np.asarray(lengths, dtype=np.intp)
+
+    # Every program is followed by a null word.
+    image = np.zeros(len(opcodes) + len(lengths), dtype=dtype)
+    nodes = np.ones(len(image), dtype=bool)
+    nodes[np.cumsum(lengths + 1) - 1] = False
+    image['opcode'][nodes] = np.asarray(opcodes, dtype=np.uint64) & (
+        (1 << w_opcode) - 1)
+    image['depth'][nodes] = np.asarray(depths, dtype=np.uint64) & (
+        (1 << w_depth) - 1)
+    image['value'][nodes] = _value_bits(values)
+    return image
+
+def words(image, w_depth=16):
+    """Return array of packed (i.e., 64-bit unsigned integer) words."""
+    return ((image['opcode'].astype(np.uint64) << np.uint64(w_depth + w_value))
+        | (image['depth'].astype(np.uint64) << np.uint64(w_value))
+        | image['value'].astype(np.uint64))
+
+def _hex(image, w_opcode, w_depth, prefix):
+    """Return hexadecimal text for image, one word per line."""
+    n_digits = (w_opcode + w_depth + w_value) // 4
+    width = n_digits + (2 if prefix else 0) + 1
+    shifts = np.arange(4 * (n_digits - 1), -1, -4, dtype=np.uint64)
+    text = np.empty((len(image), width), dtype=np.uint8)
+    if prefix:
+        text[:, :2] = np.frombuffer(b'0x', dtype=np.uint8)
+    text[:, width - 1 - n_digits : width - 1] = _digits[
+        (words(image, w_depth)[:, None] >> shifts) & np.uint64(0xF)]
+    text[:, -1] = ord('\n')
+    return text.tobytes()[:-1]
+
+def image_format(path):
+    """Return format of image file, as inferred from its extension."""
+    for extension, format_ in formats.items():
+        if path.endswith(extension):
+            return format_
+    raise ValueError(f'Value provided for argument `path`, `{path}`, '
+                     f'is invalid.')
+
+def write(image, *paths, w_opcode=16, w_depth=16):
+    """Write program memory image to each of the given files.
+
+    The format of each file is inferred from its extension (see the
+    module docstring). The widths must be those used to encode the
+    image, since hexadecimal words consist of exactly the relevant
+    number of digits.
+    """
+    for path in paths:
+        with open(path, 'wb') as f:
+            f.write(dumps(image, image_format(path), w_opcode, w_depth))
+
+def dumps(image, format_='hex', w_opcode=16, w_depth=16):
+    """Return bytes of program memory image in the given format.
+
+    The format is 'bin', 'mem', or 'hex' (see the module docstring).
+    """
+    if format_ == 'bin':
+        return words(image, w_depth).astype('<u8').tobytes()
+    elif format_ in ('mem', 'hex'):
+        return _hex(image, w_opcode, w_depth, prefix=format_ == 'hex')
+    raise ValueError(f'Value provided for argument `format_`, '
+                     f'`{format_}`, is invalid.')
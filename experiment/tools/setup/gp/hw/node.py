@@ -1,4 +1,5 @@
 """Extension for generic linear program node."""
+import math
 import struct
 
 from gp.core.math import clog
@@ -19,7 +20,13 @@ class Node(node.Node):
 
         # Exctract the single-precision IEEE-754 encoded value of 
         # `self.value`, and convert the encoded value into an integer.
-        value = struct.unpack("<I", struct.pack("<f", self.value))[0]
+        # (Values that overflow single precision are encoded as 
+        # infinities, as for any IEEE-754 conversion.)
+        try:
+            value = struct.unpack("<I", struct.pack("<f", self.value))[0]
+        except OverflowError:
+            value = struct.unpack(
+                "<I", struct.pack("<f", math.copysign(math.inf, self.value)))[0]
 
         # Calculate the number of digits needed to represent
         # the machine code in the relevant "form".
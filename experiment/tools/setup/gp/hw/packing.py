@@ -0,0 +1,162 @@
+"""Packing of several small programs into one window of a compacted tree.
+
+A program whose depth (i.e., height) is at most `d_p + 1` occupies a
+single window of the parallel tree of a compacted tree, and only the
+function nodes of one of its subtrees, of depth `max(h - 1, 0)` for a
+program of depth `h`, along with the relevant terminal nodes. Such
+programs are packed into disjoint subtrees of the parallel tree, so that
+one window evaluates several programs, and the output of each program
+is routed from the root of its subtree, rather than from the root of the
+compacted tree.
+
+Subtrees are allocated as for a buddy allocator: programs are placed in
+order of decreasing depth, and a free subtree that is larger than needed
+is split into its `m` child subtrees. Since the number of terminal nodes
+of each subtree is a power of `m`, no window is begun before every
+previous window is full.
+
+Packed programs are given by the arrays:
+terminal_sel -- Array of shape `(n_windows, T)` containing the terminal
+    select value of each terminal node within each window.
+constants -- Array of shape `(n_windows, T)` containing the relevant
+    constant values, in single precision.
+function_sel -- Array of shape `(n_windows, F)` containing the function
+    select value of each function node within each window.
+routes -- Array of shape `(n_programs, 2)`, such that `routes[i]`
+    contains the window of program `i` and the index of the function
+    node (as for `function_sel`) from which its output is routed.
+As for `Tree.machine_code`, unused elements contain -1, as do the routes
+of programs that are too deep to be packed.
+"""
+import numpy as np
+
+from .tree import Tree
+
+def _allocate(free, m, d):
+    """Return root of free subtree of depth `d`, or `None`.
+
+    The list `free` contains, for each depth, the indices of the roots
+    of free subtrees of the parallel tree of that depth, and the
+    smallest sufficient free subtree is split as needed.
+    """
+    for d_ in range(d, len(free)):
+        if free[d_]:
+            node = free[d_].pop()
+            while d_ > d:
+                # Keep the leftmost child subtree, and free the others,
+                # such that the leftmost of them is allocated next.
+                n_nodes = Tree._n_nodes(m, d_ - 1)
+                free[d_ - 1].extend(node + 1 + k * n_nodes
+                    for k in range(m - 1, 0, -1))
+                node += 1
+                d_ -= 1
+            return node
+    return None
+
+class PackedPrograms:
+    """Class for programs packed into windows of a compacted tree.
+
+    See the module docstring for the meaning of each array. The
+    dictionary `config` contains the tree configuration (`m`, `d`, and
+    `d_p`) and the version of the primitive set.
+    """
+    __slots__ = ('terminal_sel', 'constants', 'function_sel', 'routes',
+        'config')
+
+    def __init__(self, terminal_sel, constants, function_sel, routes,
+        config):
+        self.terminal_sel = terminal_sel
+        self.constants = constants
+        self.function_sel = function_sel
+        self.routes = routes
+        self.config = config
+
+    def __len__(self):
+        """Return the number of programs."""
+        return len(self.routes)
+
+    @property
+    def n_windows(self):
+        """Return the number of windows."""
+        return len(self.terminal_sel)
+
+    @property
+    def packed(self):
+        """Return mask of programs that are packed."""
+        return self.routes[:, 0] >= 0
+
+    def occupancy(self):
+        """Return occupancy of the parallel tree before and after packing.
+
+        Occupancy is the fraction of the parallel function nodes and
+        terminal nodes, over all windows, that are in use. Before
+        packing, each packed program occupies a window of its own.
+        """
+        n_s = self.config['d'] - self.config['d_p'] - 1
+        used = ((self.terminal_sel >= 0).sum()
+            + (self.function_sel[:, n_s:] > 0).sum())
+        n_nodes = self.terminal_sel.shape[1] + self.function_sel.shape[1] - n_s
+        return (float(used / (self.packed.sum() * n_nodes)) if used else 0.0,
+            float(used / (self.n_windows * n_nodes)) if used else 0.0)
+
+    def save(self, path):
+        """Write packed programs to uncompressed `.npz` file."""
+        np.savez(path, **{k : getattr(self, k)
+            for k in self.__slots__[:-1]}, **{f'config_{k}' : v
+                for k, v in self.config.items()})
+
+    @staticmethod
+    def load(path):
+        """Read packed programs from `.npz` file."""
+        with np.load(path) as f:
+            config = {k[len('config_'):] : f[k].item()
+                for k in f.files if k.startswith('config_')}
+            return PackedPrograms(*(f[k]
+                for k in PackedPrograms.__slots__[:-1]), config)
+
+def pack(programs, tree):
+    """Pack list of programs into windows of the given `Tree` object.
+
+    Programs that are too deep to be packed (i.e., those needing more
+    than one window) are left for `Tree.machine_code`, and their routes
+    contain -1.
+    """
+    m, d_p = tree.m, tree.d_p
+    n_s = tree.d_s + 1
+    n_t, n_f = tree.n_terminal_nodes(), tree.n_function_nodes()
+    _, first_terminal = Tree._descend_all(m, d_p)
+    heights = [program.depth for program in programs]
+    routes = np.full((len(programs), 2), -1, dtype=np.int32)
+    terminal_sel, constants, function_sel = [], [], []
+    free = None
+    for i in sorted((i for i, h in enumerate(heights) if h <= d_p + 1),
+        key=lambda i : -heights[i]):
+        d = max(heights[i] - 1, 0)
+        node = None if free is None else _allocate(free, m, d)
+        if node is None:
+            # Begin a new window, whose parallel tree is entirely free.
+            free = [[] for _ in range(d_p + 1)]
+            free[d_p].append(0)
+            terminal_sel.append(np.full(n_t, -1, dtype=np.int16))
+            constants.append(np.full(n_t, -1, dtype=np.float64))
+            function_sel.append(np.full(n_f, -1, dtype=np.int16))
+            node = _allocate(free, m, d)
+        # Compile the program for a tree consisting of the subtree only,
+        # whose nodes are contiguous within the parallel tree.
+        t, c, f = Tree(tree.primitive_set, d + 1, d).machine_code(programs[i])
+        k, j = n_s + node, int(first_terminal[node])
+        function_sel[-1][k : k + len(f)] = [w[0] for w in f]
+        terminal_sel[-1][j : j + len(t)] = [w[0] for w in t]
+        constants[-1][j : j + len(c)] = [w[0] for w in c]
+        routes[i] = (len(function_sel) - 1, k)
+    with np.errstate(over='ignore'):
+        # Constants that overflow single precision become infinities.
+        constants = np.array(constants, dtype=np.float64).reshape(
+            -1, n_t).astype(np.float32)
+    ps = tree.primitive_set.freeze()
+    return PackedPrograms(
+        np.array(terminal_sel, dtype=np.int16).reshape(-1, n_t),
+        constants,
+        np.array(function_sel, dtype=np.int16).reshape(-1, n_f),
+        routes,
+        {'m' : m, 'd' : tree.d, 'd_p' : d_p, 'version' : ps.version})
@@ -0,0 +1,161 @@
+"""Analytical cycle model of the FPGA accelerator.
+
+The number of clock cycles needed to evaluate a program is modeled as
+the larger of two overlapped (i.e., double-buffered) terms:
+transfer -- Loading the program memory words of the program, including
+    its null word, i.e., `transfer_overhead + word_cycles * (s + 1)` for
+    a program of size `s`.
+evaluation -- Streaming the fitness cases through the tree, once per
+    window, i.e., `w * (ceil(nfc / lanes) + pipeline_depth)` for a
+    program with `w` windows (see the module `gp.hw.compiler`) and
+    `nfc` fitness cases, where `lanes` fitness cases enter the tree
+    per cycle.
+
+The free parameters (i.e., `word_cycles`, `transfer_overhead`, and
+`pipeline_depth`) are fitted to measured runtime files, each of which
+contains the clock frequency, in MHz, on its first line, followed by the
+total number of cycles for each program bin, one per line. Given fitted
+parameters, the performance of hypothetical configurations (e.g., more
+lanes, or trees with fewer windows) is predicted by changing the other
+parameters or the windows.
+"""
+import numpy as np
+
+def read_runtimes(path):
+    """Return clock frequency, in Hz, and array of cycles per bin."""
+    with open(path) as f:
+        lines = f.read().split()
+    return float(lines[0]) * 1e6, np.array([int(n) for n in lines[1:]])
+
+class Observation:
+    """Class for measured runtimes of a corpus for some number of cases.
+
+    Keyword arguments:
+    sizes -- Array of program sizes.
+    windows -- Array containing the number of windows of each program.
+    bins -- Array containing the bin index of each program.
+    nfc -- Number of fitness cases.
+    frequency -- Clock frequency, in Hz.
+    cycles -- Array of measured cycles for each bin.
+    """
+    __slots__ = ('sizes', 'windows', 'bins', 'nfc', 'frequency', 'cycles')
+
+    def __init__(self, sizes, windows, bins, nfc, frequency, cycles):
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.windows = np.asarray(windows, dtype=np.int64)
+        self.bins = np.asarray(bins, dtype=np.intp)
+        self.nfc = nfc
+        self.frequency = frequency
+        self.cycles = np.asarray(cycles, dtype=np.float64)
+
+    def nodes(self):
+        """Return number of node evaluations for each bin."""
+        return self.nfc * np.bincount(self.bins, self.sizes,
+            minlength=len(self.cycles))
+
+class CycleModel:
+    """Class for analytical cycle model (see the module docstring)."""
+    __slots__ = ('lanes', 'pipeline_depth', 'word_cycles',
+        'transfer_overhead')
+
+    def __init__(self, lanes=1, pipeline_depth=0.0, word_cycles=1.0,
+        transfer_overhead=0.0):
+        self.lanes = lanes
+        self.pipeline_depth = pipeline_depth
+        self.word_cycles = word_cycles
+        self.transfer_overhead = transfer_overhead
+
+    def __repr__(self):
+        return (f'CycleModel(lanes={self.lanes!r}, '
+                f'pipeline_depth={self.pipeline_depth!r}, '
+                f'word_cycles={self.word_cycles!r}, '
+                f'transfer_overhead={self.transfer_overhead!r})')
+
+    def _terms(self, sizes, windows, nfc):
+        """Return transfer and evaluation cycles for each program."""
+        sizes, windows = np.asarray(sizes), np.asarray(windows)
+        transfer = self.transfer_overhead + self.word_cycles * (sizes + 1)
+        evaluation = windows * (-(-nfc // self.lanes) + self.pipeline_depth)
+        return transfer, evaluation
+
+    def cycles(self, sizes, windows, nfc):
+        """Return predicted cycles for each program."""
+        return np.maximum(*self._terms(sizes, windows, nfc))
+
+    def bin_cycles(self, observation):
+        """Return predicted cycles for each bin of an observation."""
+        o = observation
+        return np.bincount(o.bins, self.cycles(o.sizes, o.windows, o.nfc),
+            minlength=len(o.cycles))
+
+    def neps(self, observation):
+        """Return predicted and measured NEPS for each bin.
+
+        NEPS (i.e., node evaluations per second) is the number of nodes
+        within a bin times the number of fitness cases, divided by the
+        runtime of the bin.
+        """
+        o = observation
+        nodes = o.nodes()
+        return (nodes * o.frequency / self.bin_cycles(o),
+            nodes * o.frequency / o.cycles)
+
+    @staticmethod
+    def fit(observations, lanes=1, n_iterations=100):
+        """Return model fitted to observations, for the given lanes.
+
+        Parameters are fitted by least squares on the relative error
+        of the cycles of each bin. Since each program is dominated by
+        either its transfer or its evaluation term, the fit alternates
+        between assigning each program to its dominant term and solving
+        the resulting linear least-squares problem, until no assignment
+        changes.
+        """
+        model = CycleModel(lanes)
+        dominated = [None] * len(observations)
+        for _ in range(n_iterations):
+            rows, targets = [], []
+            changed = False
+            for k, o in enumerate(observations):
+                transfer, evaluation = model._terms(o.sizes, o.windows, o.nfc)
+                by_transfer = transfer >= evaluation
+                if dominated[k] is None or np.any(
+                    by_transfer != dominated[k]):
+                    changed = True
+                dominated[k] = by_transfer
+                n_cases = -(-o.nfc // lanes)
+                # Coefficients of (pipeline_depth, word_cycles,
+                # transfer_overhead), and the constant term, per program.
+                a = np.column_stack((np.where(by_transfer, 0, o.windows),
+                    np.where(by_transfer, o.sizes + 1, 0),
+                    by_transfer.astype(np.int64)))
+                b = np.where(by_transfer, 0, o.windows * n_cases)
+                A = np.stack([np.bincount(o.bins, a[:, j],
+                    minlength=len(o.cycles)) for j in range(3)], axis=1)
+                B = np.bincount(o.bins, b, minlength=len(o.cycles))
+                rows.append(A / o.cycles[:, None])
+                targets.append((o.cycles - B) / o.cycles)
+            if not changed:
+                break
+            theta = np.linalg.lstsq(np.concatenate(rows),
+                np.concatenate(targets), rcond=None)[0]
+            theta = np.maximum(theta, 0.0)
+            model = CycleModel(lanes, *theta.tolist())
+        return model
+
+def report(model, observations, names):
+    """Return CSV text of predicted and measured NEPS per bin.
+
+    Each observation is labeled by the relevant element of `names`.
+    """
+    lines = ['name,nfc,bin,predicted_cycles,measured_cycles,'
+             'predicted_neps,measured_neps,relative_error']
+    for name, o in zip(names, observations):
+        predicted = model.bin_cycles(o)
+        neps, measured_neps = model.neps(o)
+        for j in range(len(o.cycles)):
+            lines.append(f'{name},{o.nfc},{j},{predicted[j]:.0f},'
+                         f'{o.cycles[j]:.0f},{neps[j]:.6g},'
+                         f'{measured_neps[j]:.6g},'
+                         f'{neps[j] / measured_neps[j] - 1:.4f}')
+    return '\n'.join(lines) + '\n'
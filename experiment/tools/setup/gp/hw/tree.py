@@ -1,8 +1,32 @@
 """Program tree."""
+import numpy as np
+
 from gp.core.primitive_set import PrimitiveSet
 from .program import Program
 from .node import Node
 
+# Look-up tables of compacted trees, specified by ary-ness, depth, and 
+# parallel depth. Tables are computed once per process, and are inherited 
+# by worker processes that are forked after their computation.
+_tables = {}
+
+# The same look-up tables, as lists, for use within `Tree.machine_code`.
+_table_lists = {}
+
+# Maximum number of function nodes for which look-up tables are
+# materialized within `Tree.machine_code`.
+_max_table_size = 2 ** 16
+
+class _Index:
+    """Class for look-up table whose elements are computed on demand."""
+    __slots__ = ('function',)
+
+    def __init__(self, function):
+        self.function = function
+
+    def __getitem__(self, i):
+        return self.function(i)
+
 class Tree:
     """Class for program tree."""
     __slots__ = ('primitive_set', 'd', 'd_p')
@@ -15,7 +39,7 @@ class Tree:
     @property
     def m(self):
         """Return ary-ness of tree."""
-        return self.primitive_set.m
+        return self.primitive_set.freeze().m
 
     @property
     def d_s(self):
@@ -40,113 +64,150 @@ class Tree:
         return self.m ** (self.d_p + 1)
 
     @staticmethod
-    def _depth(m, d):
-        """Generate list of node depths, specified by node index.
+    def _descend(m, d, i):
+        """Return depth and first terminal node index for a function node.
 
-        Specifically, generate a list in which element `i` represents the 
-        depth of node `i` within a full `m`-ary tree of depth `d`, where 
-        node indices correspond to a preorder traversal of the tree.
+        Specifically, for the node whose index is `i` within a full 
+        `m`-ary function tree of depth `d`, where node indices correspond 
+        to a preorder traversal of the tree, return the depth of the node 
+        and the index of the first terminal node that corresponds to the 
+        subtree rooted at the node, where each leaf function node has 
+        `m` terminal nodes. Both are computed by descending from the root
+        node, one level at a time, in O(`d`) time and memory.
 
         Note that, in this context, depth increases from zero, starting 
-        with terminal nodes.
+        with leaf function nodes.
         """
-        if d == 0:
-            return [0]
-        else:
-            return [d] + (Tree._depth(m, d - 1) * m)
-
-    def depth(self):
-        """Generate list of node depths for a compacted tree."""
-        return (list(reversed(range(self.d_p + 1, self.d))) 
-            + Tree._depth(self.m, self.d_p))
+        t = 0
+        while i > 0:
+            # Number of nodes within each child subtree.
+            n_nodes_child = Tree._n_nodes(m, d - 1)
+            # Descend to the child subtree containing the node.
+            k, i = divmod(i - 1, n_nodes_child)
+            t += k * m ** d
+            d -= 1
+        return d, t
 
     @staticmethod
-    def _next_function(m, d, _d=0):
-        """Generate list with next relevant function node indices.
+    def _descend_all(m, d):
+        """Return arrays of node depths and first terminal node indices.
+
+        Specifically, return the results of the `_descend` method for 
+        every node of a full `m`-ary function tree of depth `d`, by way 
+        of one vectorized step per level.
+        """
+        i = np.arange(Tree._n_nodes(m, d), dtype=np.int64)
+        depth = np.full(len(i), d, dtype=np.int64)
+        t = np.zeros(len(i), dtype=np.int64)
+        for d_ in range(d, 0, -1):
+            inside = i > 0
+            k, i_ = np.divmod(i - 1, Tree._n_nodes(m, d_ - 1))
+            i = np.where(inside, i_, 0)
+            t += np.where(inside, k * m ** d_, 0)
+            depth -= inside
+        return depth, t
+
+    def depth_at(self, i):
+        """Return depth of function node `i` of a compacted tree."""
+        if i <= self.d_s:
+            return self.d - 1 - i
+        return Tree._descend(self.m, self.d_p, i - (self.d_s + 1))[0]
+
+    def next_function_at(self, i):
+        """Return next function node index for function node `i`.
         
-        Specifically, generate list in which certain elements `i` contain 
-        the index of the immediately following child of the parent of the 
-        node whose index is `i` within a full `m`-ary function tree of 
-        depth `d`, where node indices correspond to a preorder traversal 
-        of the tree. More specifically, all elements `i` such that there 
-        exists a node whose index is `i` and the aforementioned condition 
-        holds will contain the index of the next child of the parent
-        of node `i` within the relevant tree; all other elements within 
-        the list will contain some arbitrary value.
-
-        Note that the argument `_d` is meant for internal use only, 
-        to build the relevant recursion---a user is not meant to specify 
-        this value.
+        Specifically, for function node `i` of a compacted tree, return 
+        the index of the immediately following child of the parent of 
+        node `i`, within the parallel tree, or, otherwise, `i` itself.
         """
-        if _d == d:
-            # Return list containing the next function node index for
-            # the leftmost leaf node within the overall `m`-ary tree.
-            return [_d + 1]
-        else:
-            # Number of nodes within the current subtree.
-            n_nodes_ = Tree._n_nodes(m, d - _d)
-
-            # Number of nodes within each child subtree.
-            n_nodes_child = Tree._n_nodes(m, d - (_d + 1))
-
-            # List of relevant indices for the subtree rooted at the
-            # relevant leftmost child.
-            leftmost_child = Tree._next_function(m, d, _d + 1)
+        if i < self.d_s + 2:
+            return i
+        depth, _ = Tree._descend(self.m, self.d_p, i - (self.d_s + 1))
+        return min(i + Tree._n_nodes(self.m, depth), 
+            self.n_function_nodes() - 1)
 
-            # List of relevant indices for the subtrees rooted at the
-            # rightmost `m-1` children.
-            right_children = [j + (i * n_nodes_child) for i in range(1, m) 
-                for j in leftmost_child]
+    def next_terminal_at(self, i):
+        """Return next terminal node index for function node `i`.
 
-            # Return relevant list for the current subtree.
-            return [_d + n_nodes_] + leftmost_child + right_children
-
-    def next_function(self):
-        """Generate next function node indices for a compacted tree."""
-        n = self.n_function_nodes()
-        return (list(range(self.d_s + 2)) 
-            + [i + (self.d_s + 1) if i + (self.d_s + 1) < n else n - 1
-                for i in Tree._next_function(self.m, self.d_p)[1:]])
-
-    @staticmethod
-    def _next_terminal(m, d):
-        """Generate list with next relevant terminal node indices.
-        
-        Specifically, generate a list in which certain elements `i` contain
+        Specifically, for function node `i` of a compacted tree, return 
         the index of the first terminal node that corresponds to the next 
-        child of the parent of the node whose index is `i` within a full 
-        `m`-ary function tree of depth `d`, where node indices correspond 
-        to a preorder traversal of the tree. More specifically, all elements
-        `i` such that there exists a node whose index is `i` and the 
-        aforementioned condition holds will contain the index of the first 
-        terminal node that corresponds to the next child of the parent of 
-        node `i` within the tree; all other elements within the list will
-        contain some arbitrary value.
+        child of the parent of node `i`, within the parallel tree, or, 
+        otherwise, zero.
         """
-        if d == 0:
-            return [m]
-        else:
-            # Number of terminal nodes corresponding to each child 
-            # subtree of the root node.
-            n_terminal_nodes = m ** d
-
-            # List of relevant indices for the subtree rooted at the
-            # leftmost child.
-            leftmost_child = Tree._next_terminal(m, d-1)
+        if i < self.d_s + 2:
+            return 0
+        depth, t = Tree._descend(self.m, self.d_p, i - (self.d_s + 1))
+        return min(t + self.m ** (depth + 1), self.n_terminal_nodes() - 1)
+
+    def tables(self):
+        """Return look-up tables for a compacted tree.
+
+        Specifically, return the node depth, next function node index,
+        and next terminal node index tables, in which element `i` is 
+        given by the `depth_at`, `next_function_at`, and 
+        `next_terminal_at` methods, respectively, for function node `i`. 
+        Tables are read-only NumPy arrays that are computed once per 
+        configuration `(m, d, d_p)` and shared by all trees with this 
+        configuration. Since their length is the number of function 
+        nodes, the index methods are preferable for deep trees.
+        """
+        key = (self.m, self.d, self.d_p)
+        if key not in _tables:
+            m, n_s = self.m, self.d_s + 1
+            depth, t = Tree._descend_all(m, self.d_p)
+            n_nodes = np.array([Tree._n_nodes(m, d_) 
+                for d_ in range(self.d_p + 1)], dtype=np.int64)
+            i = np.arange(n_s, self.n_function_nodes(), dtype=np.int64)
+            tables = (
+                np.concatenate((self.d - 1 - np.arange(n_s), depth)),
+                np.concatenate((np.arange(n_s + 1), np.minimum(
+                    i + n_nodes[depth], self.n_function_nodes() - 1)[1:])),
+                np.concatenate((np.zeros(n_s + 1, dtype=np.int64), 
+                    np.minimum(t + m ** (depth + 1), 
+                        self.n_terminal_nodes() - 1)[1:])))
+            for table in tables:
+                table.flags.writeable = False
+            _tables[key] = tables
+        return _tables[key]
 
-            # List of relevant indices for the subtrees rooted at the
-            # rightmost `m-1` children.
-            right_children = [j + (i * n_terminal_nodes) for i in range(1, m) 
-                for j in leftmost_child]
+    def depth(self):
+        """Return node depths for a compacted tree."""
+        return self.tables()[0]
 
-            # Return relevant list for the current subtree.
-            return [m ** (d + 1)] + leftmost_child + right_children
+    def next_function(self):
+        """Return next function node indices for a compacted tree."""
+        return self.tables()[1]
 
     def next_terminal(self):
-        """Generate next terminal node indices for a compacted tree."""
-        n = self.n_terminal_nodes()
-        return ([0] * (self.d_s + 2) + [i if i < n else n - 1 
-            for i in Tree._next_terminal(self.m, self.d_p)[1:]])
+        """Return next terminal node indices for a compacted tree."""
+        return self.tables()[2]
+
+    def _lists(self):
+        """Return look-up tables for use within `machine_code`.
+
+        For trees with at most `_max_table_size` function nodes, the
+        tables are cached lists (since lists are indexed faster than
+        arrays); otherwise, they are objects that compute each element
+        when indexed, so that no table is materialized.
+        """
+        if self.n_function_nodes() > _max_table_size:
+            return (_Index(self.depth_at), _Index(self.next_function_at), 
+                _Index(self.next_terminal_at))
+        key = (self.m, self.d, self.d_p)
+        if key not in _table_lists:
+            _table_lists[key] = tuple(
+                table.tolist() for table in self.tables())
+        return _table_lists[key]
+
+    def prepare(self):
+        """Compute the look-up tables used by `machine_code`.
+
+        Tables are otherwise computed on first use, so calling this
+        method before worker processes are forked (e.g., by a pool)
+        lets every worker process inherit the tables, rather than
+        compute them anew.
+        """
+        self._lists()
 
     def machine_code(self, program):
         """Compile `gp.hw.program.Program` object to tree.
@@ -159,11 +220,14 @@ class Tree:
         program = program + [Node()]
         s = len(program)
 
+        # Compiled primitive set.
+        ps = self.primitive_set.freeze()
+
         # Number of functions in opcode set.
-        n_functions = len(self.primitive_set.functions)
+        n_functions = len(ps.function_names)
 
         # Function arities.
-        a = [self.primitive_set.arity(f) for f in self.primitive_set.functions]
+        a = ps.function_arities
 
         # Number of terminal nodes.
         n_terminal_nodes = self.n_terminal_nodes()
@@ -171,17 +235,10 @@ class Tree:
         # Number of function nodes.
         n_function_nodes = self.n_function_nodes()
 
-        # Look-up table for node depth, in relation to a given 
-        # function node index.
-        depth = self.depth()
-
-        # Look-up table for the next function node index, 
-        # in relation to a given function node index.
-        next_function = self.next_function()
-
-        # Look-up table for the next terminal node index, 
-        # in relation to a given function node index.
-        next_terminal = self.next_terminal()
+        # Look-up tables for node depth, the next function node index,
+        # and the next terminal node index, in relation to a given 
+        # function node index. (Lists are indexed faster than arrays.)
+        depth, next_function, next_terminal = self._lists()
 
         # Temporary counter to track the number of operands needed
         # until an operation or program is fully handled.
@@ -0,0 +1,59 @@
+"""Pack small programs of each corpus bin into shared tree windows.
+
+For each primitive set and each bin of the corpus, the programs that fit
+within the parallel tree are packed into disjoint subtrees of as few
+windows as possible (see the module `gp.hw.packing`). The packed windows
+and output routes of bin `j` are written to the file `packed/d{d}_p{d_p}/
+{j}.npz` within the directory for the primitive set, and the number of
+windows and the occupancy of the parallel tree, before and after packing,
+are printed for each bin.
+"""
+# Some relevant imports and initializations.
+import datetime as dt
+import os
+
+from gp.corpus.index import CorpusReader
+from gp.hw.packing import pack
+from gp.hw.program import Program
+from gp.hw.tree import Tree
+from gp.contexts.symbolic_regression.primitive_sets import \
+    nicolau_a, nicolau_b, nicolau_c
+
+# Useful file path.
+root_dir = f'{os.getcwd()}/../../results/programs'
+
+########################################################################
+
+# Primitive sets.
+primitive_sets = {
+    'nicolau_a' : nicolau_a,
+    'nicolau_b' : nicolau_b,
+    'nicolau_c' : nicolau_c,
+}
+
+# Program tree depth constraints for each primitive set.
+d = (9, 7, 7)
+
+# Parallel tree depths for each primitive set.
+d_p = (4, 4, 4)
+
+# Number of programs per bin.
+n_programs = 512
+
+for (name, ps), d_, p in zip(primitive_sets.items(), d, d_p):
+    print(f'({dt.datetime.now().ctime()}) Packing programs for primitive '
+          f'set `{name}`, tree depth {d_}, parallel depth {p}...')
+    packed_dir = f'{root_dir}/{name}/packed/d{d_}_p{p}'
+    os.makedirs(packed_dir, exist_ok=True)
+    tree = Tree(ps, d_, p)
+    with CorpusReader(f'{root_dir}/{name}/programs.txt', n_programs) as f:
+        for j in range(f.n_bins):
+            packed = pack([Program.from_str(p, ps) for p in f.read_bin(j)],
+                tree)
+            packed.save(f'{packed_dir}/{j}.npz')
+            n_packed = int(packed.packed.sum())
+            if n_packed > 0:
+                before, after = packed.occupancy()
+                print(f'    Bin {j + 1}: {n_packed} of {len(packed)} '
+                      f'programs packed, {n_packed} -> {packed.n_windows} '
+                      f'windows, occupancy {before:.2%} -> {after:.2%}')
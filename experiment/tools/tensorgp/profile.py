@@ -4,13 +4,14 @@ import pickle
 import sys
 import timeit
 
-import numpy as np
 import tensorflow as tf
 
 # sys.path.insert(1, './experiment/tools/setup/')
 sys.path.insert(1, '../setup/')
 from gp.contexts.symbolic_regression.primitive_sets import \
     nicolau_a, nicolau_b, nicolau_c
+from gp.corpus.dataset import load_dataset
+from gp.corpus.index import CorpusReader
 
 # sys.path.insert(1, './experiment/tools/tensorgp/tensorgp')
 sys.path.insert(1, './tensorgp')
@@ -20,6 +21,11 @@ from tensorgp.engine import *
 # root_dir = (f'{os.getcwd()}/experiment/results/programs')
 root_dir = (f'{os.getcwd()}/../../results/programs')
 
+# Directory containing input/target data (e.g., that generated 
+# by the `generate_dataset.py` script, for larger numbers of 
+# fitness cases).
+data_dir = f'{root_dir}/..'
+
 ########################################################################
 
 def rmse(**kwargs):
@@ -87,12 +93,7 @@ n_runs = 11
 runtimes = []
 
 # Load input/target data.
-with open(f'{root_dir}/../inputs.pkl', 'rb') as f:
-    inputs = pickle.load(f)
-with open(f'{root_dir}/../target.pkl', 'rb') as f:
-    target = pickle.load(f)
-inputs = np.asarray(inputs)
-target = np.asarray(target)
+inputs, target = load_dataset(data_dir)
 
 for device in devices:
     # Prepare for statistics relevant to the device.
@@ -102,10 +103,11 @@ for device in devices:
         # Prepare for statistics relevant to primitive set.
         runtimes[-1].append([])
 
-        # Read in the programs relevant to the primitive set from file.
-        # This file contains `n_bins * n_programs` programs.
-        with open(f'{root_dir}/{name}/programs_tensorgp.txt', 'r') as f:
-            programs = f.readlines()
+        # Open the programs relevant to the primitive set. The file
+        # contains `n_bins * n_programs` programs, and each bin is
+        # read from file only when needed.
+        programs = CorpusReader(
+            f'{root_dir}/{name}/programs_tensorgp.txt', n_programs)
 
         for nfc in n_fitness_cases:
             # Create a terminal set relevant to the primitive set.
@@ -161,7 +163,7 @@ for device in devices:
 
                 # Population relevant to the current size bin.
                 population, *_ = engine.generate_pop_from_expr(
-                    programs[n_programs * (i) : n_programs * (i + 1)])
+                    programs.read_bin(i))
 
                 # Raw runtimes after running the `evaluate`
                 # function a total of `n_runs` times.